@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import tempfile
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.config as config
+
+# Configuración a evaluar en el proceso hijo (JSON). Se aplica al importar el script,
+# antes que cualquier módulo de src, para que también la vean los workers (spawn)
+CONFIG_ENV = 'OCR_EVALUATION_CONFIG'
+DEFAULT_CORPUS = config.BASE_DIR / "benchmarks" / "corpus"
+# ROI_HEADER/FOOTER_PERCENTAGE solo se leen sin lectura incremental (ENABLE_EARLY_STOPPING=false)
+DEFAULT_CONFIGS = (
+    '',
+    'ENABLE_ROI_OCR=false,ENABLE_EARLY_STOPPING=false',
+    'ENABLE_EARLY_STOPPING=false,ROI_HEADER_PERCENTAGE=0.2'
+)
+# Página sin predicción (PDF con error o página ausente del reporte)
+MISSING_LABEL = "MISSING"
+
+
+def parse_config(spec: str) -> Dict:
+
+    # "CLAVE=valor,..." con valores JSON (true, 0.2, "texto"); @fichero.json para
+    # valores compuestos como DOCUMENT_TYPES
+    overrides = {}
+    for item in filter(None, spec.split(',')):
+        name, value = item.split('=', 1)
+        name = name.strip()
+        if not hasattr(config, name):
+            raise ValueError(f"{name} no existe en src/config.py")
+        if value.startswith('@'):
+            value = Path(value[1:]).read_text(encoding='utf-8')
+        try:
+            overrides[name] = json.loads(value)
+        except json.JSONDecodeError:
+            overrides[name] = value
+    return overrides
+
+
+def apply_config(run: Dict):
+
+    workdir = Path(run['workdir'])
+    overrides = {
+        'PDF_INPUT_FOLDER': Path(run['corpus']),
+        'CLASSIFICATION_FOLDER': workdir / "clasificacion",
+        'PDF_OUTPUT_FOLDER': workdir / "pdfs_procesados",
+        'EXCEL_REPORT_PATH': workdir / "clasificacion" / "reporte_clasificacion.xlsx",
+        'LOG_FILE': workdir / "evaluation.log",
+        # Cada configuración hace su propio OCR: sin caché ni journal compartidos
+        'ENABLE_OCR_CACHE': False,
+        'ENABLE_WORK_JOURNAL': False,
+        **run['overrides']
+    }
+    for name, value in overrides.items():
+        setattr(config, name, value)
+
+
+if os.environ.get(CONFIG_ENV):
+    apply_config(json.loads(os.environ[CONFIG_ENV]))
+
+
+def run_child(result_path: Path):
+
+    from main import DocumentProcessor
+
+    # Los modelos se cargan al primer uso: se fuerzan aquí para que no cuenten en
+    # el tiempo de proceso ni en la primera muestra de OCR/orientación
+    start = time.perf_counter()
+    processor = DocumentProcessor()
+    processor.ocr.load_models()
+    startup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = processor.process_all_pdfs()
+    elapsed = time.perf_counter() - start
+
+    # Predicción por página desde el reporte JSON de cada PDF
+    predictions = {}
+    for report_path in sorted(config.CLASSIFICATION_FOLDER.glob("*/*_clasificacion.json")):
+        report = json.loads(report_path.read_text(encoding='utf-8'))
+        predictions[report['pdf_name']] = {
+            str(page['page_number']): {
+                'type': page['document_type'],
+                'used_roi': page['used_roi'],
+                'text_source': page.get('text_source', 'ocr')
+            }
+            for page in report['classifications']
+        }
+
+    report = {
+        'startup_s': round(startup, 3),
+        'elapsed_s': round(elapsed, 3),
+        'pages': results.get('total_pages', 0),
+        'ocr_calls': results.get('ocr_calls', 0),
+        'failed_pdfs': results.get('failed_pdfs', []),
+        'predictions': predictions,
+    }
+    Path(result_path).write_text(json.dumps(report), encoding='utf-8')
+
+
+def confusion_matrix(manifest: Dict, predictions: Dict) -> Dict[str, Counter]:
+
+    confusion = defaultdict(Counter)
+    for pdf in manifest['pdfs']:
+        predicted_pages = predictions.get(pdf['file'], {})
+        for page in pdf['pages']:
+            predicted = predicted_pages.get(str(page['page']), {}).get('type', MISSING_LABEL)
+            confusion[page['type']][predicted] += 1
+    return confusion
+
+
+def per_type_metrics(confusion: Dict[str, Counter]) -> Dict[str, Dict]:
+
+    labels = sorted(set(confusion) | {label for row in confusion.values() for label in row})
+    metrics = {}
+    for label in labels:
+        hits = confusion.get(label, Counter())[label]
+        predicted = sum(row[label] for row in confusion.values())
+        actual = sum(confusion.get(label, Counter()).values())
+        precision = hits / predicted if predicted else 0.0
+        recall = hits / actual if actual else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        metrics[label] = {
+            'precision': round(precision, 4),
+            'recall': round(recall, 4),
+            'f1': round(f1, 4),
+            'support': actual,
+        }
+    return metrics
+
+
+def evaluate(manifest: Dict, child: Dict) -> Dict:
+
+    confusion = confusion_matrix(manifest, child['predictions'])
+    per_type = per_type_metrics(confusion)
+    total = sum(sum(row.values()) for row in confusion.values())
+    correct = sum(row[label] for label, row in confusion.items())
+    # Macro-F1 sobre los tipos con páginas reales (los solo predichos no cuentan)
+    supported = [metrics['f1'] for metrics in per_type.values() if metrics['support']]
+
+    # Páginas OCR resueltas solo con ROI / lectura parcial, sobre las que pasaron por OCR
+    ocr_pages = [
+        page for pages in child['predictions'].values() for page in pages.values()
+        if page['text_source'] == 'ocr'
+    ]
+    roi_only = sum(1 for page in ocr_pages if page['used_roi'])
+    pages = child['pages']
+
+    return {
+        'accuracy': round(correct / total, 4) if total else 0.0,
+        'macro_f1': round(sum(supported) / len(supported), 4) if supported else 0.0,
+        'roi_only_rate': round(roi_only / len(ocr_pages), 4) if ocr_pages else 0.0,
+        'ocr_calls_per_page': round(child['ocr_calls'] / pages, 3) if pages else 0.0,
+        'pages_per_s': round(pages / child['elapsed_s'], 3) if child['elapsed_s'] else 0.0,
+        'per_type': per_type,
+        'confusion': {label: dict(row) for label, row in sorted(confusion.items())},
+    }
+
+
+def run_config(spec: str, corpus: Path, keep: bool) -> Dict:
+
+    workdir = Path(tempfile.mkdtemp(prefix="ocr_evaluation_"))
+    result_path = workdir / "result.json"
+    env = dict(os.environ)
+    env[CONFIG_ENV] = json.dumps({
+        'overrides': parse_config(spec), 'corpus': str(corpus), 'workdir': str(workdir)
+    })
+
+    # Un proceso por configuración: los módulos leen la configuración al importarse
+    with open(workdir / "stdout.log", 'w', encoding='utf-8') as log:
+        process = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), '--child', str(result_path)],
+            env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+    if process.returncode != 0 or not result_path.exists():
+        child = {'error': f"código {process.returncode}, ver {workdir / 'stdout.log'}"}
+        keep = True
+    else:
+        child = json.loads(result_path.read_text(encoding='utf-8'))
+
+    if not keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return child
+
+
+def print_table(runs: List[Dict]):
+
+    # Numeradas: las columnas de la tabla por tipo siguen el mismo orden
+    names = [f"{index}. {run['config'] or '(config actual)'}" for index, run in enumerate(runs, 1)]
+    width = max(len(name) for name in names) + 2
+    print(f"{'configuración':<{width}}{'accuracy':>10}{'macro F1':>10}{'solo ROI':>10}"
+          f"{'OCR/pág':>10}{'pág/s':>10}", file=sys.stderr)
+    for name, run in zip(names, runs):
+        if 'error' in run:
+            print(f"{name:<{width}}ERROR {run['error']}", file=sys.stderr)
+            continue
+        print(f"{name:<{width}}{run['accuracy']:>10.3f}{run['macro_f1']:>10.3f}{run['roi_only_rate']:>10.1%}"
+              f"{run['ocr_calls_per_page']:>10.2f}{run['pages_per_s']:>10.2f}", file=sys.stderr)
+
+    # Precisión/recall por tipo, una columna por configuración
+    evaluated = [run for run in runs if 'error' not in run]
+    labels = sorted({label for run in evaluated for label in run['per_type']})
+    if not labels:
+        return
+    type_width = max(len(label) for label in labels) + 2
+    print(f"\n{'tipo (P/R)':<{type_width}}" + ''.join(f"{runs.index(run) + 1:>14}" for run in evaluated),
+          file=sys.stderr)
+    for label in labels:
+        cells = []
+        for run in evaluated:
+            metrics = run['per_type'].get(label)
+            cells.append(f"{metrics['precision']:.2f}/{metrics['recall']:.2f}" if metrics else "-")
+        print(f"{label:<{type_width}}" + ''.join(f"{cell:>14}" for cell in cells), file=sys.stderr)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Precisión y throughput del clasificador por configuración")
+    parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument('--labels', type=Path,
+                        help="manifest JSON con el tipo real de cada página (por defecto, corpus sintético)")
+    parser.add_argument('--documents', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--config', action='append',
+                        help="p. ej. EARLY_STOPPING_BANDS=4,ANGLE_CONFIDENCE_THRESHOLD=0.6 (repetible)")
+    parser.add_argument('--output', type=Path, help="fichero JSON de resultados")
+    parser.add_argument('--keep', action='store_true', help="conservar las carpetas de trabajo")
+    parser.add_argument('--child', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    if args.labels:
+        manifest = json.loads(args.labels.read_text(encoding='utf-8'))
+    else:
+        from benchmarks.synthetic_corpus import build_corpus
+        manifest = build_corpus(args.corpus, args.documents, args.seed)
+
+    # Una clave mal escrita se detecta antes de la primera ejecución
+    specs = args.config or DEFAULT_CONFIGS
+    for spec in specs:
+        try:
+            parse_config(spec)
+        except (ValueError, OSError) as e:
+            parser.error(f"--config {spec}: {e}")
+
+    runs = []
+    for spec in specs:
+        child = run_config(spec, args.corpus, args.keep)
+        if 'error' in child:
+            runs.append({'config': spec, 'error': child['error']})
+            continue
+        runs.append({
+            'config': spec,
+            'failed_pdfs': child['failed_pdfs'],
+            'startup_s': child['startup_s'],
+            **evaluate(manifest, child)
+        })
+
+    print_table(runs)
+
+    from benchmarks.pipeline_benchmark import git_commit
+    report = {
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'labels': str(args.labels or args.corpus / "manifest.json"),
+        'pages': sum(len(pdf['pages']) for pdf in manifest['pdfs']),
+        'runs': runs,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text, encoding='utf-8')
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import sys
+import json
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.config as config
+
+# Presupuesto de arranque: importar main y salir con la carpeta de entrada vacía.
+# Las dependencias pesadas solo se cargan al primer uso
+IMPORT_BUDGET_S = 0.3
+HEAVY_MODULES = ('paddle', 'paddleocr', 'cv2', 'openpyxl', 'fitz', 'pymupdf')
+
+# Proceso hijo: tiempos de import y de la ejecución sin PDFs, y módulos pesados cargados
+CHILD_CODE = """
+import sys, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.PDF_INPUT_FOLDER = main.Path(sys.argv[1])
+main.LOG_FILE = main.Path(sys.argv[1]) / "startup.log"
+sys.argv = ['main.py']
+main.main()
+finished = time.perf_counter()
+print(json.dumps({
+    'import_s': imported - start,
+    'empty_run_s': finished - start,
+    'heavy_loaded': [name for name in HEAVY_MODULES if name in sys.modules],
+}))
+"""
+
+
+def run_child(empty_folder: Path) -> Dict:
+
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\n{CHILD_CODE}"
+    process = subprocess.run(
+        [sys.executable, '-c', code, str(empty_folder)],
+        cwd=config.BASE_DIR, capture_output=True, text=True, check=True
+    )
+    # La última línea es el JSON (fitz y otros pueden escribir avisos antes)
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int) -> List[Dict]:
+
+    # -X importtime: tiempo acumulado (us) de cada módulo que importa main directamente
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=config.BASE_DIR, capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            modules.append({'module': name.strip(), 'ms': round(int(cumulative) / 1000, 1)})
+    return sorted(modules, key=lambda module: module['ms'], reverse=True)[:limit]
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de la CLI frente a un presupuesto")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_S, help="segundos")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ocr_startup_") as empty_folder:
+        runs = [run_child(Path(empty_folder)) for _ in range(args.repeat)]
+
+    # El mínimo de varias ejecuciones: el ruido del sistema solo suma
+    report = {
+        'budget_s': args.budget,
+        'import_s': round(min(run['import_s'] for run in runs), 4),
+        'empty_run_s': round(min(run['empty_run_s'] for run in runs), 4),
+        'heavy_loaded': sorted({name for run in runs for name in run['heavy_loaded']}),
+        'slowest_imports': slowest_imports(args.top),
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if report['empty_run_s'] > args.budget:
+        failures.append(f"arranque {report['empty_run_s']:.3f}s > {args.budget:.3f}s")
+    if report['heavy_loaded']:
+        failures.append(f"módulos pesados cargados al arrancar: {', '.join(report['heavy_loaded'])}")
+    if failures:
+        print("FUERA DE PRESUPUESTO: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.converters.pdf_converter import PDFConverter
+from src.processors.ocr_processor import OCRProcessor
+from src.config import PDF_INPUT_FOLDER, ORIENTATION_BATCH_SIZE
+
+
+def load_pages(pdf_files, max_pages):
+
+    # Se fuerza el raster: interesa medir el modelo, no la capa de texto
+    converter = PDFConverter(use_text_layer=False)
+    pages = []
+    for pdf_file in pdf_files:
+        with converter.open_pdf(pdf_file) as session:
+            for page_data in converter.convert_pdf_pages(session):
+                # El raster diferido solo es válido mientras la sesión siga abierta
+                if page_data['success'] and page_data.get('raster') is not None:
+                    pages.append((page_data['raster'].full(), page_data['thumbnail']))
+                if len(pages) >= max_pages:
+                    return pages
+    return pages
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Orientación: página a página vs batch de miniaturas")
+    parser.add_argument('--folder', type=Path, default=PDF_INPUT_FOLDER)
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--batch-size', type=int, default=ORIENTATION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    pages = load_pages(sorted(args.folder.glob("*.pdf")), args.pages)
+    if not pages:
+        print(f"No hay páginas en {args.folder}")
+        return
+
+    arrays = [full for full, _ in pages]
+    thumbnails = [thumbnail for _, thumbnail in pages]
+    ocr = OCRProcessor()
+    # Carga de modelos fuera de las mediciones (se cargan al primer uso)
+    ocr.load_models()
+
+    # Antes: una llamada por página a resolución completa
+    start = time.perf_counter()
+    for array in arrays:
+        ocr.document_orientation.predict(array)
+    single_time = time.perf_counter() - start
+
+    # Después: miniaturas renderizadas a baja resolución, en batches
+    start = time.perf_counter()
+    for i in range(0, len(thumbnails), args.batch_size):
+        ocr.document_orientation_angles(thumbnails[i:i + args.batch_size], batch_size=args.batch_size)
+    batch_time = time.perf_counter() - start
+
+    print(f"Páginas: {len(arrays)}")
+    print(f"Página a página: {len(arrays) / single_time:.2f} páginas/s")
+    print(f"Batch ({args.batch_size}, miniaturas): {len(arrays) / batch_time:.2f} páginas/s")
+    print(f"Mejora: x{single_time / batch_time:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import subprocess
+import tempfile
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.config as config
+from src.utils.stage_timer import StageTimer
+
+# Modo a ejecutar en el proceso hijo (JSON). Los workers (spawn) reimportan este
+# script, así que la configuración se aplica aquí, antes de importar nada más
+MODE_ENV = 'OCR_BENCHMARK_MODE'
+DEFAULT_CORPUS = config.BASE_DIR / "benchmarks" / "corpus"
+DEFAULT_MODES = (
+    'roi=on,early_stop=on,dpi=180,workers=1',
+    'roi=on,early_stop=off,dpi=180,workers=1',
+    'roi=off,dpi=180,workers=1',
+    'roi=on,early_stop=on,dpi=150,workers=1'
+)
+MODE_AXES = ('roi', 'early_stop', 'dpi', 'workers')
+
+
+def apply_mode(mode: Dict):
+
+    workdir = Path(mode['workdir'])
+    overrides = {
+        'PDF_INPUT_FOLDER': Path(mode['corpus']),
+        'CLASSIFICATION_FOLDER': workdir / "clasificacion",
+        'PDF_OUTPUT_FOLDER': workdir / "pdfs_procesados",
+        'EXCEL_REPORT_PATH': workdir / "clasificacion" / "reporte_clasificacion.xlsx",
+        'LOG_FILE': workdir / "benchmark.log",
+        # Se mide el trabajo real: sin caché OCR ni journal de ejecuciones anteriores
+        'ENABLE_OCR_CACHE': False,
+        'ENABLE_WORK_JOURNAL': False,
+        'ENABLE_ROI_OCR': mode['roi'],
+        'ENABLE_EARLY_STOPPING': mode['early_stop'],
+        'PDF_DPI': mode['dpi'],
+        'ENABLE_PARALLEL_PROCESSING': mode['workers'] > 1,
+        'MAX_WORKERS': mode['workers'],
+    }
+    for name, value in overrides.items():
+        setattr(config, name, value)
+
+
+if os.environ.get(MODE_ENV):
+    apply_mode(json.loads(os.environ[MODE_ENV]))
+
+
+class SampledStageTimer(StageTimer):
+
+    # Además del total, la duración (propia) de cada llamada: percentiles por etapa
+    def __init__(self):
+        super().__init__()
+        self.samples = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name: str):
+
+        sample = {}
+        try:
+            with super().stage(name) as sample:
+                yield sample
+        finally:
+            self.samples[name].append(sample.get('seconds', 0.0))
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def stage_stats(timer: SampledStageTimer) -> Dict:
+
+    stats = {}
+    for name, samples in timer.samples.items():
+        ordered = sorted(samples)
+        stats[name] = {
+            'calls': len(ordered),
+            'total_s': round(sum(ordered), 4),
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+            'p90_ms': round(percentile(ordered, 0.90) * 1000, 3),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+            'max_ms': round(ordered[-1] * 1000, 3),
+        }
+    return stats
+
+
+def peak_rss_mb(who: int) -> float:
+
+    # Linux: ru_maxrss en KiB (macOS: bytes)
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_child(result_path: Path):
+
+    from main import DocumentProcessor
+
+    # Los modelos se cargan al primer uso: se fuerzan aquí para que no cuenten en
+    # el tiempo de proceso ni en la primera muestra de OCR/orientación
+    start = time.perf_counter()
+    processor = DocumentProcessor()
+    processor.ocr.load_models()
+    startup = time.perf_counter() - start
+
+    # Con workers>1 las etapas se ejecutan en otros procesos: solo se mide el total
+    processor.timer = SampledStageTimer()
+    start = time.perf_counter()
+    results = processor.process_all_pdfs()
+    elapsed = time.perf_counter() - start
+
+    pages = results.get('total_pages', 0)
+    ocr_pages = pages - results.get('text_layer_pages', 0) - results.get('blank_pages', 0)
+    report = {
+        'startup_s': round(startup, 3),
+        'elapsed_s': round(elapsed, 3),
+        'pdfs': results.get('successful', 0),
+        'failed': results.get('failed', 0),
+        'pages': pages,
+        'pages_per_s': round(pages / elapsed, 3) if elapsed else 0.0,
+        'text_layer_pages': results.get('text_layer_pages', 0),
+        'blank_pages': results.get('blank_pages', 0),
+        'roi_pages': results.get('roi_optimizations', 0),
+        'ocr_calls': results.get('ocr_calls', 0),
+        'ocr_calls_per_page': round(results.get('ocr_calls', 0) / pages, 3) if pages else 0.0,
+        'ocr_calls_per_scanned_page': round(results.get('ocr_calls', 0) / ocr_pages, 3) if ocr_pages else 0.0,
+        'stages': stage_stats(processor.timer),
+        'stage_pixels': {name: pixels for name, pixels in processor.timer.pixels.items() if pixels},
+        'peak_rss_mb': peak_rss_mb(resource.RUSAGE_SELF),
+        'peak_rss_workers_mb': peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+    Path(result_path).write_text(json.dumps(report), encoding='utf-8')
+
+
+def parse_mode(spec: str) -> Dict:
+
+    values = dict(item.split('=', 1) for item in spec.split(',') if item)
+    unknown = set(values) - set(MODE_AXES)
+    if unknown:
+        raise ValueError(f"ejes desconocidos: {', '.join(sorted(unknown))} (válidos: {', '.join(MODE_AXES)})")
+    roi = values.get('roi', 'on') in ('on', '1', 'true')
+    # La lectura incremental solo existe con ROI: sin ROI siempre es página completa
+    early_stop = roi and values.get('early_stop', 'on') in ('on', '1', 'true')
+    mode = {
+        'roi': roi,
+        'early_stop': early_stop,
+        'dpi': int(values.get('dpi', config.PDF_DPI)),
+        'workers': int(values.get('workers', 1)),
+    }
+    # El nombre describe lo que se midió, no lo que se escribió en --mode
+    mode['name'] = (f"roi={'on' if roi else 'off'},early_stop={'on' if early_stop else 'off'},"
+                    f"dpi={mode['dpi']},workers={mode['workers']}")
+    return mode
+
+
+def git_commit() -> str:
+
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=config.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_mode(mode: Dict, corpus: Path, keep: bool) -> Dict:
+
+    workdir = Path(tempfile.mkdtemp(prefix="ocr_benchmark_"))
+    result_path = workdir / "result.json"
+    env = dict(os.environ)
+    env[MODE_ENV] = json.dumps({**mode, 'corpus': str(corpus), 'workdir': str(workdir)})
+
+    # Un proceso por modo: configuración limpia y RSS máximo propio
+    with open(workdir / "stdout.log", 'w', encoding='utf-8') as log:
+        process = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), '--child', str(result_path)],
+            env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+    if process.returncode != 0 or not result_path.exists():
+        report = {'error': f"código {process.returncode}, ver {workdir / 'stdout.log'}"}
+        keep = True
+    else:
+        report = json.loads(result_path.read_text(encoding='utf-8'))
+
+    if not keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {'mode': mode, **report}
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Throughput del pipeline sobre un corpus sintético")
+    parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument('--documents', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mode', action='append',
+                        help="p. ej. roi=on,early_stop=off,dpi=180,workers=2 (repetible)")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--output', type=Path, help="fichero JSON de resultados")
+    parser.add_argument('--keep', action='store_true', help="conservar las carpetas de trabajo")
+    parser.add_argument('--child', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    from benchmarks.synthetic_corpus import build_corpus
+
+    # Un eje mal escrito se detecta antes de la primera ejecución
+    modes = []
+    for spec in args.mode or DEFAULT_MODES:
+        try:
+            modes.append(parse_mode(spec))
+        except ValueError as e:
+            parser.error(f"--mode {spec}: {e}")
+
+    manifest = build_corpus(args.corpus, args.documents, args.seed)
+    runs = []
+    for mode in modes:
+        spec = mode['name']
+        for repeat in range(args.repeat):
+            run = run_mode(mode, args.corpus, args.keep)
+            runs.append(run)
+            if 'error' in run:
+                print(f"{spec}: ERROR {run['error']}", file=sys.stderr)
+            else:
+                print(
+                    f"{spec} [{repeat + 1}/{args.repeat}]: {run['pages_per_s']:.2f} páginas/s, "
+                    f"{run['ocr_calls_per_page']:.2f} llamadas OCR/página, RSS {run['peak_rss_mb']} MB",
+                    file=sys.stderr
+                )
+
+    report = {
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'corpus': {
+            'seed': manifest['seed'],
+            'pdfs': len(manifest['pdfs']),
+            'pages': sum(len(pdf['pages']) for pdf in manifest['pdfs']),
+        },
+        'runs': runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding='utf-8')
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import sys
+import json
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+import fitz  # PyMuPDF
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import DOCUMENT_TYPES, BLANK_DOCUMENT_TYPE
+
+SCAN_DPI = 150
+PAGE_SIZE = (595, 842)  # A4 en puntos
+# Perfiles de PDF, en este orden cíclico: el corpus cubre todos aunque sea pequeño
+PROFILES = ('text', 'scan', 'rotated', 'bundle')
+FILLER_WORDS = (
+    'item', 'qty', 'reference', 'line', 'code', 'date', 'page', 'remarks',
+    'contact', 'phone', 'street', 'city', 'country', 'weight', 'notes'
+)
+
+
+def exclusive_keywords(doc_type: str) -> List[str]:
+
+    # Keywords secundarias que no aparecen en ningún otro tipo: la etiqueta esperada no es ambigua
+    others = {
+        keyword.lower()
+        for other, config in DOCUMENT_TYPES.items() if other != doc_type
+        for keyword in config['primary_keywords'] + config['secondary_keywords']
+    }
+    keywords = DOCUMENT_TYPES[doc_type]['secondary_keywords']
+    exclusive = [keyword for keyword in keywords if keyword.lower() not in others]
+    return exclusive or keywords
+
+
+def page_lines(doc_type: str, rng: random.Random) -> List[str]:
+
+    config = DOCUMENT_TYPES[doc_type]
+    secondary = exclusive_keywords(doc_type)
+    count = min(len(secondary), config.get('min_secondary_matches', 2) + 3)
+
+    lines = [config['primary_keywords'][0].upper(), f"No. {rng.randint(10000, 99999)}"]
+    for keyword in rng.sample(secondary, count):
+        lines.append(f"{keyword}: {rng.randint(1, 9999)}")
+    for _ in range(rng.randint(6, 14)):
+        lines.append(' '.join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(3, 7))))
+    return lines
+
+
+def text_page(pdf: fitz.Document, lines: List[str]) -> fitz.Page:
+
+    page = pdf.new_page(width=PAGE_SIZE[0], height=PAGE_SIZE[1])
+    y = 72
+    for index, line in enumerate(lines):
+        page.insert_text((60, y), line, fontsize=16 if index == 0 else 11)
+        y += 26 if index == 0 else 18
+    return page
+
+
+def scan_page(pdf: fitz.Document, lines: List[str], quarter_turns: int, seed: int):
+
+    # Página de texto rasterizada en grises con ruido de escáner y sin capa de texto
+    source = fitz.open()
+    pix = text_page(source, lines).get_pixmap(dpi=SCAN_DPI, colorspace=fitz.csGRAY)
+    pixels = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+    source.close()
+
+    noise = np.random.default_rng(seed).normal(0, 6, pixels.shape)
+    pixels = np.clip(pixels.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    pixels = np.ascontiguousarray(np.rot90(pixels, quarter_turns))
+
+    height, width = pixels.shape
+    scanned = fitz.Pixmap(fitz.csGRAY, width, height, pixels.tobytes(), 0)
+    size = PAGE_SIZE if quarter_turns % 2 == 0 else PAGE_SIZE[::-1]
+    page = pdf.new_page(width=size[0], height=size[1])
+    page.insert_image(page.rect, stream=scanned.tobytes("jpeg", jpg_quality=80))
+
+
+def build_pdf(path: Path, profile: str, rng: random.Random, seed: int) -> List[Dict]:
+
+    types = list(DOCUMENT_TYPES)
+    if profile == 'bundle':
+        documents = rng.sample(types, rng.randint(2, 4))
+    else:
+        documents = [rng.choice(types)]
+
+    pdf = fitz.open()
+    pages = []
+    for doc_index, doc_type in enumerate(documents):
+        # Separador en blanco entre documentos de un lote escaneado
+        if profile == 'bundle' and doc_index > 0 and rng.random() < 0.5:
+            pdf.new_page(width=PAGE_SIZE[0], height=PAGE_SIZE[1])
+            pages.append({'page': len(pages) + 1, 'type': BLANK_DOCUMENT_TYPE, 'source': 'blank', 'rotation': 0})
+
+        for _ in range(rng.randint(1, 3)):
+            lines = page_lines(doc_type, rng)
+            if profile == 'text':
+                text_page(pdf, lines)
+                source, quarter_turns = 'text_layer', 0
+            else:
+                quarter_turns = rng.randint(1, 3) if profile == 'rotated' else 0
+                scan_page(pdf, lines, quarter_turns, seed * 1000 + len(pages))
+                source = 'ocr'
+            pages.append({
+                'page': len(pages) + 1,
+                'type': doc_type,
+                'source': source,
+                'rotation': 90 * quarter_turns
+            })
+
+    pdf.save(path, garbage=3, deflate=True)
+    pdf.close()
+    return pages
+
+
+def build_corpus(folder: Path, documents: int = 12, seed: int = 0) -> Dict:
+                                            #Returns: manifest con el tipo esperado de cada página
+
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    manifest_path = folder / "manifest.json"
+
+    # Mismo seed y tamaño: se reutiliza el corpus ya generado
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        if manifest['seed'] == seed and len(manifest['pdfs']) == documents:
+            return manifest
+
+    for old_pdf in folder.glob("*.pdf"):
+        old_pdf.unlink()
+
+    rng = random.Random(seed)
+    pdfs = []
+    for index in range(documents):
+        profile = PROFILES[index % len(PROFILES)]
+        filename = f"bench_{index:03d}_{profile}.pdf"
+        pages = build_pdf(folder / filename, profile, rng, seed + index)
+        pdfs.append({'file': filename, 'profile': profile, 'pages': pages})
+
+    manifest = {'seed': seed, 'pdfs': pdfs}
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    return manifest
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Corpus sintético reproducible de PDFs para benchmarks")
+    parser.add_argument('folder', type=Path)
+    parser.add_argument('--documents', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    manifest = build_corpus(args.folder, args.documents, args.seed)
+    total_pages = sum(len(pdf['pages']) for pdf in manifest['pdfs'])
+    print(f"{len(manifest['pdfs'])} PDFs, {total_pages} páginas en {args.folder}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,101 @@
 from pathlib import Path
-from typing import Dict
+from typing import Callable, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+import argparse
 import gc
+import math
+import shutil
+import signal
+import threading
+import time
 from datetime import datetime
-import cv2
-from PIL import Image
 from src.config import (
     PDF_INPUT_FOLDER,
     LOG_FILE,
     LOG_LEVEL,
-    ENABLE_ROI_OCR, ANGLE_CONFIDENCE_THRESHOLD
+    ENABLE_ROI_OCR, ANGLE_CONFIDENCE_THRESHOLD,
+    ENABLE_EARLY_STOPPING, EARLY_STOPPING_CONFIDENCE, EARLY_STOPPING_BANDS,
+    ENABLE_PARALLEL_PROCESSING, MAX_WORKERS, WORKER_CPU_THREADS,
+    ENABLE_PAGE_SHARDING, SHARD_MIN_PAGES, SHARD_PAGE_COUNT,
+    ENABLE_OCR_CACHE, PAGE_WINDOW_SIZE, ENABLE_WORK_JOURNAL, ENABLE_PAGE_TEXT_STORE, RECLASSIFY_BATCH_PDFS,
+    ENABLE_PIPELINE, PIPELINE_QUEUE_SIZE,
+    WATCH_CONCURRENCY, WATCH_STABLE_SECONDS, WATCH_POLL_SECONDS,
+    WATCH_DONE_FOLDER, WATCH_FAILED_FOLDER, WATCH_EXCEL_IDLE_SECONDS,
+    API_PORT, API_WORKERS,
+    ENABLE_PROFILING, PROFILING_FOLDER, PROFILING_PROMETHEUS, PROFILING_TRACK_RSS,
+    BLANK_DOCUMENT_TYPE
 )
 from src.utils.logger import setup_logging
 from src.converters.pdf_converter import PDFConverter
+from src.converters.pdf_session import PDFSession
 from src.processors.ocr_processor import OCRProcessor
 from src.processors.classifier import DocumentClassifier
 from src.generators.pdf_generator import PDFGenerator
+from src.generators.excel_report import ExcelReportWriter
+from src.utils.parallel import PDFWorkerPool
+from src.utils.ocr_cache import OCRCache
+from src.utils.pipeline import StagedPipeline
+from src.utils.work_journal import WorkJournal
+from src.utils.run_summary import RunSummary
+from src.utils.folder_watcher import FolderWatcher, LatencyStats
+from src.utils.stage_timer import StageTimer
+from src.utils.page_texts import (
+    PAGE_FIELDS, page_texts_path, iter_page_texts_files, write_page_texts, read_page_texts
+)
 
 class DocumentProcessor:
     
-    def __init__(self):
+    def __init__(self, cpu_threads: int = None, use_journal: bool = ENABLE_WORK_JOURNAL):
         
         self.logger = setup_logging(LOG_FILE, LOG_LEVEL)
         self.logger.info("  Inicializando sistema...")     
-        self.converter = PDFConverter()
-        self.ocr = OCRProcessor()
+        self.converter = PDFConverter(page_signatures=ENABLE_OCR_CACHE)
+        self.ocr = OCRProcessor(cpu_threads=cpu_threads)
+        self.ocr.stage = self._stage
         self.classifier = DocumentClassifier()
         self.generator = PDFGenerator()
+        self.excel_writer = ExcelReportWriter()
+        self.cache = OCRCache() if ENABLE_OCR_CACHE else None
+        self.journal = WorkJournal() if use_journal else None
+        # PDFs terminados cuya fila del Excel aún no está en disco
+        self.pending_done = []
+        # Perfilado por etapas; desactivado, cada etapa es un nullcontext
+        self.timer = StageTimer(track_memory=PROFILING_TRACK_RSS) if ENABLE_PROFILING else None
         self.logger.info("✓ Sistema listo\n")
     
-    def process_pdf(self, pdf_path: Path) -> Dict:
+    def _stage(self, name: str):
+        
+        # Sin timer activo no se mide nada
+        return self.timer.stage(name) if self.timer else nullcontext({})
+    
+    @contextmanager
+    def _ocr_stage(self, planners: List):
+        
+        # Píxeles realmente pasados por el OCR en esta llamada
+        with self._stage('ocr') as sample:
+            pixels_before = sum(planner.pixels_ocr for planner in planners)
+            yield
+            sample['pixels'] = sum(planner.pixels_ocr for planner in planners) - pixels_before
+    
+    def _merge_profile(self, result: Dict):
+        
+        # Lo medido en un worker se suma al perfil del proceso principal
+        profile = result.pop('profile', None)
+        if profile and self.timer:
+            self.timer.merge(profile)
+    
+    def _write_profile(self, summary: Dict):
+        
+        PROFILING_FOLDER.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        profile_path = PROFILING_FOLDER / f"profile_{stamp}.json"
+        self.timer.write_json(profile_path, summary)
+        if PROFILING_PROMETHEUS:
+            self.timer.write_prometheus(PROFILING_FOLDER / "ocr_classifier.prom")
+        self.logger.info(f"Perfil por etapas: {profile_path}")
+    
+    def process_pdf(self, pdf_path: Path, write_excel: bool = True, shard_min_pages: int = None) -> Dict:
         
         self.logger.info("="*70)
         self.logger.info(f"PROCESANDO: {pdf_path.name}")
@@ -36,119 +103,133 @@ class DocumentProcessor:
         
         start_time = datetime.now()
         
-        pdf_info = self.converter.get_pdf_info(pdf_path)
-        if not pdf_info['success']:
-            return {'success': False, 'error': 'No se pudo leer el PDF ✗'}
+        # Una sola apertura del PDF para info, render y separación; se cierra aunque falle
+        with self.converter.open_pdf(pdf_path) as session:
+            pdf_info = self.converter.get_pdf_info(session)
+            if not pdf_info['success']:
+                return {'success': False, 'error': 'No se pudo leer el PDF ✗'}
+            
+            total_pages = pdf_info['total_pages']
+            if shard_min_pages and total_pages >= shard_min_pages:
+                return self._deferred_result(pdf_path, total_pages)
+            
+            # Reanudación: las páginas ya registradas en el journal no se vuelven a procesar
+            done_pages = self._completed_pages(pdf_path)
+            classifications = list(done_pages.values())
+            
+            for window in self._iter_page_windows(session, skip_pages=done_pages):
+                window_classifications = self._classify_window(self._orient_window(window), total_pages)
+                self._record_pages(pdf_path, window_classifications)
+                classifications.extend(window_classifications)
+                del window
+                gc.collect()
+            
+            return self._finish_pdf(session, total_pages, classifications, start_time, write_excel)
+    
+    def classify_page_range(self, pdf_path: Path, first_page: int, last_page: int,
+                            skip_pages=None) -> List[Dict]:
+        
+        # Tramo de un PDF grande en un worker: solo clasificación; journal, reportes
+        # y separación los hace el proceso principal con el PDF completo
+        with self.converter.open_pdf(pdf_path) as session:
+            total_pages = session.page_count
+            classifications = []
+            for window in self._iter_page_windows(session, skip_pages=skip_pages,
+                                                  page_range=(first_page, last_page)):
+                classifications.extend(self._classify_window(self._orient_window(window), total_pages))
+                del window
+                gc.collect()
+            return classifications
+    
+    def _classify_window(self, window: List[Dict], total_pages: int) -> List[Dict]:
         
-        total_pages = pdf_info['total_pages']
         classifications = []
-        roi_count = 0
+        analyses = self._analyze_window(window)
         
-        for page_data in self.converter.convert_pdf_pages(pdf_path):
-            if not page_data['success']:
+        for page_data, analysis in zip(window, analyses):
+            if analysis is None:
                 continue
             
             page_num = page_data['page_number']
-            image = page_data['image']
-            
-            self.logger.info(f" - Procesando página {page_num}/{total_pages}")
-            
-            if ENABLE_ROI_OCR:
-                
-                angle, ocr_angle_confidence = self.ocr.document_orientation_angle(image)
-                
-                if angle > 0 and ocr_angle_confidence > ANGLE_CONFIDENCE_THRESHOLD:
-                    image = self.ocr.rotate_image_by_angle(image, angle, ocr_angle_confidence)
-                    img = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)               
-                    image = Image.fromarray(img)
-
-                needs_full_ocr = False
-                text_roi, ocr_confidence_roi, used_roi_only = self.ocr.extract_text_roi_strategy(image, needs_full_ocr)               
-                doc_type_roi, primary_roi, secondary_roi, total_keywords_roi, num_candidates_roi = self.classifier.classify_page(text_roi)
-                keywords_roi = primary_roi + secondary_roi
-                    
-                if num_candidates_roi >=2:
-                    needs_full_ocr = True
-                elif doc_type_roi == "UNKNOWN" or len(keywords_roi) == 0:
-                    needs_full_ocr = True
-                else:
-                        needs_full_ocr = False        
-                        
-                if needs_full_ocr:
-                    
-                    text_full, ocr_confidence_full, used_footer = self.ocr.extract_text_roi_strategy(image, needs_full_ocr) 
-                    text_combined = text_roi + " " + text_full
-                    doc_type, primary_found, secondary_found, total_keywords, num_candidates = self.classifier.classify_page(text_combined)
-                    keywords = primary_found + secondary_found + keywords_roi
-                    ocr_confidence = (ocr_confidence_roi + ocr_confidence_full) / 2
-                    used_roi_only = False   
-                else:
-                    doc_type = doc_type_roi
-                    primary = primary_roi
-                    secondary = secondary_roi
-                    total_keywords = total_keywords_roi
-                    num_candidates = num_candidates_roi
-                    ocr_confidence = ocr_confidence_roi
-                    used_roi_only = True
-                    roi_count += 1
-                    keywords = primary + secondary                       
-                   
-            else:
-                angle, ocr_angle_confidence = self.ocr.document_orientation_angle(image)
-                image = self.ocr.rotate_image_by_angle(image, angle, ocr_angle_confidence)
-                text, ocr_confidence = self.ocr.extract_text_from_image(image)
-                doc_type, primary, secondary, total_keywords, num_candidates = self.classifier.classify_page(text)
-                keywords = primary + secondary
-                used_roi_only = False 
-            
-
-            is_functional = self.classifier.is_functional(doc_type)
-
-            classification = {
-                'page_number': page_num,
-                'document_type': doc_type,
-                'functional': is_functional,
-                'ocr_confidence': round(ocr_confidence, 4),
-                'keywords_found': keywords,
-                'used_roi': used_roi_only,
-                'is_blank': False
-            }
+            doc_type = analysis['document_type']
+            classification = self._page_classification(page_num, analysis)
             classifications.append(classification)
             
-            status = "✓" if is_functional else "✗"
-            roi_indicator = " [ROI]" if used_roi_only else ""
+            status = "✓" if classification['functional'] else "✗"
+            roi_indicator = " [ROI]" if analysis['used_roi'] else ""
+            source_indicator = {'text_layer': " [TEXTO]", 'blank': " [BLANCO]"}.get(analysis['text_source'], "")
             self.logger.info(
-                f"   {doc_type} {status}{roi_indicator} "
-                f"(keywords: {total_keywords})"
+                f" - Página {page_num}/{total_pages}: {doc_type} {status}{roi_indicator}{source_indicator} "
+                f"(keywords: {analysis['total_keywords']}, OCR: {analysis['ocr_coverage']:.0%} de la página)"
             ) 
-            del image
-            gc.collect()
         
-        document_groups = self.classifier.group_consecutive_pages(classifications)
+        return classifications
+    
+    def _page_classification(self, page_num: int, analysis: Dict) -> Dict:
         
+        doc_type = analysis['document_type']
+        return {
+            'page_number': page_num,
+            'document_type': doc_type,
+            'functional': self.classifier.is_functional(doc_type),
+            'ocr_confidence': round(analysis['ocr_confidence'], 4),
+            'keywords_found': analysis['keywords'],
+            'used_roi': analysis['used_roi'],
+            'text_source': analysis['text_source'],
+            'pixels_ocr': analysis['pixels_ocr'],
+            'ocr_coverage': round(analysis['ocr_coverage'], 4),
+            'ocr_cached': analysis['ocr_cached'],
+            'ocr_calls': analysis['ocr_calls'],
+            'ocr_failed': analysis['ocr_failed'],
+            'is_blank': analysis['is_blank'],
+            'text': analysis['text']
+        }
+    
+    def _finish_pdf(self, session: PDFSession, total_pages: int, classifications: List[Dict],
+                    start_time: datetime, write_excel: bool = True,
+                    store_texts: bool = True, split: bool = True) -> Dict:
         
-        excel_path = Path("clasificacion/reporte_clasificacion.xlsx")
+        pdf_path = session.pdf_path
+        classifications.sort(key=lambda c: c['page_number'])
+        # El texto va al fichero de textos por página, no al reporte, al Excel ni al resultado
+        # (None en páginas del journal de versiones anteriores)
+        texts = [c.pop('text', None) for c in classifications]
+        document_groups = self.classifier.group_consecutive_pages(classifications)
         
-        self.classifier.save_classification_excel(
-            pdf_path=str(pdf_path),
-            pdf_name=pdf_path.name,
-            classifications=classifications,
-            excel_path=str(excel_path)            
-        )
+        if write_excel:
+            with self._stage('excel'):
+                self.write_excel_row(pdf_path, classifications)
         
-        self.classifier.save_classification_report(
-            pdf_path.name,
-            classifications,
-            document_groups
-        )
+        with self._stage('report'):
+            self.classifier.save_classification_report(
+                pdf_path.name,
+                classifications,
+                document_groups
+            )
+            if store_texts and ENABLE_PAGE_TEXT_STORE:
+                write_page_texts(
+                    page_texts_path(self.classifier.output_folder, pdf_path.name),
+                    pdf_path, total_pages, classifications, texts
+                )
         
-        generated_pdfs = self.generator.generate_separated_pdfs(
-            pdf_path,
-            document_groups
-        )
+        generated_pdfs = []
+        if split:
+            with self._stage('split'):
+                generated_pdfs = self.generator.generate_separated_pdfs(
+                    session,
+                    document_groups
+                )
         
         processing_time = (datetime.now() - start_time).total_seconds()
         functional_pages = sum(1 for c in classifications if c['functional'])
+        roi_count = sum(1 for c in classifications if c['used_roi'])
+        text_layer_count = sum(1 for c in classifications if c['text_source'] == 'text_layer')
+        pixels_ocr_total = sum(c['pixels_ocr'] for c in classifications)
+        cache_hits = sum(1 for c in classifications if c['ocr_cached'])
+        blank_count = sum(1 for c in classifications if c['is_blank'])
+        # Recortes enviados al OCR (las páginas del journal de versiones anteriores no lo tienen)
+        ocr_calls = sum(c.get('ocr_calls', 0) for c in classifications)
+        ocr_failed = sum(1 for c in classifications if c.get('ocr_failed'))
         
         result = {
             'pdf_name': pdf_path.name,
@@ -159,23 +240,558 @@ class DocumentProcessor:
             'generated_files': generated_pdfs,
             'processing_time': processing_time,
             'roi_optimizations': roi_count,
+            'text_layer_pages': text_layer_count,
+            'pixels_ocr': pixels_ocr_total,
+            'ocr_cache_hits': cache_hits,
+            'blank_pages': blank_count,
+            'ocr_calls': ocr_calls,
+            'ocr_failed_pages': ocr_failed,
             'success': True
         }
         
-        self.logger.info(f"\n✓ Completado en {processing_time:.2f}s")
+        # En modo paralelo el Excel lo escribe el proceso principal
+        if not write_excel:
+            result['classifications'] = classifications
+            result['document_groups'] = document_groups
+        
+        self.logger.info(f"\n✓ {pdf_path.name} completado en {processing_time:.2f}s")
         self.logger.info(
             f"   Páginas: {functional_pages} funcionales, "
             f"{total_pages - functional_pages} eliminadas"
         )
         
-        if ENABLE_ROI_OCR and roi_count > 0:
+        if roi_count > 0:
             self.logger.info(f"   Optimización ROI: {roi_count}/{total_pages} páginas")
+        ocr_pages = [c for c in classifications if c['text_source'] == 'ocr']
+        if ocr_pages:
+            average_coverage = sum(c['ocr_coverage'] for c in ocr_pages) / len(ocr_pages)
+            self.logger.info(f"   Área OCR media: {average_coverage:.0%} de cada página escaneada")
+        if text_layer_count > 0:
+            self.logger.info(f"   Capa de texto (sin OCR): {text_layer_count}/{total_pages} páginas")
+        if cache_hits > 0:
+            self.logger.info(f"   Caché OCR: {cache_hits}/{total_pages} páginas")
+        if blank_count > 0:
+            self.logger.info(f"   Páginas en blanco (sin OCR): {blank_count}/{total_pages}")
+        if ocr_failed > 0:
+            self.logger.warning(f"   Páginas con error de OCR: {ocr_failed}/{total_pages} (se repetirán al relanzar)")
         self.logger.info(f"   PDFs generados: {len(generated_pdfs)}\n")
         
         return result
     
+    def _completed_pages(self, pdf_path: Path) -> Dict[int, Dict]:
+        
+        done_pages = self.journal.completed_pages(pdf_path) if self.journal else {}
+        if done_pages:
+            self.logger.info(f"   Reanudando: {len(done_pages)} páginas ya procesadas")
+        return done_pages
+    
+    def _record_pages(self, pdf_path: Path, classifications: List[Dict]):
+        
+        # Las páginas con OCR fallido no cuentan como terminadas al reanudar
+        if self.journal:
+            self.journal.record_pages(pdf_path, [c for c in classifications if not c.get('ocr_failed')])
+    
+    def _journal_result(self, pdf_path: Path, result: Dict):
+        
+        if not self.journal:
+            return
+        if not result.get('success', False):
+            self.journal.mark_failed(pdf_path, result)
+            return
+        # Con páginas de OCR fallido no se da por terminado: al relanzar se vuelven a leer
+        if result.get('ocr_failed_pages'):
+            return
+        # Terminado solo cuando su fila del Excel se ha guardado: si la ejecución muere
+        # con filas en el buffer, esos PDFs se vuelven a procesar al relanzar
+        self.pending_done.append((pdf_path, result))
+        if not self.excel_writer.has_pending_rows():
+            self._commit_done()
+    
+    def _commit_done(self):
+        
+        done, self.pending_done = self.pending_done, []
+        for pdf_path, result in done:
+            self.journal.mark_done(pdf_path, result)
+    
+    def _flush_excel(self):
+        
+        with self._stage('excel'):
+            self.excel_writer.flush()
+        if self.journal and not self.excel_writer.has_pending_rows():
+            self._commit_done()
+    
+    def _iter_page_windows(self, session: PDFSession, skip_pages=None, page_range=None):
+        
+        # Ventanas de páginas: orientación y OCR se ejecutan en batch sobre cada una
+        window = []
+        pages = self.converter.convert_pdf_pages(session, skip_pages=skip_pages, page_range=page_range)
+        while True:
+            # Aquí solo se rasteriza la miniatura; las bandas de OCR, en extract_rows_batch
+            with self._stage('render') as sample:
+                page_data = next(pages, None)
+                sample['pixels'] = page_data.get('render_pixels', 0) if page_data else 0
+            if page_data is None:
+                break
+            if page_data.get('text_source') == 'text_layer':
+                page_data = self._check_text_layer(session, page_data)
+            window.append(page_data)
+            if len(window) >= PAGE_WINDOW_SIZE:
+                yield window
+                window = []
+        
+        if window:
+            yield window
+    
+    def _check_text_layer(self, session: PDFSession, page_data: Dict) -> Dict:
+        
+        # Una capa de texto sin keywords (sello o pie del escáner sobre una página
+        # escaneada) no descarta la página: se rasteriza y pasa por OCR
+        analysis = self._analyze_text(page_data['text'], 1.0, 'text_layer')
+        if analysis['document_type'] != "UNKNOWN" and len(analysis['keywords']) > 0:
+            page_data['analysis'] = analysis
+            return page_data
+        
+        page_num = page_data['page_number']
+        self.logger.debug(f"   Página {page_num}: capa de texto sin keywords, se hace OCR")
+        with self._stage('render') as sample:
+            page_data = self.converter.raster_page(session, page_num)
+            sample['pixels'] = page_data.get('render_pixels', 0)
+        return page_data
+    
+    def _analyze_text(self, text: str, ocr_confidence: float, text_source: str) -> Dict:
+        
+        with self._stage('classify'):
+            result = self.classifier.classify_page(text)
+        return self._text_analysis(result, text, ocr_confidence, text_source)
+    
+    def _analyze_texts(self, texts: List[Tuple[str, float]], text_source: str) -> List[Dict]:
+        
+        # Varias páginas a la vez: scoring matricial (mismo resultado que página a página)
+        with self._stage('classify'):
+            results = self.classifier.classify_pages([text for text, _ in texts])
+        return [
+            self._text_analysis(result, text, ocr_confidence, text_source)
+            for result, (text, ocr_confidence) in zip(results, texts)
+        ]
+    
+    def _text_analysis(self, result: Tuple, text: str, ocr_confidence: float, text_source: str) -> Dict:
+        
+        doc_type, primary, secondary, total_keywords, num_candidates = result
+        return {
+            'document_type': doc_type,
+            'keywords': primary + secondary,
+            'total_keywords': total_keywords,
+            'num_candidates': num_candidates,
+            'ocr_confidence': ocr_confidence,
+            'used_roi': False,
+            'text_source': text_source,
+            'pixels_ocr': 0,
+            'ocr_coverage': 0.0,
+            'ocr_cached': False,
+            'ocr_calls': 0,
+            'ocr_failed': False,
+            'is_blank': False,
+            'text': text
+        }
+    
+    def _blank_analysis(self) -> Dict:
+        
+        analysis = self._analyze_text("", 0.0, 'blank')
+        analysis['document_type'] = BLANK_DOCUMENT_TYPE
+        analysis['is_blank'] = True
+        return analysis
+    
+    def _analyze_window(self, window: List[Dict]) -> List[Dict]:
+        
+        analyses = [None] * len(window)
+        ocr_pages = []
+        
+        for index, page_data in enumerate(window):
+            if not page_data['success']:
+                continue
+            
+            if page_data.get('text_source') == 'text_layer':
+                analyses[index] = page_data.get('analysis') or self._analyze_text(page_data['text'], 1.0, 'text_layer')
+                continue
+            
+            if page_data.get('is_blank'):
+                analyses[index] = self._blank_analysis()
+                continue
+            
+            # Un planner por página: las bandas ya reconocidas (o cacheadas) se reutilizan
+            planner, cache_key, orientation = self._prepare_page(page_data, apply_threshold=ENABLE_ROI_OCR)
+            ocr_pages.append((index, planner, cache_key, orientation))
+        
+        # ENABLE_ROI_OCR = False es siempre página completa; con ROI, la lectura
+        # incremental (early stopping) sustituye a los porcentajes fijos
+        planners = [planner for _, planner, _, _ in ocr_pages]
+        if ENABLE_ROI_OCR and ENABLE_EARLY_STOPPING:
+            ocr_analyses = self._analyze_incremental_batch(planners)
+        elif ENABLE_ROI_OCR:
+            ocr_analyses = self._analyze_roi_batch(planners)
+        else:
+            with self._ocr_stage(planners):
+                full_results = self.ocr.extract_text_roi_strategy_batch(planners, need_footer=False)
+            ocr_analyses = self._analyze_texts(
+                [(text, confidence) for text, confidence, _ in full_results], 'ocr'
+            )
+        
+        for (index, planner, cache_key, orientation), analysis in zip(ocr_pages, ocr_analyses):
+            analysis['pixels_ocr'] = planner.pixels_ocr
+            analysis['ocr_coverage'] = planner.coverage
+            analysis['ocr_cached'] = window[index].get('cached') is not None
+            analysis['ocr_calls'] = planner.ocr_calls
+            analysis['ocr_failed'] = planner.failed
+            self._store_page(cache_key, orientation, planner)
+            analyses[index] = analysis
+        
+        return analyses
+    
+    def _analyze_incremental_batch(self, planners: List) -> List[Dict]:
+        
+        # Lectura de arriba abajo por bandas: cada página se detiene en cuanto su
+        # clasificación ya no puede cambiar con lo que queda por leer
+        results = [None] * len(planners)
+        cursors = [0] * len(planners)
+        active = list(range(len(planners)))
+        
+        while active:
+            requests = []
+            for index in active:
+                planner = planners[index]
+                band_height = math.ceil(planner.height / EARLY_STOPPING_BANDS)
+                cursors[index] = min(planner.height, cursors[index] + band_height)
+                requests.append((planner, 0, cursors[index]))
+            
+            # Una banda nueva por página activa, todas en el mismo batch
+            with self._ocr_stage(planners):
+                texts = self.ocr.extract_rows_batch(requests)
+            
+            still_active = []
+            for index, (text, confidence) in zip(active, texts):
+                planner = planners[index]
+                read_fraction = cursors[index] / planner.height if planner.height else 1.0
+                
+                if read_fraction < 1:
+                    with self._stage('classify'):
+                        decided = (
+                            confidence >= EARLY_STOPPING_CONFIDENCE and
+                            self.classifier.is_decided(text, read_fraction)
+                        )
+                    if not decided:
+                        still_active.append(index)
+                        continue
+                
+                analysis = self._analyze_text(text, confidence, 'ocr')
+                analysis['used_roi'] = read_fraction < 1
+                results[index] = analysis
+            
+            active = still_active
+        
+        return results
+    
+    def _analyze_roi_batch(self, planners: List) -> List[Dict]:
+        
+        analyses = []
+        needs_full_ocr = []
+        
+        with self._ocr_stage(planners):
+            roi_results = self.ocr.extract_text_roi_strategy_batch(planners, need_footer=False)
+        roi_analyses = self._analyze_texts(
+            [(text_roi, ocr_confidence_roi) for text_roi, ocr_confidence_roi, _ in roi_results], 'ocr'
+        )
+        for index, ((text_roi, _, _), analysis) in enumerate(zip(roi_results, roi_analyses)):
+            if analysis['num_candidates'] >= 2:
+                needs_full_ocr.append((index, text_roi))
+            elif analysis['document_type'] == "UNKNOWN" or len(analysis['keywords']) == 0:
+                needs_full_ocr.append((index, text_roi))
+            else:
+                analysis['used_roi'] = True
+            analyses.append(analysis)
+        
+        with self._ocr_stage(planners):
+            full_results = self.ocr.extract_text_roi_strategy_batch(
+                [planners[index] for index, _ in needs_full_ocr], need_footer=True
+            )
+        combined_analyses = self._analyze_texts([
+            (text_roi + " " + text_full, (analyses[index]['ocr_confidence'] + ocr_confidence_full) / 2)
+            for (index, text_roi), (text_full, ocr_confidence_full, _) in zip(needs_full_ocr, full_results)
+        ], 'ocr')
+        for (index, _), analysis in zip(needs_full_ocr, combined_analyses):
+            analysis['keywords'] = analysis['keywords'] + analyses[index]['keywords']
+            analyses[index] = analysis
+        
+        return analyses
+    
+    def _orient_window(self, window: List[Dict]) -> List[Dict]:
+        
+        pending = []
+        for page_data in window:
+            if not page_data['success'] or page_data.get('raster') is None:
+                continue
+            
+            cache_key = self.cache.page_key(page_data['signature']) if self.cache else None
+            cached = self.cache.get(cache_key) if cache_key else None
+            page_data['cache_key'] = cache_key
+            page_data['cached'] = cached
+            
+            # Página ya vista: orientación y bandas OCR salen de la caché
+            if cached:
+                page_data['orientation'] = (cached['angle'], cached['angle_confidence'])
+            else:
+                pending.append(page_data)
+        
+        with self._stage('orient') as sample:
+            thumbnails = [p['thumbnail'] for p in pending]
+            sample['pixels'] = sum(thumbnail.shape[0] * thumbnail.shape[1] for thumbnail in thumbnails)
+            orientations = self.ocr.document_orientation_angles(thumbnails)
+        for page_data, orientation in zip(pending, orientations):
+            page_data['orientation'] = orientation
+        
+        return window
+    
+    def _prepare_page(self, page_data: Dict, apply_threshold: bool):
+        
+        # La rotación se aplica al renderizar las bandas, no sobre un raster completo
+        image = page_data['raster']
+        cache_key = page_data.get('cache_key')
+        cached = page_data.get('cached')
+        angle, angle_confidence = page_data['orientation']
+        
+        rotation = 0
+        if not apply_threshold or (angle > 0 and angle_confidence > ANGLE_CONFIDENCE_THRESHOLD):
+            rotation = self.ocr.correction_angle(angle)
+            image = self.ocr.rotate_image_by_angle(image, angle, angle_confidence)
+        
+        planner = self.ocr.create_region_planner(image)
+        # Las bandas tienen coordenadas del raster girado: con otro giro (umbral o tolerancia
+        # de ángulo distintos) no sirven y la página se vuelve a leer
+        if cached and cached['rotation'] == rotation:
+            planner.load_bands(cached['bands'])
+        else:
+            page_data['cached'] = None
+        
+        return planner, cache_key, (angle, angle_confidence, rotation)
+    
+    def _store_page(self, cache_key: str, orientation, planner):
+        
+        # Una página con alguna banda fallida no se cachea: se vuelve a leer en la siguiente ejecución
+        if cache_key and planner.ocr_calls > 0 and not planner.failed:
+            angle, angle_confidence, rotation = orientation
+            self.cache.put(cache_key, angle, angle_confidence, rotation, planner.export_bands())
+    
+    def write_excel_row(self, pdf_path: Path, classifications: List[Dict]):
+        
+        # Se acumula en memoria; el Excel se guarda cada EXCEL_FLUSH_ROWS PDFs y al terminar
+        self.excel_writer.add_row(str(pdf_path), pdf_path.name, classifications)
+    
+    def _deferred_result(self, pdf_path: Path, total_pages: int) -> Dict:
+        
+        # PDF grande con tramos activos: no se procesa entero aquí, al final se
+        # reparten sus páginas entre todos los workers
+        self.logger.info(f"   {pdf_path.name}: {total_pages} páginas, se procesará por tramos")
+        return {'pdf_name': pdf_path.name, 'success': False, 'deferred': True, 'total_pages': total_pages}
+    
+    def _process_parallel(self, pdf_files: List[Path], on_result: Callable[[Path, Dict], None],
+                          pool: PDFWorkerPool, executor, shard_min_pages: int = None):
+        
+        results = pool.process(executor, pdf_files, shard_min_pages=shard_min_pages)
+        for done, (index, result) in enumerate(results, 1):
+            self._merge_profile(result)
+            classifications = result.pop('classifications', None)
+            if result.get('success', False) and classifications is not None:
+                with self._stage('excel'):
+                    self.write_excel_row(pdf_files[index], classifications)
+            
+            on_result(pdf_files[index], result)
+            self.logger.info(f" **Progreso: {done}/{len(pdf_files)} ({pdf_files[index].name})")
+    
+    def _process_sharded(self, pdf_files: List[Path], on_result: Callable[[Path, Dict], None],
+                         pool: PDFWorkerPool, executor):
+        
+        for i, pdf_path in enumerate(pdf_files, 1):
+            self.logger.info(f" **Progreso (PDFs grandes): {i}/{len(pdf_files)} ({pdf_path.name})")
+            try:
+                result = self._process_pdf_sharded(pool, executor, pdf_path)
+            except Exception as e:
+                self.logger.error(f"✗ Error procesando {pdf_path.name}: {str(e)}")
+                result = {'pdf_name': pdf_path.name, 'success': False, 'error': str(e)}
+            on_result(pdf_path, result)
+            gc.collect()
+    
+    def _process_pdf_sharded(self, pool: PDFWorkerPool, executor, pdf_path: Path) -> Dict:
+        
+        self.logger.info("="*70)
+        self.logger.info(f"PROCESANDO: {pdf_path.name}")
+        self.logger.info("="*70)
+        
+        start_time = datetime.now()
+        
+        with self.converter.open_pdf(pdf_path) as session:
+            pdf_info = self.converter.get_pdf_info(session)
+            if not pdf_info['success']:
+                return {'pdf_name': pdf_path.name, 'success': False, 'error': 'No se pudo leer el PDF ✗'}
+            
+            total_pages = pdf_info['total_pages']
+            done_pages = self._completed_pages(pdf_path)
+            classifications = list(done_pages.values())
+            
+            # Tramos con alguna página pendiente; cada worker renderiza el suyo desde el fichero
+            shards = [
+                (first_page, min(first_page + SHARD_PAGE_COUNT - 1, total_pages))
+                for first_page in range(1, total_pages + 1, SHARD_PAGE_COUNT)
+            ]
+            shards = [
+                (first_page, last_page) for first_page, last_page in shards
+                if any(page not in done_pages for page in range(first_page, last_page + 1))
+            ]
+            self.logger.info(
+                f"   {len(shards)} tramos de hasta {SHARD_PAGE_COUNT} páginas en {MAX_WORKERS} workers"
+            )
+            
+            errors = []
+            for index, result in pool.process_shards(executor, pdf_path, shards, skip_pages=done_pages):
+                self._merge_profile(result)
+                first_page, last_page = shards[index]
+                if not result['success']:
+                    errors.append(f"páginas {first_page}-{last_page}: {result['error']}")
+                    continue
+                self._record_pages(pdf_path, result['classifications'])
+                classifications.extend(result['classifications'])
+                self.logger.info(f"   ✓ Páginas {first_page}-{last_page} clasificadas")
+            
+            # Los tramos terminados quedan en el journal: al relanzar solo se repiten los fallidos
+            if errors:
+                return {'pdf_name': pdf_path.name, 'success': False, 'error': '; '.join(errors)}
+            
+            # _finish_pdf ordena por página antes de agrupar y separar
+            return self._finish_pdf(session, total_pages, classifications, start_time)
+    
+    def _process_sequential(self, pdf_files: List[Path], on_result: Callable[[Path, Dict], None],
+                            shard_min_pages: int = None):
+        
+        self.logger.info(f" Procesamiento secuencial\n")
+        for i, pdf_file in enumerate(pdf_files, 1):
+            self.logger.info(f" **Progreso: {i}/{len(pdf_files)}")
+            on_result(pdf_file, self.process_pdf(pdf_file, shard_min_pages=shard_min_pages))
+            gc.collect()
+    
+    def _process_pipelined(self, pdf_files: List[Path], on_result: Callable[[Path, Dict], None],
+                           shard_min_pages: int = None):
+        
+        self.logger.info(" Procesamiento en pipeline (render → OCR → escritura)\n")
+        
+        # PyMuPDF no es thread-safe: render (también el diferido de bandas en el OCR)
+        # y generación de PDFs no se solapan entre sí (cada llamada toma el lock)
+        fitz_lock = self.converter.lock
+        states = {}
+        finished = set()
+        # PDFs con error en el OCR: no se renderizan ni leen más ventanas suyas
+        failed = set()
+        
+        def render_source():
+            for i, pdf_path in enumerate(pdf_files, 1):
+                self.logger.info(f" **Progreso: {i}/{len(pdf_files)} ({pdf_path.name})")
+                start_time = datetime.now()
+                # La sesión la cierra la etapa de escritura: el OCR aún renderiza bandas
+                # de sus páginas y la separación reutiliza el mismo documento
+                session = self.converter.open_pdf(pdf_path)
+                with fitz_lock:
+                    pdf_info = self.converter.get_pdf_info(session)
+                if not pdf_info['success']:
+                    session.close()
+                    yield {'kind': 'error', 'pdf_path': pdf_path, 'error': 'No se pudo leer el PDF ✗'}
+                    continue
+                if shard_min_pages and pdf_info['total_pages'] >= shard_min_pages:
+                    session.close()
+                    yield {'kind': 'deferred', 'pdf_path': pdf_path, 'total_pages': pdf_info['total_pages']}
+                    continue
+                
+                done_pages = self._completed_pages(pdf_path)
+                yield {'kind': 'start', 'pdf_path': pdf_path, 'total_pages': pdf_info['total_pages'],
+                       'start_time': start_time, 'done_pages': done_pages, 'session': session}
+                
+                windows = self._iter_page_windows(session, skip_pages=done_pages)
+                while pdf_path not in failed:
+                    with fitz_lock:
+                        window = next(windows, None)
+                    if window is None:
+                        break
+                    yield {'kind': 'window', 'pdf_path': pdf_path, 'window': window}
+                
+                yield {'kind': 'end', 'pdf_path': pdf_path}
+        
+        def ocr_stage(message):
+            if message['kind'] != 'window':
+                return [message]
+            
+            pdf_path = message['pdf_path']
+            if pdf_path in failed:
+                return []
+            try:
+                total_pages = states[pdf_path]['total_pages']
+                window = self._orient_window(message['window'])
+                classifications = self._classify_window(window, total_pages)
+                self._record_pages(pdf_path, classifications)
+            except Exception:
+                failed.add(pdf_path)
+                raise
+            return [{'kind': 'pages', 'pdf_path': pdf_path, 'classifications': classifications}]
+        
+        def write_stage(message):
+            pdf_path = message['pdf_path']
+            
+            if message['kind'] == 'error':
+                state = states.pop(pdf_path, None)
+                if state:
+                    state['session'].close()
+                finished.add(pdf_path)
+                on_result(pdf_path, {'pdf_name': pdf_path.name, 'success': False, 'error': message['error']})
+            elif message['kind'] == 'deferred':
+                finished.add(pdf_path)
+                on_result(pdf_path, self._deferred_result(pdf_path, message['total_pages']))
+            elif message['kind'] == 'pages' and pdf_path in states:
+                states[pdf_path]['classifications'].extend(message['classifications'])
+            elif message['kind'] == 'end' and pdf_path in states:
+                state = states.pop(pdf_path)
+                # Sin el lock de PyMuPDF: reportes y Excel se solapan con el render de bandas
+                # del siguiente PDF; la separación y el cierre lo toman ellos mismos
+                try:
+                    result = self._finish_pdf(
+                        state['session'], state['total_pages'], state['classifications'], state['start_time']
+                    )
+                finally:
+                    state['session'].close()
+                finished.add(pdf_path)
+                on_result(pdf_path, result)
+                gc.collect()
+            return []
+        
+        def start_source():
+            # El estado de cada PDF se registra antes de que lleguen sus ventanas
+            for message in render_source():
+                if message['kind'] == 'start':
+                    states[message['pdf_path']] = {
+                        'total_pages': message['total_pages'],
+                        'start_time': message['start_time'],
+                        'classifications': list(message['done_pages'].values()),
+                        'session': message['session']
+                    }
+                yield message
+        
+        pipeline = StagedPipeline([('ocr', ocr_stage), ('escritura', write_stage)], PIPELINE_QUEUE_SIZE)
+        try:
+            pipeline.run(start_source())
+        finally:
+            for state in states.values():
+                state['session'].close()
+        
+        for pdf_path in pdf_files:
+            if pdf_path not in finished:
+                on_result(pdf_path, {'pdf_name': pdf_path.name, 'success': False, 'error': 'Procesamiento incompleto'})
+    
     def process_all_pdfs(self) -> Dict:
-        pdf_files = list(PDF_INPUT_FOLDER.glob("*.pdf"))
+        pdf_files = sorted(PDF_INPUT_FOLDER.glob("*.pdf"))
         
         if not pdf_files:
             self.logger.warning("X  No se encontraron archivos PDF en la carpeta")
@@ -186,62 +802,402 @@ class DocumentProcessor:
         
         self.logger.info(f"Se encontraron {len(pdf_files)} PDFs para procesar\n")
         
+        summary = RunSummary()
+        
+        # Reanudación: los PDFs terminados en una ejecución anterior se omiten
+        if self.journal:
+            pending = []
+            for pdf_file in pdf_files:
+                if self.journal.is_done(pdf_file):
+                    summary.add_skipped()
+                else:
+                    pending.append(pdf_file)
+            if summary.skipped:
+                self.logger.info(f"Omitidos {summary.skipped} PDFs ya procesados (journal)\n")
+            pdf_files = pending
+        
+        # PDFs grandes: se detectan al abrirlos (aquí o en un worker) y al final sus
+        # páginas se reparten entre todos los workers; dejan de ser la cola de la ejecución
+        shard_min_pages = SHARD_MIN_PAGES if ENABLE_PAGE_SHARDING and MAX_WORKERS > 1 else None
+        large_files = []
+        
+        def on_result(pdf_path: Path, result: Dict):
+            if result.get('deferred'):
+                large_files.append(pdf_path)
+                return
+            # Cada resultado se vuelca al journal y al resumen y se descarta
+            self._journal_result(pdf_path, result)
+            summary.add(result)
+        
+        # Un único pool de procesos por ejecución (PDFs enteros y tramos), creado al
+        # primer uso: los modelos se cargan una vez por worker
+        pool = PDFWorkerPool(MAX_WORKERS, WORKER_CPU_THREADS)
+        executors = []
+        
+        def executor():
+            if not executors:
+                executors.append(pool.create_executor(MAX_WORKERS))
+            return executors[0]
+        
         overall_start = datetime.now()
         
-        self.logger.info(f" Procesamiento secuencial\n")
-        results = []
-        for i, pdf_file in enumerate(pdf_files, 1):
-            self.logger.info(f" **Progreso: {i}/{len(pdf_files)}")
-            result = self.process_pdf(pdf_file)
-            results.append(result)
-            gc.collect()
+        try:
+            if not pdf_files:
+                self.logger.info("Nada pendiente: todos los PDFs ya estaban procesados")
+            elif ENABLE_PARALLEL_PROCESSING and MAX_WORKERS > 1 and len(pdf_files) > 1:
+                self._process_parallel(pdf_files, on_result, pool, executor(), shard_min_pages)
+            elif ENABLE_PIPELINE:
+                self._process_pipelined(pdf_files, on_result, shard_min_pages)
+            else:
+                self._process_sequential(pdf_files, on_result, shard_min_pages)
+            
+            if large_files:
+                self._process_sharded(large_files, on_result, pool, executor())
+        finally:
+            for pool_executor in executors:
+                pool_executor.shutdown()
+            # También si la ejecución se interrumpe: no se pierden las filas acumuladas
+            self._flush_excel()
         
-        successful = [r for r in results if r.get('success', False)]
         total_time = (datetime.now() - overall_start).total_seconds()
-        total_pages = sum(r.get('total_pages', 0) for r in successful)
-        total_functional = sum(r.get('functional_pages', 0) for r in successful)
-        total_generated = sum(r.get('pdfs_generated', 0) for r in successful)
-        total_roi_optimizations = sum(r.get('roi_optimizations', 0) for r in successful)
+        totals = summary.totals
+        total_pages = totals['total_pages']
+        total_functional = totals['functional_pages']
+        total_roi_optimizations = totals['roi_optimizations']
         
         self.logger.info("\n" + "="*70)
         self.logger.info("  * RESUMEN FINAL *")
         self.logger.info("="*70)
-        self.logger.info(f"PDFs procesados: {len(successful)}/{len(pdf_files)}")
+        self.logger.info(f"PDFs procesados: {summary.successful}/{summary.total_pdfs}")
+        if summary.skipped:
+            self.logger.info(f"PDFs omitidos (ya procesados): {summary.skipped}")
         self.logger.info(f"Tiempo total: {total_time:.2f}s")
         
-        avg_time = total_time / len(successful) if successful else 0
+        avg_time = total_time / summary.successful if summary.successful else 0
         self.logger.info(f"Tiempo promedio por PDF: {avg_time:.2f}s")
         
         self.logger.info(f"Páginas analizadas: {total_pages}")
         self.logger.info(f"Páginas funcionales: {total_functional}")
         self.logger.info(f"Páginas eliminadas: {total_pages - total_functional}")
-        self.logger.info(f"PDFs generados: {total_generated}")
+        self.logger.info(f"PDFs generados: {totals['pdfs_generated']}")
         
-        if ENABLE_ROI_OCR and total_roi_optimizations > 0:
+        if total_roi_optimizations > 0:
             roi_percentage = (total_roi_optimizations / total_pages) * 100 if total_pages > 0 else 0
             self.logger.info(f"Optimizaciones ROI: {total_roi_optimizations}/{total_pages} ({roi_percentage:.1f}%)")
         
+        if totals['text_layer_pages'] > 0:
+            self.logger.info(f"Páginas con capa de texto (sin OCR): {totals['text_layer_pages']}/{total_pages}")
+        
+        if totals['ocr_cache_hits'] > 0:
+            self.logger.info(f"Páginas recuperadas de la caché OCR: {totals['ocr_cache_hits']}/{total_pages}")
+        
+        if totals['blank_pages'] > 0:
+            self.logger.info(f"Páginas en blanco (sin OCR): {totals['blank_pages']}/{total_pages}")
+        
+        if totals['ocr_failed_pages'] > 0:
+            self.logger.warning(f"Páginas con error de OCR (se repetirán al relanzar): {totals['ocr_failed_pages']}/{total_pages}")
+        
+        if summary.failed_names:
+            self.logger.info(f"PDFs con error: {', '.join(summary.failed_names)}")
+        
         self.logger.info("="*70 + "\n")
         
-        return {
-            'total_pdfs': len(pdf_files),
-            'successful': len(successful),
-            'failed': len(pdf_files) - len(successful),
+        results = {
+            'total_pdfs': summary.total_pdfs,
+            'successful': summary.successful,
+            'failed': summary.failed,
+            'skipped': summary.skipped,
             'total_pages': total_pages,
             'functional_pages': total_functional,
-            'pdfs_generated': total_generated,
+            'pdfs_generated': totals['pdfs_generated'],
             'roi_optimizations': total_roi_optimizations,
+            'text_layer_pages': totals['text_layer_pages'],
+            'ocr_cache_hits': totals['ocr_cache_hits'],
+            'blank_pages': totals['blank_pages'],
+            'ocr_calls': totals['ocr_calls'],
+            'ocr_failed_pages': totals['ocr_failed_pages'],
             'total_time': total_time,
             'avg_time_per_pdf': avg_time,
-            'results': results,
+            'failed_pdfs': summary.failed_names,
+            'success': True
+        }
+        
+        if self.timer and ENABLE_PROFILING:
+            self._write_profile({
+                'mode': 'batch',
+                'started': overall_start.isoformat(timespec='seconds'),
+                'elapsed_s': round(total_time, 3),
+                'pdfs': summary.total_pdfs,
+                'pages': total_pages,
+                'pages_per_s': round(total_pages / total_time, 3) if total_time else 0.0
+            })
+        
+        return results
+    
+    def reclassify_all(self) -> Dict:
+        
+        # Clasificación, reportes y separación a partir del texto guardado de cada página:
+        # sin render, OCR ni carga de modelos (p. ej. tras cambiar DOCUMENT_TYPES)
+        texts_files = list(iter_page_texts_files(self.classifier.output_folder))
+        if not texts_files:
+            self.logger.warning(f"X  No hay textos por página en {self.classifier.output_folder}")
+            return {
+                'success': False,
+                'message': 'No hay textos guardados para reclasificar'
+            }
+        
+        self.logger.info(f"Reclasificando {len(texts_files)} PDFs desde el texto guardado\n")
+        summary = RunSummary()
+        overall_start = datetime.now()
+        
+        try:
+            for start in range(0, len(texts_files), RECLASSIFY_BATCH_PDFS):
+                for result in self._reclassify_batch(texts_files[start:start + RECLASSIFY_BATCH_PDFS]):
+                    summary.add(result)
+        finally:
+            self._flush_excel()
+        
+        total_time = (datetime.now() - overall_start).total_seconds()
+        total_pages = summary.totals['total_pages']
+        self.logger.info(
+            f"Reclasificados {summary.successful}/{summary.total_pdfs} PDFs "
+            f"({total_pages} páginas) en {total_time:.2f}s"
+        )
+        if summary.failed_names:
+            self.logger.info(f"PDFs con error: {', '.join(summary.failed_names)}")
+        
+        if self.timer and ENABLE_PROFILING:
+            self._write_profile({
+                'mode': 'reclassify',
+                'started': overall_start.isoformat(timespec='seconds'),
+                'elapsed_s': round(total_time, 3),
+                'pdfs': summary.total_pdfs,
+                'pages': total_pages,
+                'pages_per_s': round(total_pages / total_time, 3) if total_time else 0.0
+            })
+        
+        return {
+            'total_pdfs': summary.total_pdfs,
+            'successful': summary.successful,
+            'failed': summary.failed,
+            'total_pages': total_pages,
+            'functional_pages': summary.totals['functional_pages'],
+            'pdfs_generated': summary.totals['pdfs_generated'],
+            'total_time': total_time,
+            'failed_pdfs': summary.failed_names,
             'success': True
         }
+    
+    def _reclassify_batch(self, texts_paths: List[Path]) -> List[Dict]:
+        
+        results = []
+        loaded = []
+        for texts_path in texts_paths:
+            try:
+                loaded.append(read_page_texts(texts_path))
+            except Exception as e:
+                self.logger.error(f"✗ Error leyendo {texts_path.name}: {str(e)}")
+                results.append({'pdf_name': texts_path.name, 'success': False, 'error': str(e)})
+        
+        # Las páginas con texto de todos los PDFs del lote se puntúan en una sola pasada matricial
+        text_pages = [page for _, pages in loaded for page in pages if not page['is_blank']]
+        # Páginas decididas con ROI / lectura incremental: solo se guardó lo leído
+        partial = sum(1 for page in text_pages if page['used_roi'])
+        if partial:
+            self.logger.warning(
+                f"   {partial} páginas con texto parcial (ROI): se reclasifican solo con lo leído"
+            )
+        with self._stage('classify'):
+            page_results = self.classifier.classify_pages([page['text'] or "" for page in text_pages])
+        for page, result in zip(text_pages, page_results):
+            page['result'] = result
+        
+        results.extend(self._reclassify_pdf(header, pages) for header, pages in loaded)
+        return results
+    
+    def _reclassify_pdf(self, header: Dict, pages: List[Dict]) -> Dict:
+        
+        start_time = datetime.now()
+        classifications = []
+        for page in pages:
+            if page['is_blank']:
+                analysis = self._blank_analysis()
+            else:
+                analysis = self._text_analysis(
+                    page['result'], page['text'] or "", page['ocr_confidence'], page['text_source']
+                )
+            # Cómo se leyó la página (ROI, píxeles, llamadas OCR) no cambia al reclasificar
+            analysis.update({field: page[field] for field in PAGE_FIELDS if field != 'page_number'})
+            classifications.append(self._page_classification(page['page_number'], analysis))
+        
+        # Sin el PDF original solo se regeneran reportes y Excel
+        pdf_path = self._find_source_pdf(header)
+        if pdf_path is None:
+            self.logger.warning(f"* PDF original no encontrado para {header['pdf_name']}: no se separa")
+        
+        with self.converter.open_pdf(pdf_path or Path(header['pdf_path'])) as session:
+            return self._finish_pdf(
+                session, header['total_pages'], classifications, start_time,
+                store_texts=False, split=pdf_path is not None
+            )
+    
+    def _find_source_pdf(self, header: Dict):
+        
+        # Ruta original o, si ya se movió (modo --watch), la carpeta de entrada o la de terminados
+        for candidate in (Path(header['pdf_path']), PDF_INPUT_FOLDER / header['pdf_name'],
+                          WATCH_DONE_FOLDER / header['pdf_name']):
+            if candidate.exists():
+                return candidate
+        return None
+    
+    def watch_folder(self, concurrency: int = WATCH_CONCURRENCY, stop_event: threading.Event = None):
+        
+        self.logger.info(f" Vigilando {PDF_INPUT_FOLDER} (concurrencia: {concurrency})\n")
+        for folder in (WATCH_DONE_FOLDER, WATCH_FAILED_FOLDER):
+            folder.mkdir(parents=True, exist_ok=True)
+        
+        watcher = FolderWatcher(PDF_INPUT_FOLDER, WATCH_STABLE_SECONDS)
+        latency = LatencyStats()
+        stop_event = stop_event or threading.Event()
+        
+        # concurrency 1: este proceso; >1: workers precargados
+        if concurrency > 1:
+            pool = PDFWorkerPool(concurrency, WORKER_CPU_THREADS)
+            executor = pool.create_executor(concurrency)
+            submit = lambda pdf_path: pool.submit(executor, pdf_path)
+        else:
+            # Los modelos se cargan antes de vigilar: el primer PDF no paga el arranque de Paddle
+            self.ocr.load_models()
+            executor = ThreadPoolExecutor(max_workers=1)
+            submit = lambda pdf_path: executor.submit(self._process_safely, pdf_path)
+        
+        in_flight = {}
+        last_done = time.time()
+        
+        try:
+            while not stop_event.is_set():
+                for pdf_path, arrival in watcher.poll():
+                    if len(in_flight) >= concurrency * 2:
+                        break
+                    if any(path == pdf_path for path, _, _ in in_flight.values()):
+                        continue
+                    in_flight[submit(pdf_path)] = (pdf_path, arrival, time.time())
+                
+                done = [future for future in in_flight if future.done()]
+                for future in done:
+                    pdf_path, arrival, started = in_flight.pop(future)
+                    self._complete_watched(future, pdf_path, arrival, started, latency)
+                    watcher.forget(pdf_path)
+                
+                if done:
+                    last_done = time.time()
+                    self.logger.info(f" Latencia llegada → salidas: {latency.describe()}")
+                
+                # El Excel se guarda cada EXCEL_FLUSH_ROWS filas (add_row) o tras un rato sin
+                # PDFs terminados: con llegadas continuas no se reescribe por cada PDF
+                if self.excel_writer.has_pending_rows() and time.time() - last_done >= WATCH_EXCEL_IDLE_SECONDS:
+                    self._flush_excel()
+                
+                stop_event.wait(WATCH_POLL_SECONDS)
+        except KeyboardInterrupt:
+            self.logger.info(" Deteniendo servicio...")
+        finally:
+            # Los PDFs en curso se terminan antes de salir
+            for future, (pdf_path, arrival, started) in in_flight.items():
+                self._complete_watched(future, pdf_path, arrival, started, latency)
+            executor.shutdown(wait=True)
+            self._flush_excel()
+            self.logger.info(f" Servicio detenido. Latencia: {latency.describe()}")
+            if self.timer and ENABLE_PROFILING:
+                self._write_profile({'mode': 'watch', 'pdfs': latency.count, 'latency': latency.describe()})
+    
+    def _process_safely(self, pdf_path: Path) -> Dict:
+        
+        try:
+            return self.process_pdf(pdf_path, write_excel=False)
+        except Exception as e:
+            self.logger.error(f"✗ Error procesando {pdf_path.name}: {str(e)}")
+            return {'pdf_name': pdf_path.name, 'success': False, 'error': str(e)}
+    
+    def _complete_watched(self, future, pdf_path: Path, arrival: float, started: float,
+                          latency: LatencyStats):
+        
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {'pdf_name': pdf_path.name, 'success': False, 'error': str(e)}
+        
+        self._merge_profile(result)
+        classifications = result.pop('classifications', None)
+        success = result.get('success', False)
+        if success and classifications is not None:
+            with self._stage('excel'):
+                self.write_excel_row(pdf_path, classifications)
+        self._journal_result(pdf_path, result)
+        
+        destination = self._move_input(pdf_path, WATCH_DONE_FOLDER if success else WATCH_FAILED_FOLDER)
+        
+        finished = time.time()
+        latency.add(finished - arrival)
+        status = "✓" if success else "✗"
+        self.logger.info(
+            f" {status} {pdf_path.name} → {destination.parent.name}/ "
+            f"(latencia {finished - arrival:.2f}s: espera {started - arrival:.2f}s, "
+            f"proceso {finished - started:.2f}s)"
+        )
+    
+    def _move_input(self, pdf_path: Path, folder: Path) -> Path:
+        
+        destination = folder / pdf_path.name
+        if destination.exists():
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            destination = folder / f"{pdf_path.stem}_{stamp}{pdf_path.suffix}"
+        
+        try:
+            shutil.move(str(pdf_path), str(destination))
+        except Exception as e:
+            self.logger.error(f"✗ No se pudo mover {pdf_path.name}: {str(e)}")
+        return destination
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Clasificación y separación de PDFs")
+    parser.add_argument('--watch', action='store_true',
+                        help="Servicio continuo: procesa los PDFs que lleguen a la carpeta de entrada")
+    parser.add_argument('--concurrency', type=int, default=WATCH_CONCURRENCY)
+    parser.add_argument('--serve', action='store_true',
+                        help="API HTTP local: POST /classify con el PDF en el cuerpo")
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--workers', type=int, default=API_WORKERS)
+    parser.add_argument('--reclassify', action='store_true',
+                        help="Reclasificar desde el texto guardado por página (sin OCR ni modelos)")
+    args = parser.parse_args()
+    
+    if args.serve:
+        from src.api.server import run_server
+        run_server(port=args.port, workers=args.workers)
+        return
+    
+    if args.reclassify:
+        DocumentProcessor(use_journal=False).reclassify_all()
+        return
+    
+    # SIGTERM (kill, systemd, docker stop) como Ctrl+C: se guardan las filas del
+    # Excel acumuladas y el journal antes de salir
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    
     PDF_INPUT_FOLDER.mkdir(exist_ok=True)
     
+    # Carpeta vacía: se sale sin inicializar caché, journal ni modelos
+    if not args.watch and not any(PDF_INPUT_FOLDER.glob("*.pdf")):
+        setup_logging(LOG_FILE, LOG_LEVEL).warning(f"X  No hay PDFs que procesar en {PDF_INPUT_FOLDER}")
+        return
+    
     processor = DocumentProcessor()
+    if args.watch:
+        processor.watch_folder(concurrency=args.concurrency)
+        return
+    
     results = processor.process_all_pdfs()
     
     if results['success']:
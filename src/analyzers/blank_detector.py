@@ -1,51 +1,52 @@
+from typing import Tuple, Union
 from PIL import Image
 import numpy as np
 from src.utils.logger import Logger
+from src.config import BLANK_THRESHOLD, BLANK_WHITE_LEVEL
 
 
 class BlankPageDetector:
- 
-    def __init__(self, threshold: float = 0.975):
-        
+
+    def __init__(self, threshold: float = BLANK_THRESHOLD, white_level: int = BLANK_WHITE_LEVEL):
+
         self.threshold = threshold
+        self.white_level = white_level
         self.logger = Logger.get_logger(__name__)
-    
-    def is_blank_page(self, image: Image.Image) -> bool:
-       
-        grayscale = image.convert('L')
-        
-        pixels = np.array(grayscale)
-        
-        very_white_pixels = np.sum(pixels > 240)
-        total_pixels = pixels.size
-        white_percentage = very_white_pixels / total_pixels
-        #std_dev = np.std(pixels)
-        #pixel_range = np.max(pixels) - np.min(pixels)
-        
-        is_blank = (
-            white_percentage >= self.threshold #and
-            #std_dev < 10 and
-            #pixel_range < 30
-        )
-        
+
+    def to_grayscale(self, image: Union[np.ndarray, Image.Image]) -> np.ndarray:
+
+        if isinstance(image, Image.Image):
+            return np.asarray(image.convert('L'))
+
+        pixels = np.asarray(image)
+        if pixels.ndim == 2:
+            return pixels
+        if pixels.shape[2] == 1:
+            return pixels[:, :, 0]
+
+        # Misma aritmética que PIL convert('L'): pesos ITU-R 601-2 en punto fijo (16 bits)
+        # con redondeo, así el resultado es idéntico píxel a píxel
+        rgb = pixels[:, :, :3].astype(np.uint32)
+        return ((rgb[:, :, 0] * 19595 + rgb[:, :, 1] * 38470 + rgb[:, :, 2] * 7471 + 0x8000) >> 16).astype(np.uint8)
+
+    def analyze(self, image: Union[np.ndarray, Image.Image]) -> Tuple[bool, float]:
+
+        # Una sola conversión a grises y un único conteo vectorizado
+        pixels = self.to_grayscale(image)
+        white_percentage = np.count_nonzero(pixels > self.white_level) / pixels.size if pixels.size else 1.0
+        is_blank = white_percentage >= self.threshold
+
         if is_blank:
-            self.logger.debug(
-                f"      Página vacía detectada: {white_percentage:.1%} blancos, "
-                #f"std: {std_dev:.1f}, rango: {pixel_range}"
-            )
+            self.logger.debug(f"      Página vacía detectada: {white_percentage:.1%} blancos")
         else:
-            self.logger.debug(
-                f"      Página CON contenido: {white_percentage:.1%} blancos, "
-                #f"std: {std_dev:.1f}, rango: {pixel_range}"
-            )
-        
-        return is_blank
-    
-    def get_blank_percentage(self, image: Image.Image) -> float:
-       
-        grayscale = image.convert('L')
-        pixels = np.array(grayscale)
-        white_pixels = np.sum(pixels > 240)
-        total_pixels = pixels.size
-        
-        return white_pixels / total_pixels
\ No newline at end of file
+            self.logger.debug(f"      Página CON contenido: {white_percentage:.1%} blancos")
+
+        return is_blank, white_percentage
+
+    def is_blank_page(self, image: Union[np.ndarray, Image.Image]) -> bool:
+
+        return self.analyze(image)[0]
+
+    def get_blank_percentage(self, image: Union[np.ndarray, Image.Image]) -> float:
+
+        return self.analyze(image)[1]
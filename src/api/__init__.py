@@ -0,0 +1,3 @@
+from .server import ClassificationService, run_server
+
+__all__ = ['ClassificationService', 'run_server']
\ No newline at end of file
@@ -0,0 +1,327 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs, unquote
+import base64
+import json
+import math
+import queue
+import shutil
+import threading
+import time
+import uuid
+
+from src.utils.logger import Logger
+from src.utils.stage_timer import StageTimer
+from src.config import (
+    API_HOST,
+    API_PORT,
+    API_WORKERS,
+    API_QUEUE_SIZE,
+    API_REQUEST_TIMEOUT,
+    API_MAX_UPLOAD_BYTES,
+    API_JOBS_FOLDER,
+    API_JOB_TTL_SECONDS
+)
+
+
+def parse_classify_params(params: Dict) -> Dict:
+                                            #Returns: {'pdf_name', 'timeout', 'inline'}; ValueError si alguno no es válido
+
+    pdf_name = Path(params.get('filename', ['documento.pdf'])[0]).name
+    if not pdf_name:
+        raise ValueError("filename vacío")
+    if not pdf_name.lower().endswith('.pdf'):
+        pdf_name += '.pdf'
+
+    value = params.get('timeout', [API_REQUEST_TIMEOUT])[0]
+    try:
+        timeout = float(value)
+    except ValueError:
+        raise ValueError(f"timeout no numérico: {value}")
+    if not math.isfinite(timeout) or timeout < 0:
+        raise ValueError(f"timeout fuera de rango: {value}")
+
+    value = params.get('inline', ['0'])[0]
+    if value not in ('0', '1', 'true', 'false'):
+        raise ValueError(f"inline debe ser 0/1/true/false: {value}")
+
+    return {'pdf_name': pdf_name, 'timeout': timeout, 'inline': value in ('1', 'true')}
+
+
+class ClassificationJob:
+
+    def __init__(self, pdf_name: str, folder: Path):
+
+        self.job_id = folder.name
+        self.pdf_name = pdf_name
+        self.folder = folder
+        self.pdf_path = folder / pdf_name
+        self.status = 'en_cola'
+        self.result = None
+        self.timer = StageTimer()
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def to_dict(self, inline: bool = False) -> Dict:
+
+        data = {'job_id': self.job_id, 'pdf_name': self.pdf_name, 'status': self.status}
+        if self.result is None:
+            return data
+
+        timings = self.timer.as_dict()
+        timings['queue'] = round(self.started - self.created, 4)
+        timings['total'] = round(self.finished - self.created, 4)
+        data['timings'] = timings
+
+        if not self.result.get('success', False):
+            data['error'] = self.result.get('error', 'Error desconocido')
+            return data
+
+        generated_files = []
+        for pdf_info in self.result.get('generated_files', []):
+            file_data = {
+                'type': pdf_info['type'],
+                'pages': pdf_info['pages'],
+                'page_count': pdf_info['page_count'],
+                'filename': pdf_info['filename'],
+                'url': f"/jobs/{self.job_id}/files/{pdf_info['filename']}"
+            }
+            if inline:
+                file_data['content_base64'] = base64.b64encode(
+                    Path(pdf_info['path']).read_bytes()
+                ).decode('ascii')
+            generated_files.append(file_data)
+
+        data.update({
+            'total_pages': self.result['total_pages'],
+            'classifications': self.result.get('classifications', []),
+            'document_groups': self.result.get('document_groups', []),
+            'generated_files': generated_files
+        })
+        return data
+
+
+class ClassificationService:
+
+    def __init__(self, workers: int = API_WORKERS, queue_size: int = API_QUEUE_SIZE,
+                 jobs_folder: Path = API_JOBS_FOLDER):
+
+        # Import diferido: main importa este módulo para el modo --serve
+        from main import DocumentProcessor
+
+        self.logger = Logger.get_logger(__name__)
+        self.jobs_folder = Path(jobs_folder)
+        self.jobs_folder.mkdir(parents=True, exist_ok=True)
+        self.jobs: Dict[str, ClassificationJob] = {}
+        self.jobs_lock = threading.Lock()
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.busy = 0
+
+        # Un DocumentProcessor (con sus modelos cargados) por hilo: es el límite de concurrencia
+        self.processors = [DocumentProcessor(use_journal=False) for _ in range(workers)]
+        # Servicio de larga duración: los modelos se cargan al arrancar, no en la primera petición
+        for processor in self.processors:
+            processor.ocr.load_models()
+        self.threads = [
+            threading.Thread(target=self._worker, args=(processor,), name=f"api-worker-{i}", daemon=True)
+            for i, processor in enumerate(self.processors)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, pdf_bytes: bytes, pdf_name: str) -> ClassificationJob:
+
+        self._prune_jobs()
+
+        folder = self.jobs_folder / uuid.uuid4().hex
+        folder.mkdir(parents=True)
+        job = ClassificationJob(pdf_name, folder)
+        job.pdf_path.write_bytes(pdf_bytes)
+
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            shutil.rmtree(folder, ignore_errors=True)
+            raise
+
+        with self.jobs_lock:
+            self.jobs[job.job_id] = job
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ClassificationJob]:
+
+        with self.jobs_lock:
+            return self.jobs.get(job_id)
+
+    def stats(self) -> Dict:
+
+        return {
+            'status': 'ok',
+            'workers': len(self.processors),
+            'busy': self.busy,
+            'queued': self.queue.qsize(),
+            'jobs': len(self.jobs)
+        }
+
+    def _worker(self, processor):
+
+        while True:
+            job = self.queue.get()
+            job.status = 'procesando'
+            job.started = time.time()
+            with self.jobs_lock:
+                self.busy += 1
+
+            # Salidas de la petición en su propia carpeta, tiempos en su propio timer
+            processor.generator.output_folder = job.folder
+            processor.classifier.output_folder = job.folder
+            service_timer = processor.timer
+            processor.timer = job.timer
+
+            try:
+                result = processor.process_pdf(job.pdf_path, write_excel=False)
+            except Exception as e:
+                self.logger.error(f"✗ Error procesando {job.pdf_name}: {str(e)}")
+                result = {'success': False, 'error': str(e)}
+            finally:
+                processor.timer = service_timer
+                with self.jobs_lock:
+                    self.busy -= 1
+
+            job.result = result
+            job.status = 'terminado' if result.get('success', False) else 'error'
+            job.finished = time.time()
+            job.done.set()
+
+    def _prune_jobs(self):
+
+        # Las peticiones antiguas ya terminadas liberan disco y memoria
+        limit = time.time() - API_JOB_TTL_SECONDS
+        with self.jobs_lock:
+            expired = [
+                job_id for job_id, job in self.jobs.items()
+                if job.done.is_set() and job.finished < limit
+            ]
+            for job_id in expired:
+                shutil.rmtree(self.jobs.pop(job_id).folder, ignore_errors=True)
+
+
+class ClassificationRequestHandler(BaseHTTPRequestHandler):
+
+    server_version = "OCRDocumentClassifier/1.0"
+
+    @property
+    def service(self) -> ClassificationService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        Logger.get_logger(__name__).debug(f"   HTTP {self.address_string()} - {format % args}")
+
+    def _send_json(self, status: int, data: Dict):
+
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+
+        parts = [unquote(part) for part in urlparse(self.path).path.strip('/').split('/') if part]
+
+        if parts == ['health']:
+            self._send_json(200, self.service.stats())
+            return
+
+        if len(parts) >= 2 and parts[0] == 'jobs':
+            job = self.service.get_job(parts[1])
+            if job is None:
+                self._send_json(404, {'error': 'Petición no encontrada'})
+            elif len(parts) == 2:
+                self._send_json(200, job.to_dict())
+            elif len(parts) == 4 and parts[2] == 'files':
+                self._send_file(job, parts[3])
+            else:
+                self._send_json(404, {'error': 'Ruta no encontrada'})
+            return
+
+        self._send_json(404, {'error': 'Ruta no encontrada'})
+
+    def _send_file(self, job: ClassificationJob, filename: str):
+
+        generated = {
+            pdf_info['filename']: Path(pdf_info['path'])
+            for pdf_info in (job.result or {}).get('generated_files', [])
+        }
+        path = generated.get(filename)
+        if path is None or not path.exists():
+            self._send_json(404, {'error': 'Fichero no encontrado'})
+            return
+
+        body = path.read_bytes()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/classify':
+            self._send_json(404, {'error': 'Ruta no encontrada'})
+            return
+
+        # Todo se valida antes de leer el cuerpo y de encolar: un parámetro erróneo
+        # no deja un trabajo en marcha sin respuesta
+        try:
+            params = parse_classify_params(parse_qs(url.query))
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError as e:
+            self._send_json(400, {'error': f'Parámetro no válido: {str(e)}'})
+            return
+        if length <= 0:
+            self._send_json(400, {'error': 'Cuerpo vacío: enviar el PDF como application/pdf'})
+            return
+        if length > API_MAX_UPLOAD_BYTES:
+            self._send_json(413, {'error': f'PDF mayor de {API_MAX_UPLOAD_BYTES} bytes'})
+            return
+
+        pdf_bytes = self.rfile.read(length)
+        if not pdf_bytes.startswith(b'%PDF'):
+            self._send_json(400, {'error': 'El cuerpo no es un PDF'})
+            return
+
+        try:
+            job = self.service.submit(pdf_bytes, params['pdf_name'])
+        except queue.Full:
+            self._send_json(503, {'error': 'Servicio saturado, reintentar más tarde'})
+            return
+
+        # La petición sigue en curso aunque venza el timeout: se consulta en /jobs/<id>
+        if not job.done.wait(params['timeout']):
+            self._send_json(504, {**job.to_dict(), 'error': 'Tiempo de espera agotado'})
+            return
+
+        status = 200 if job.status == 'terminado' else 422
+        self._send_json(status, job.to_dict(inline=params['inline']))
+
+
+def run_server(host: str = API_HOST, port: int = API_PORT, workers: int = API_WORKERS):
+
+    logger = Logger.get_logger(__name__)
+    server = ThreadingHTTPServer((host, port), ClassificationRequestHandler)
+    server.service = ClassificationService(workers=workers)
+
+    logger.info(f" API escuchando en http://{host}:{server.server_address[1]} ({workers} worker(s))")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info(" Deteniendo API...")
+    finally:
+        server.server_close()
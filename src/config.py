@@ -4,24 +4,52 @@ BASE_DIR = Path(__file__).parent.parent
 PDF_INPUT_FOLDER = BASE_DIR / "pdfs"
 CLASSIFICATION_FOLDER = BASE_DIR / "clasificacion"
 PDF_OUTPUT_FOLDER = BASE_DIR / "pdfs_procesados"
+EXCEL_REPORT_PATH = CLASSIFICATION_FOLDER / "reporte_clasificacion.xlsx"
+EXCEL_FLUSH_ROWS = 50              # filas acumuladas antes de guardar el Excel
+EXCEL_MAX_ROWS_PER_FILE = 10000    # al superarlo se archiva y se empieza otro fichero
 
 PDF_DPI = 180
+RENDER_MAX_PIXELS = 4_500_000   # tope por página: las páginas grandes se renderizan a menos DPI
+PDF_OPEN_IN_MEMORY = False      # leer cada PDF entero a memoria de una vez (almacenamiento en red)
 IMAGE_FORMAT = "PNG"
 
+# TEXT LAYER (PDFs nativos: se evita el OCR si el texto embebido es válido)
+ENABLE_TEXT_LAYER = True
+TEXT_LAYER_MIN_CHARS = 40
+TEXT_LAYER_MIN_WORDS = 8
+TEXT_LAYER_MIN_VALID_RATIO = 0.85
+# Página cubierta por imágenes en al menos esta fracción: escaneo, se hace OCR aunque tenga texto
+TEXT_LAYER_MAX_IMAGE_COVERAGE = 0.6
+
 OCR_LANGUAGE = "en"
 OCR_USE_GPU = False
 OCR_USE_ANGLE_CLS = True
+OCR_DET_BATCH_SIZE = 4      # imágenes (páginas/regiones) por llamada a predict
+OCR_REC_BATCH_SIZE = 16     # líneas de texto por batch del reconocedor
+PAGE_WINDOW_SIZE = 8        # páginas que avanzan juntas por orientación y OCR
 
 CLASSIFICATION_CONFIDENCE_THRESHOLD = 0.25
 TEXT_PREVIEW_LENGTH = 400
-EARLY_STOPPING_CONFIDENCE = 0.55
+EARLY_STOPPING_CONFIDENCE = 0.55   # confianza OCR mínima de lo leído para dar la página por decidida
+EARLY_STOPPING_BANDS = 6           # la página se lee de arriba abajo en este nº de bandas
+EARLY_STOPPING_MIN_KEYWORDS = 2    # keywords que se suponen posibles en el área sin leer, como mínimo
 
 ENABLE_ROI_OCR = True
 ROI_HEADER_PERCENTAGE = 0.52
 ROI_FOOTER_PERCENTAGE = 0.52
 ROI_CONFIDENCE_THRESHOLD = 0.75
+ROI_BAND_OVERLAP = 0.02
 ANGLE_TOLERANCE = 5
 ANGLE_CONFIDENCE_THRESHOLD = 0.70
+ORIENTATION_BATCH_SIZE = 8
+ORIENTATION_THUMBNAIL_SIZE = 256
+
+# BLANK PAGES (separadores y reversos de escáner: se descartan antes del OCR)
+ENABLE_BLANK_DETECTION = True
+BLANK_THRESHOLD = 0.975       # fracción mínima de píxeles blancos
+BLANK_WHITE_LEVEL = 240       # nivel de gris a partir del cual un píxel cuenta como blanco
+BLANK_THUMBNAIL_DPI = 36      # DPI mínimo de la miniatura (también usada para la orientación)
+BLANK_DOCUMENT_TYPE = "BLANK"
 
 DOCUMENT_TYPES = {
     'INVOICE': {
@@ -184,5 +212,57 @@ LOG_MAX_BYTES = 10 * 1024 * 1024
 LOG_BACKUP_COUNT = 5
 
 # PERFORMANCE
-ENABLE_EARLY_STOPPING = True
-CLEAR_MEMORY_AFTER_PAGE = True
\ No newline at end of file
+ENABLE_EARLY_STOPPING = True    # solo con ENABLE_ROI_OCR: lectura de la página por bandas
+CLEAR_MEMORY_AFTER_PAGE = True
+
+# OCR CACHE (resultados por hash de página renderizada)
+ENABLE_OCR_CACHE = True
+OCR_CACHE_FILE = BASE_DIR / "cache" / "ocr_cache.sqlite"
+OCR_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# WORK JOURNAL (PDFs/páginas terminados: al relanzar se reanuda donde se quedó).
+# Pensado para lotes largos: desactivado, cada ejecución procesa todos los PDFs
+ENABLE_WORK_JOURNAL = False
+WORK_JOURNAL_FILE = BASE_DIR / "cache" / "work_journal.sqlite"
+
+# TEXTO POR PÁGINA (JSONL comprimido junto al reporte de cada PDF: --reclassify sin OCR ni modelos)
+ENABLE_PAGE_TEXT_STORE = True
+RECLASSIFY_BATCH_PDFS = 256    # PDFs cuyas páginas se puntúan juntas (classify_pages) al reclasificar
+
+# WATCH FOLDER (servicio continuo con modelos cargados)
+WATCH_POLL_SECONDS = 2.0
+WATCH_STABLE_SECONDS = 3.0      # sin cambios de tamaño/mtime durante este tiempo = copia terminada
+WATCH_CONCURRENCY = 1           # >1: procesos worker con modelos precargados
+WATCH_DONE_FOLDER = BASE_DIR / "pdfs_terminados"
+WATCH_FAILED_FOLDER = BASE_DIR / "pdfs_error"
+WATCH_EXCEL_IDLE_SECONDS = 30.0  # sin PDFs terminados durante este tiempo = se guarda el Excel pendiente
+
+# HTTP API (servicio local de clasificación síncrona)
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+API_WORKERS = 1                 # instancias de OCR precargadas = peticiones simultáneas
+API_QUEUE_SIZE = 8              # peticiones en espera; con la cola llena se responde 503
+API_REQUEST_TIMEOUT = 120       # segundos que espera una petición antes de responder 504
+API_MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+API_JOBS_FOLDER = BASE_DIR / "api_jobs"
+API_JOB_TTL_SECONDS = 3600      # tras este tiempo se borran los PDFs generados de una petición
+
+# PIPELINE (render, OCR y escritura de reportes/PDFs solapados en hilos)
+ENABLE_PIPELINE = True
+PIPELINE_QUEUE_SIZE = 2
+
+# PARALLEL
+ENABLE_PARALLEL_PROCESSING = False
+MAX_WORKERS = 4
+WORKER_CPU_THREADS = 1
+
+# PROFILING (tiempos, llamadas, histogramas, píxeles y RSS por etapa; un JSON por ejecución)
+ENABLE_PROFILING = False
+PROFILING_FOLDER = BASE_DIR / "profiling"
+PROFILING_PROMETHEUS = False    # además, ocr_classifier.prom (textfile collector de node_exporter)
+PROFILING_TRACK_RSS = True      # variación de RSS por etapa (lectura de /proc en cada etapa)
+
+# PAGE SHARDING (las páginas de un PDF grande se reparten entre MAX_WORKERS procesos)
+ENABLE_PAGE_SHARDING = False
+SHARD_MIN_PAGES = 100       # PDFs con al menos estas páginas se reparten por tramos
+SHARD_PAGE_COUNT = 24       # páginas por tramo (múltiplo de PAGE_WINDOW_SIZE)
\ No newline at end of file
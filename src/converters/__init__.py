@@ -1,3 +1,4 @@
 from .pdf_converter import PDFConverter
+from .pdf_session import PDFSession
 
-__all__ = ['PDFConverter']
\ No newline at end of file
+__all__ = ['PDFConverter', 'PDFSession']
\ No newline at end of file
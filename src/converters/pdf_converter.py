@@ -1,89 +1,313 @@
 from pathlib import Path
-from typing import List, Dict, Generator
-import fitz  # PyMuPDF
-from PIL import Image
-import io
+from typing import Dict, Generator, Container, Tuple, TYPE_CHECKING
+import numpy as np
+import hashlib
 import gc
+import math
+import re
 
 from src.utils.logger import Logger
-from src.config import PDF_DPI, CLEAR_MEMORY_AFTER_PAGE
+from src.analyzers.blank_detector import BlankPageDetector
+from src.converters.pdf_session import PDFSession, FITZ_LOCK
+from src.config import (
+    PDF_DPI,
+    CLEAR_MEMORY_AFTER_PAGE,
+    ENABLE_BLANK_DETECTION,
+    BLANK_THUMBNAIL_DPI,
+    ORIENTATION_THUMBNAIL_SIZE,
+    RENDER_MAX_PIXELS,
+    ENABLE_TEXT_LAYER,
+    TEXT_LAYER_MIN_CHARS,
+    TEXT_LAYER_MIN_WORDS,
+    TEXT_LAYER_MIN_VALID_RATIO,
+    TEXT_LAYER_MAX_IMAGE_COVERAGE,
+    ENABLE_OCR_CACHE
+)
+
+# PyMuPDF se importa al abrir el primer PDF (PDFSession), no al importar el módulo
+if TYPE_CHECKING:
+    import fitz
+
+# Caracteres habituales en documentos comerciales además de letras y dígitos
+TEXT_LAYER_VALID_SYMBOLS = set(".,:;#$%&/()-_'\"+*@°")
+WORD_PATTERN = re.compile(r'[^\W\d_]{3,}')
+
+
+def pixmap_to_array(pix: 'fitz.Pixmap') -> np.ndarray:
+    
+    # Vista sobre el buffer del pixmap (sin copia): el pixmap debe seguir vivo
+    return np.ndarray(
+        shape=(pix.height, pix.width, pix.n),
+        dtype=np.uint8,
+        buffer=pix.samples_mv,
+        strides=(pix.stride, pix.n, 1)
+    )
+
+
+class PageRaster:
+    
+    # Página aún sin rasterizar: solo se renderizan (con clip) las filas que pide
+    # el OCR, ya en posición vertical. Válida mientras el documento siga abierto
+    def __init__(self, page: 'fitz.Page', zoom: float, lock=None, angle: int = 0):
+        import fitz
+        
+        self.page = page
+        self.zoom = zoom
+        self.lock = lock or FITZ_LOCK
+        self.angle = angle % 360
+        self.matrix = fitz.Matrix(zoom, zoom).prerotate(-self.angle)
+        # Rejilla de píxeles del render completo: las bandas se recortan sobre ella
+        self.bounds = (page.rect * self.matrix).irect
+        self.width, self.height = self.bounds.width, self.bounds.height
+    
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.height, self.width, 3
+    
+    def rotated(self, angle: int) -> 'PageRaster':
+        
+        # Mismo sentido que np.rot90: el giro se aplica en el propio render
+        return PageRaster(self.page, self.zoom, self.lock, self.angle + angle)
+    
+    def rows(self, start: int, end: int) -> np.ndarray:
+        import fitz
+        
+        clip = fitz.Rect(
+            self.bounds.x0, self.bounds.y0 + start,
+            self.bounds.x1, self.bounds.y0 + end
+        ) * ~self.matrix
+        with self.lock:
+            pix = self.page.get_pixmap(matrix=self.matrix, clip=clip, alpha=False)
+        # Copia: el buffer del pixmap se libera al salir
+        return np.array(pixmap_to_array(pix))
+    
+    def __getitem__(self, rows: slice) -> np.ndarray:
+        
+        start, end, _ = rows.indices(self.height)
+        return self.rows(start, end)
+    
+    def full(self) -> np.ndarray:
+        return self.rows(0, self.height)
 
 
 class PDFConverter:
     
-    def __init__(self, dpi: int = PDF_DPI):
+    def __init__(self, dpi: int = PDF_DPI, use_text_layer: bool = ENABLE_TEXT_LAYER,
+                 detect_blank: bool = ENABLE_BLANK_DETECTION, page_signatures: bool = ENABLE_OCR_CACHE):
         
         self.dpi = dpi
+        self.use_text_layer = use_text_layer
+        # La huella de la página solo sirve de clave de la caché OCR
+        self.page_signatures = page_signatures
         self.zoom = dpi / 72
-        self.matrix = fitz.Matrix(self.zoom, self.zoom)
+        self.blank_detector = BlankPageDetector() if detect_blank else None
+        # PyMuPDF no es thread-safe: lock del proceso, compartido con los renders
+        # diferidos de bandas y con la separación (también entre procesadores)
+        self.lock = FITZ_LOCK
         self.logger = Logger.get_logger(__name__)
     
-    def convert_pdf_pages(self, pdf_path: Path) -> Generator[Dict, None, None]:
+    def open_pdf(self, pdf_path: Path) -> PDFSession:
+        return PDFSession(pdf_path)
+    
+    def convert_pdf_pages(self, session: PDFSession, skip_pages: Container[int] = None,
+                          page_range: Tuple[int, int] = None) -> Generator[Dict, None, None]:
                                             #Yields: Dict con información de la página procesada
+                                            # Los PageRaster solo son válidos mientras la sesión siga abierta
        
         try:
-            self.logger.info(f"** Abriendo PDF: {pdf_path.name}")
-            pdf_document = fitz.open(pdf_path)
+            self.logger.info(f"** Abriendo PDF: {session.name}")
+            pdf_document = session.document
             total_pages = pdf_document.page_count
             
             self.logger.info(f"   Total de páginas: {total_pages}")
             
-            for page_num in range(total_pages):
-                # Renderizar página
-                page = pdf_document[page_num]
-                pix = page.get_pixmap(matrix=self.matrix, alpha=False)
-                
-                # Convertir a PIL Image en memoria
-                img_data = pix.tobytes("png")
-                image = Image.open(io.BytesIO(img_data))
-                
-                # Información de la página
-                page_info = {
-                    'page_number': page_num + 1,
-                    'image': image,  # Imagen en memoria
-                    'size': image.size,
-                    'success': True
-                }
+            # Tramo (base 1, inclusive) cuando las páginas de un PDF se reparten entre workers
+            first_page, last_page = page_range or (1, total_pages)
+            
+            for page_num in range(first_page - 1, min(last_page, total_pages)):
+                if skip_pages and page_num + 1 in skip_pages:
+                    continue
                 
-                pix = None
+                # Renderizar página
+                with self.lock:
+                    page = pdf_document[page_num]
                 
-                self.logger.debug(f"   ✔ Página {page_num + 1} convertida en memoria")
+                # PDF nativo: si la capa de texto es válida no se rasteriza. Un escaneo con
+                # texto añadido (sello, pie del escáner) se sigue tratando como imagen
+                if self.use_text_layer:
+                    with self.lock:
+                        text = self.extract_text_layer(page)
+                    if text and self.image_coverage(page) >= TEXT_LAYER_MAX_IMAGE_COVERAGE:
+                        self.logger.debug(f"   Página {page_num + 1}: capa de texto sobre un escaneo, se hace OCR")
+                        text = ""
+                    if text:
+                        self.logger.debug(f"   ✔ Página {page_num + 1} con capa de texto")
+                        yield {
+                            'page_number': page_num + 1,
+                            'text': text,
+                            'text_source': 'text_layer',
+                            'success': True
+                        }
+                        continue
                 
+                page_info = self._raster_page_data(pdf_document, page, page_num)
                 yield page_info
                 
-                
                 if CLEAR_MEMORY_AFTER_PAGE:
-                    del image
+                    del page_info
                     gc.collect()
             
-            pdf_document.close()
             self.logger.info(f"✔ PDF procesado: {total_pages} páginas")
             
         except Exception as e:
-            self.logger.error(f"✗ Error convirtiendo PDF {pdf_path.name}: {str(e)}")
+            self.logger.error(f"✗ Error convirtiendo PDF {session.name}: {str(e)}")
             yield {
                 'page_number': 0,
-                'image': None,
                 'success': False,
                 'error': str(e)
             }
     
-    def get_pdf_info(self, pdf_path: Path) -> Dict:
+    def raster_page(self, session: PDFSession, page_number: int) -> Dict:
+        
+        # Página con capa de texto que al final necesita OCR (la capa no aportó keywords)
+        with self.lock:
+            pdf_document = session.document
+            return self._raster_page_data(pdf_document, pdf_document[page_number - 1], page_number - 1)
+    
+    def _raster_page_data(self, pdf_document: 'fitz.Document', page: 'fitz.Page', page_num: int) -> Dict:
         
+        # Miniatura a baja resolución: basta para página en blanco y orientación
+        with self.lock:
+            thumbnail = self.render_thumbnail(page)
+        render_pixels = thumbnail.shape[0] * thumbnail.shape[1]
+        
+        # Separadores y reversos de escáner: se descartan sin renderizar
+        # la página completa ni pasar por OCR
+        if self.blank_detector is not None:
+            is_blank, white_percentage = self.blank_detector.analyze(thumbnail)
+            if is_blank:
+                self.logger.debug(f"   ✔ Página {page_num + 1} en blanco ({white_percentage:.1%})")
+                return {
+                    'page_number': page_num + 1,
+                    'text_source': 'blank',
+                    'is_blank': True,
+                    'white_percentage': white_percentage,
+                    'render_pixels': render_pixels,
+                    'success': True
+                }
+        
+        # La página a resolución de OCR no se rasteriza aquí: el OCR pide
+        # solo las bandas que lee, ya giradas
+        raster = PageRaster(page, self.page_zoom(page), self.lock)
+        
+        # Información de la página
+        page_info = {
+            'page_number': page_num + 1,
+            'thumbnail': thumbnail,
+            'raster': raster,
+            'signature': self.page_signature(pdf_document, page, raster.zoom) if self.page_signatures else None,
+            'size': (raster.width, raster.height),
+            'render_pixels': render_pixels,
+            'text_source': 'ocr',
+            'success': True
+        }
+        
+        self.logger.debug(f"   ✔ Página {page_num + 1} preparada ({raster.width}x{raster.height} px)")
+        
+        return page_info
+    
+    def image_coverage(self, page: 'fitz.Page') -> float:
+        
+        # Fracción de la página cubierta por imágenes (suma de áreas recortadas a la página)
+        page_area = abs(page.rect) or 1
+        with self.lock:
+            boxes = [info['bbox'] for info in page.get_image_info()]
+        covered = sum(abs(page.rect & type(page.rect)(box)) for box in boxes)
+        return min(1.0, covered / page_area)
+    
+    def page_zoom(self, page: 'fitz.Page') -> float:
+        
+        # Tope de píxeles por página: planos A3, listas largas, etc. bajan de DPI
+        width, height = page.rect.width, page.rect.height
+        pixels = width * height * self.zoom ** 2
+        if pixels <= RENDER_MAX_PIXELS:
+            return self.zoom
+        zoom = math.sqrt(RENDER_MAX_PIXELS / (width * height))
+        self.logger.debug(f"   Página grande: render a {zoom * 72:.0f} DPI en lugar de {self.dpi}")
+        return zoom
+    
+    def render_thumbnail(self, page: 'fitz.Page') -> np.ndarray:
+        import fitz
+        
+        # Lado corto a la entrada del clasificador de orientación, sin bajar de BLANK_THUMBNAIL_DPI
+        short_side = min(page.rect.width, page.rect.height) or 1
+        zoom = max(BLANK_THUMBNAIL_DPI / 72, ORIENTATION_THUMBNAIL_SIZE / short_side)
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return np.array(pixmap_to_array(pix))
+    
+    def page_signature(self, pdf_document: 'fitz.Document', page: 'fitz.Page', zoom: float) -> bytes:
+        
+        # Huella exacta del contenido (operadores, imágenes, anotaciones y valores de
+        # formulario) y del render, sin rasterizar la página: clave de la caché OCR
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{zoom:.6f}|{page.rect}|{page.rotation}".encode('ascii'))
+        with self.lock:
+            digest.update(page.read_contents())
+            for xref in sorted({item[0] for item in page.get_images(full=True) + page.get_xobjects()}):
+                digest.update(pdf_document.xref_stream_raw(xref) or b'')
+            # Las anotaciones y los campos se pintan encima del contenido: dos formularios
+            # rellenados sobre la misma plantilla no comparten clave
+            for annot in page.annots():
+                digest.update(pdf_document.xref_object(annot.xref, compressed=True).encode('utf-8'))
+                appearance_type, appearance = pdf_document.xref_get_key(annot.xref, "AP/N")
+                if appearance_type == 'xref':
+                    digest.update(pdf_document.xref_stream_raw(int(appearance.split()[0])) or b'')
+            for widget in page.widgets():
+                digest.update(f"{widget.field_name}|{widget.field_value}|{widget.rect}".encode('utf-8'))
+        return digest.digest()
+    
+    def extract_text_layer(self, page: 'fitz.Page') -> str:
+        
+        try:
+            text = page.get_text("text")
+        except Exception as e:
+            self.logger.debug(f"   Capa de texto no legible: {str(e)}")
+            return ""
+        
+        # Normalizar espacios/saltos para que las keywords multi-palabra coincidan
+        text = ' '.join(text.split())
+        
+        if not self.is_text_layer_usable(text):
+            return ""
+        return text
+    
+    def is_text_layer_usable(self, text: str) -> bool:
+        
+        chars = text.replace(' ', '')
+        if len(chars) < TEXT_LAYER_MIN_CHARS:
+            return False
+        
+        # Capas basura: glifos sin mapeo unicode, caracteres de reemplazo, etc.
+        valid_chars = sum(1 for c in chars if c.isalnum() or c in TEXT_LAYER_VALID_SYMBOLS)
+        if valid_chars / len(chars) < TEXT_LAYER_MIN_VALID_RATIO:
+            return False
+        
+        return len(WORD_PATTERN.findall(text)) >= TEXT_LAYER_MIN_WORDS
+    
+    def get_pdf_info(self, session: PDFSession) -> Dict:
+        
+        # Primer uso de la sesión: aquí se abre (y falla, si el PDF no es legible)
         try:
-            pdf_document = fitz.open(pdf_path)
-            info = {
-                'filename': pdf_path.name,
-                'path': str(pdf_path),
-                'total_pages': pdf_document.page_count,
+            return {
+                'filename': session.name,
+                'path': str(session.pdf_path),
+                'total_pages': session.page_count,
                 'success': True
             }
-            pdf_document.close()
-            return info
         except Exception as e:
-            self.logger.error(f"✗ Error obteniendo info de {pdf_path.name}: {str(e)}")
+            self.logger.error(f"✗ Error obteniendo info de {session.name}: {str(e)}")
             return {
-                'filename': pdf_path.name,
+                'filename': session.name,
                 'success': False,
                 'error': str(e)
             }
\ No newline at end of file
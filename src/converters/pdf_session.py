@@ -0,0 +1,63 @@
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+import threading
+
+from src.config import PDF_OPEN_IN_MEMORY
+
+if TYPE_CHECKING:
+    import fitz  # PyMuPDF
+
+# PyMuPDF no es thread-safe: un único lock por proceso para abrir, renderizar,
+# leer y separar, lo compartan o no los procesadores (API con varios workers)
+FITZ_LOCK = threading.RLock()
+
+
+class PDFSession:
+
+    # Un único fitz.Document por PDF, compartido por info, render y separación.
+    # Se abre al primer uso y se cierra siempre al salir del with (también con errores)
+    def __init__(self, pdf_path: Path, data: Optional[bytes] = None, in_memory: bool = PDF_OPEN_IN_MEMORY):
+
+        self.pdf_path = Path(pdf_path)
+        self.data = data
+        self.in_memory = in_memory
+        self._document = None
+
+    @property
+    def name(self) -> str:
+        return self.pdf_path.name
+
+    @property
+    def document(self) -> 'fitz.Document':
+
+        if self._document is None:
+            # Import diferido: PyMuPDF solo se carga cuando hay un PDF que abrir
+            import fitz
+
+            # En memoria: una sola lectura secuencial del fichero (almacenamiento en red)
+            if self.data is None and self.in_memory:
+                self.data = self.pdf_path.read_bytes()
+            with FITZ_LOCK:
+                if self.data is not None:
+                    self._document = fitz.open(stream=self.data, filetype="pdf")
+                else:
+                    self._document = fitz.open(self.pdf_path)
+        return self._document
+
+    @property
+    def page_count(self) -> int:
+        return self.document.page_count
+
+    def close(self):
+
+        if self._document is not None:
+            with FITZ_LOCK:
+                self._document.close()
+            self._document = None
+        self.data = None
+
+    def __enter__(self) -> 'PDFSession':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
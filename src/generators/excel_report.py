@@ -0,0 +1,157 @@
+from pathlib import Path
+from typing import List, Dict
+from datetime import datetime
+import atexit
+import os
+import threading
+
+from src.utils.logger import Logger
+from src.utils.atomic import atomic_output
+from src.config import EXCEL_REPORT_PATH, EXCEL_FLUSH_ROWS, EXCEL_MAX_ROWS_PER_FILE
+
+MAX_PAGES = 10
+SHEET_TITLE = "Reporte De Clasificacion"
+HEADER_STYLE = "reporte_cabecera"
+CELL_STYLE = "reporte_celda"
+
+
+def build_excel_row(pdf_path: str, pdf_name: str, classifications: List[Dict]) -> List[str]:
+
+    row_values = [pdf_path, pdf_name]
+    for i in range(1, MAX_PAGES + 1):
+        if i <= len(classifications):
+            page = classifications[i-1]
+            doc_type = page.get('document_type', 'UNKNOWN')
+            is_func = page.get('functional', False)
+            conf = page.get('ocr_confidence', 0.0)
+
+            if (not is_func or doc_type == "UNKNOWN"):
+                row_values.append(f"{doc_type} (✗)")
+            else:
+                row_values.append(doc_type)
+
+            row_values.append(f"{conf * 100:.2f}%")
+        else:
+            row_values.extend(["", ""])
+    return row_values
+
+
+class ExcelReportWriter:
+
+    def __init__(self, excel_path: Path = EXCEL_REPORT_PATH,
+                 flush_rows: int = EXCEL_FLUSH_ROWS,
+                 max_rows_per_file: int = EXCEL_MAX_ROWS_PER_FILE):
+
+        self.logger = Logger.get_logger(__name__)
+        self.excel_path = Path(excel_path)
+        self.flush_rows = flush_rows
+        self.max_rows_per_file = max_rows_per_file
+        self.pending_rows = []
+        self.lock = threading.Lock()
+
+        # Si la ejecución se interrumpe, las filas pendientes se guardan al salir
+        atexit.register(self.flush)
+
+    def add_row(self, pdf_path: str, pdf_name: str, classifications: List[Dict]):
+
+        with self.lock:
+            self.pending_rows.append(build_excel_row(pdf_path, pdf_name, classifications))
+            should_flush = len(self.pending_rows) >= self.flush_rows
+
+        if should_flush:
+            self.flush()
+
+    def close(self):
+
+        # Guarda lo pendiente y retira el guardado al salir: un writer por llamada
+        # no deja un handler de atexit vivo por cada uno
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def has_pending_rows(self) -> bool:
+
+        with self.lock:
+            return bool(self.pending_rows)
+
+    def _register_styles(self, work_book):
+        from openpyxl.styles import Font, Alignment, NamedStyle
+
+        names = {style if isinstance(style, str) else style.name for style in work_book.named_styles}
+        if HEADER_STYLE not in names:
+            work_book.add_named_style(NamedStyle(
+                name=HEADER_STYLE, font=Font(bold=True), alignment=Alignment(horizontal='center')
+            ))
+        if CELL_STYLE not in names:
+            work_book.add_named_style(NamedStyle(
+                name=CELL_STYLE, alignment=Alignment(horizontal='center')
+            ))
+
+    def _new_workbook(self):
+        from openpyxl import Workbook
+
+        work_book = Workbook()
+        work_sheet = work_book.active
+        work_sheet.title = SHEET_TITLE
+        self._register_styles(work_book)
+
+        headers = ['Path', 'PDF_Name']
+        for i in range(1, MAX_PAGES + 1):
+            headers.extend([f'Pag {i}', f'Confidence {i}'])
+        work_sheet.append(headers)
+        for cell in work_sheet[1]:
+            cell.style = HEADER_STYLE
+
+        work_sheet.column_dimensions['A'].width = 40
+        work_sheet.column_dimensions['B'].width = 25
+        for i in range(MAX_PAGES):
+            work_sheet.column_dimensions[chr(67 + i*2)].width = 21
+            work_sheet.column_dimensions[chr(68 + i*2)].width = 13
+        return work_book
+
+    def _rollover(self):
+
+        # Fichero lleno: se archiva con fecha y se empieza uno nuevo
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        archived = self.excel_path.with_name(f"{self.excel_path.stem}_{stamp}{self.excel_path.suffix}")
+        os.replace(self.excel_path, archived)
+        self.logger.info(f" ✓ Excel archivado: {archived.name}")
+
+    def flush(self):
+
+        with self.lock:
+            rows, self.pending_rows = self.pending_rows, []
+            if not rows:
+                return
+
+            try:
+                # openpyxl solo se importa cuando de verdad hay filas que escribir
+                from openpyxl import load_workbook
+
+                self.excel_path.parent.mkdir(parents=True, exist_ok=True)
+
+                if self.excel_path.exists():
+                    work_book = load_workbook(self.excel_path)
+                    if work_book.active.max_row - 1 + len(rows) > self.max_rows_per_file:
+                        self._rollover()
+                        work_book = self._new_workbook()
+                    else:
+                        self._register_styles(work_book)
+                else:
+                    work_book = self._new_workbook()
+
+                # Estilo solo en las filas nuevas, no en toda la hoja
+                work_sheet = work_book.active
+                for row_values in rows:
+                    work_sheet.append(row_values)
+                    for cell in work_sheet[work_sheet.max_row]:
+                        cell.style = CELL_STYLE
+
+                # Escritura atómica: un corte durante el save no corrompe el Excel existente
+                with atomic_output(self.excel_path) as tmp_path:
+                    work_book.save(tmp_path)
+                self.logger.info(f" ✓ Excel actualizado: {self.excel_path} (+{len(rows)} filas)")
+
+            except Exception as e:
+                # Las filas vuelven al buffer para el siguiente intento
+                self.pending_rows = rows + self.pending_rows
+                self.logger.error(f"✗ Error guardando Excel {self.excel_path}: {str(e)}")
@@ -1,11 +1,23 @@
-from pathlib import Path
-from typing import List, Dict
-import fitz  # PyMuPDF
+from typing import List, Dict, Tuple
 
 from src.utils.logger import Logger
+from src.utils.atomic import atomic_output
+from src.converters.pdf_session import PDFSession, FITZ_LOCK
 from src.config import PDF_OUTPUT_FOLDER
 
 
+def page_ranges(pages: List[int]) -> List[Tuple[int, int]]:
+
+    # Páginas (base 1) agrupadas en tramos consecutivos: [(desde, hasta)]
+    ranges = []
+    for page_num in pages:
+        if ranges and page_num == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], page_num)
+        else:
+            ranges.append((page_num, page_num))
+    return ranges
+
+
 class PDFGenerator:
  
     
@@ -15,22 +27,30 @@ class PDFGenerator:
         self.output_folder.mkdir(exist_ok=True)
     
     def generate_separated_pdfs(self, 
-                                pdf_path: Path,
+                                session: PDFSession,
                                 document_groups: List[Dict]) -> List[Dict]:
         
+        # Mismo lock que el render: en la API varios hilos separan y renderizan a la vez
+        with FITZ_LOCK:
+            return self._generate_separated_pdfs(session, document_groups)
+    
+    def _generate_separated_pdfs(self, session: PDFSession, document_groups: List[Dict]) -> List[Dict]:
+        import fitz  # PyMuPDF
+        
         if not document_groups:
-            self.logger.warning(f"* No hay grupos de documentos para {pdf_path.name}")
+            self.logger.warning(f"* No hay grupos de documentos para {session.name}")
             return []
         
-        pdf_name = pdf_path.stem
+        pdf_name = session.pdf_path.stem
         
         output_folder = self.output_folder
         output_folder.mkdir(exist_ok=True)
 
+        # Mismo documento ya abierto para el render: no se vuelve a leer el fichero
         try:
-            pdf_document = fitz.open(pdf_path)
+            pdf_document = session.document
         except Exception as e:
-            self.logger.error(f"X Error abriendo PDF {pdf_path.name}: {str(e)}")
+            self.logger.error(f"X Error abriendo PDF {session.name}: {str(e)}")
             return []
         
         generated_pdfs = []
@@ -51,13 +71,16 @@ class PDFGenerator:
             try:
                 new_pdf = fitz.open()
                 
-                for page_num in pages:
-
-                    new_pdf.insert_pdf(pdf_document, from_page=page_num-1, to_page=page_num-1)
-                
-                output_path = output_folder / output_filename
-                new_pdf.save(output_path)
-                new_pdf.close()
+                try:
+                    # Una llamada a insert_pdf por tramo consecutivo, no por página
+                    for first_page, last_page in page_ranges(pages):
+                        new_pdf.insert_pdf(pdf_document, from_page=first_page-1, to_page=last_page-1)
+                    
+                    output_path = output_folder / output_filename
+                    with atomic_output(output_path) as tmp_path:
+                        new_pdf.save(tmp_path)
+                finally:
+                    new_pdf.close()
                 
                 pdf_info = {
                     'type': group['type'],
@@ -77,7 +100,5 @@ class PDFGenerator:
                 self.logger.error(f"X  Error generando PDF {doc_type}: {str(e)}")
                 continue
         
-        pdf_document.close()
-        
         self.logger.info(f"✓ Generados {len(generated_pdfs)} PDF")
         return generated_pdfs
\ No newline at end of file
@@ -1,12 +1,14 @@
 from typing import Tuple, List, Dict
 from pathlib import Path
 import json
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, Alignment
+import math
 import re
-import os
+import numpy as np
 from src.utils.logger import Logger
-from src.config import DOCUMENT_TYPES, CLASSIFICATION_FOLDER
+from src.processors.keyword_index import KeywordIndex
+from src.generators.excel_report import ExcelReportWriter
+from src.utils.atomic import atomic_output
+from src.config import DOCUMENT_TYPES, CLASSIFICATION_FOLDER, EARLY_STOPPING_MIN_KEYWORDS
 
 
 class DocumentClassifier:
@@ -14,6 +16,8 @@ class DocumentClassifier:
     def __init__(self):
         self.logger = Logger.get_logger(__name__)
         self.document_types = DOCUMENT_TYPES
+        self.keyword_index = KeywordIndex(self.document_types)
+        self.output_folder = CLASSIFICATION_FOLDER
     
     def find_keywords_smart(self, text: str, keywords: List[str]) -> List[str]:
 
@@ -33,20 +37,16 @@ class DocumentClassifier:
         
         return found
     
-    def classify_page(self, text: str) -> Tuple[str, List[str], List[str], int, int]:
+    def _score_candidates(self, hits: Dict[str, Tuple[List[str], List[str]]]) -> Dict[str, Dict]:
         
         candidates = {}
         
         for doc_type, config in self.document_types.items():
             
-            primary_keywords = config.get('primary_keywords', config.get('keywords', []))
-            primary_found = self.find_keywords_smart(text, primary_keywords)
+            primary_found, secondary_found = hits[doc_type]
             
             if not primary_found:
                 continue
-            
-            secondary_keywords = config.get('secondary_keywords', [])
-            secondary_found = self.find_keywords_smart(text, secondary_keywords)
 
             is_functional = config.get('functional', False)
             min_secondary = config.get('min_secondary_matches', 0)
@@ -67,19 +67,24 @@ class DocumentClassifier:
                 'total_keywords': total_keywords,
                 'functional': is_functional
             }
-            
         
-        if not candidates:
-            return "UNKNOWN", [], [], 0, 0 
-
-        def selection_criteria(doc_type):
-            return (
+        return candidates
+    
+    def _selection_criteria(self, candidates: Dict[str, Dict], doc_type: str):
+        return (
             candidates[doc_type]['score'],
             candidates[doc_type]['functional'],
             candidates[doc_type]['total_keywords']
-    )
+        )
+    
+    def classify_page(self, text: str) -> Tuple[str, List[str], List[str], int, int]:
+        
+        candidates = self._score_candidates(self.keyword_index.search(text))
+        
+        if not candidates:
+            return "UNKNOWN", [], [], 0, 0 
 
-        winner_type = max(candidates, key=selection_criteria)
+        winner_type = max(candidates, key=lambda doc_type: self._selection_criteria(candidates, doc_type))
         winner_data = candidates[winner_type]     
         num_candidates = len(candidates)
         
@@ -91,6 +96,109 @@ class DocumentClassifier:
             num_candidates
         )
     
+    def classify_pages(self, texts: List[str]) -> List[Tuple[str, List[str], List[str], int, int]]:
+        
+        # Mismo resultado que classify_page para cada texto, con el scoring de todas las
+        # páginas a la vez sobre la matriz dispersa página×keyword (reclasificación, evaluación)
+        if not texts:
+            return []
+        
+        index = self.keyword_index
+        found_sets, indptr, indices = index.hit_matrix(texts)
+        primary, secondary = index.type_counts(indptr, indices)
+        
+        configs = [self.document_types[doc_type] for doc_type in index.type_names]
+        functional = np.array([config.get('functional', False) for config in configs])
+        min_secondary = np.array([config.get('min_secondary_matches', 0) for config in configs])
+        
+        candidates = (primary > 0) & ~(functional & (secondary < min_secondary))
+        score = (primary * 3 + secondary).astype(np.float64)
+        score[:, ~functional] *= 0.7
+        total_keywords = primary + secondary
+        num_candidates = candidates.sum(axis=1)
+        
+        # max() por (score, functional, total_keywords); en empate total, el primer tipo
+        best_score = np.where(candidates, score, -np.inf).max(axis=1)
+        tied = candidates & (score == best_score[:, None])
+        tied &= functional | ~(tied & functional).any(axis=1)[:, None]
+        best_total = np.where(tied, total_keywords, -1).max(axis=1)
+        tied &= total_keywords == best_total[:, None]
+        winners = tied.argmax(axis=1)
+        
+        results = []
+        for page, found in enumerate(found_sets):
+            if num_candidates[page] == 0:
+                results.append(("UNKNOWN", [], [], 0, 0))
+                continue
+            
+            winner = winners[page]
+            doc_type = index.type_names[winner]
+            primary_all, secondary_all = index.type_keywords[doc_type]
+            results.append((
+                doc_type,
+                [keyword for keyword in primary_all if keyword.lower() in found],
+                [keyword for keyword in secondary_all if keyword.lower() in found],
+                int(total_keywords[page, winner]),
+                int(num_candidates[page])
+            ))
+        
+        return results
+    
+    def plausible_remaining_keywords(self, found: int, read_fraction: float) -> int:
+        
+        # Ritmo de aparición de las keywords del tipo en lo ya leído extrapolado al área
+        # sin leer, con un mínimo para no descartar un tipo solo porque la cabecera no lo nombra
+        if read_fraction >= 1:
+            return 0
+        expected = found / max(read_fraction, 1e-6) * (1 - read_fraction)
+        return max(EARLY_STOPPING_MIN_KEYWORDS, math.ceil(expected))
+    
+    def is_decided(self, text: str, read_fraction: float) -> bool:
+        
+        hits = self.keyword_index.search(text)
+        candidates = self._score_candidates(hits)
+        if not candidates:
+            return False
+        
+        leader = max(candidates, key=lambda doc_type: self._selection_criteria(candidates, doc_type))
+        leader_score = candidates[leader]['score']
+        
+        # El líder solo puede sumar; se comprueba que ningún otro tipo lo alcance ni en el
+        # mejor caso para él (sus keywords plausibles restantes, primero las primarias)
+        for doc_type, config in self.document_types.items():
+            if doc_type == leader:
+                continue
+            
+            primary_found, secondary_found = hits[doc_type]
+            primary_all, secondary_all = self.keyword_index.type_keywords[doc_type]
+            remaining = self.plausible_remaining_keywords(
+                len(primary_found) + len(secondary_found), read_fraction
+            )
+            primary_left = len(primary_all) - len(primary_found)
+            secondary_left = len(secondary_all) - len(secondary_found)
+            
+            # Primero las secundarias que le faltan para ser candidato (funcionales), luego
+            # las primarias (valen 3) y con lo que sobre, más secundarias
+            is_functional = config.get('functional', False)
+            needed = max(0, config.get('min_secondary_matches', 0) - len(secondary_found)) if is_functional else 0
+            if needed > min(remaining, secondary_left):
+                continue
+            extra_primary = min(remaining - needed, primary_left)
+            extra_secondary = needed + min(remaining - needed - extra_primary, secondary_left - needed)
+            
+            primary_count = len(primary_found) + extra_primary
+            secondary_count = len(secondary_found) + extra_secondary
+            if primary_count == 0:
+                continue
+            
+            potential = primary_count * 3 + secondary_count
+            if not is_functional:
+                potential = potential * 0.7
+            if potential >= leader_score:
+                return False
+        
+        return True
+    
     def is_functional(self, doc_type: str) -> bool:
         if doc_type == "UNKNOWN":
             return False
@@ -128,29 +236,33 @@ class DocumentClassifier:
                                    groups: List[Dict]) -> Path:
 
         pdf_stem = Path(pdf_name).stem
-        output_folder = CLASSIFICATION_FOLDER / pdf_stem
+        output_folder = self.output_folder / pdf_stem
         output_folder.mkdir(parents=True, exist_ok=True)
         
         functional_count = sum(1 for c in classifications if c['functional'])
         non_functional_count = len(classifications) - functional_count
+        blank_count = sum(1 for c in classifications if c.get('is_blank', False))
         
         report_data = {
             'pdf_name': pdf_name,
             'total_pages': len(classifications),
             'functional_pages': functional_count,
             'non_functional_pages': non_functional_count,
+            'blank_pages': blank_count,
             'classifications': classifications,
             'document_groups': groups
         }
         
         # Guardar JSON
         json_path = output_folder / f"{pdf_stem}_clasificacion.json"
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2, ensure_ascii=False)
+        with atomic_output(json_path) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(report_data, f, indent=2, ensure_ascii=False)
         
         # Guardar TXT
         txt_path = output_folder / f"{pdf_stem}_reporte.txt"
-        self._generate_text_report(report_data, txt_path)
+        with atomic_output(txt_path) as tmp_path:
+            self._generate_text_report(report_data, tmp_path)
         
         return json_path
     
@@ -163,7 +275,8 @@ class DocumentClassifier:
             f.write(f"Documento: {report_data['pdf_name']}\n")
             f.write(f"Total páginas: {report_data['total_pages']}\n")
             f.write(f"Funcionales: {report_data['functional_pages']}\n")
-            f.write(f"Eliminadas: {report_data['non_functional_pages']}\n\n")
+            f.write(f"Eliminadas: {report_data['non_functional_pages']}\n")
+            f.write(f"En blanco: {report_data.get('blank_pages', 0)}\n\n")
             
             f.write("-"*70 + "\n")
             f.write("CLASIFICACIÓN POR PÁGINA\n")
@@ -173,7 +286,11 @@ class DocumentClassifier:
                 status = "✓ MANTENER" if page['functional'] else "✗ ELIMINAR"
                 f.write(f"Página {page['page_number']}: {page['document_type']} - {status}\n")
                 keywords_str = ', '.join(page['keywords_found'])
-                f.write(f"  Keywords: {keywords_str}\n\n")
+                f.write(f"  Keywords: {keywords_str}\n")
+                f.write(f"  Fuente: {page.get('text_source', 'ocr')}")
+                if 'ocr_coverage' in page:
+                    f.write(f" (OCR: {page['ocr_coverage']:.0%} de la página, {page['pixels_ocr']} px)")
+                f.write("\n\n")
             
             f.write("-"*70 + "\n")
             f.write("DOCUMENTOS DETECTADOS\n")
@@ -189,57 +306,8 @@ class DocumentClassifier:
                               pdf_name: str,
                               classifications: List[Dict],
                               excel_path: str = "reporte_clasificacion.xlsx"):
-        MAX_PAGES = 10
-
-        row_data = {'Path': pdf_path, 'PDF_Name': pdf_name}
-        for i in range(1, MAX_PAGES + 1):
-            if i <= len(classifications):
-                page = classifications[i-1]
-                doc_type = page.get('document_type', 'UNKNOWN')
-                is_func = page.get('functional', False)
-                conf = page.get('ocr_confidence', 0.0)
-                
-                if (not is_func or doc_type == "UNKNOWN"):
-                    row_data[f'Pag_{i}'] = f"{doc_type} (✗)"
-                else:
-                    row_data[f'Pag_{i}'] = doc_type 
-                    
-                row_data[f'Confidence_{i}'] = f"{conf * 100:.2f}%" 
-            else:
-                row_data[f'Pag_{i}'] = ""
-                row_data[f'Confidence_{i}'] = ""
-        
-        if os.path.exists(excel_path):
-            work_book = load_workbook(excel_path)
-            work_sheet = work_book.active
-        else:
-            work_book = Workbook()
-            work_sheet = work_book.active
-            work_sheet.title = "Reporte De Clasificacion"
-            
-            headers = ['Path', 'PDF_Name']
-            for i in range(1, MAX_PAGES + 1):
-                headers.extend([f'Pag {i}', f'Confidence {i}'])
-            work_sheet.append(headers)
-            
-            for cell in work_sheet[1]:
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center')
-                           
-        row_values = [row_data['Path'], row_data['PDF_Name']]
-        for i in range(1, MAX_PAGES + 1):
-            row_values.extend([row_data[f'Pag_{i}'], row_data[f'Confidence_{i}']])
-        work_sheet.append(row_values)
-
-        work_sheet.column_dimensions['A'].width = 40
-        work_sheet.column_dimensions['B'].width = 25
-        for i in range(MAX_PAGES):
-            work_sheet.column_dimensions[chr(67 + i*2)].width = 21 
-            work_sheet.column_dimensions[chr(68 + i*2)].width = 13
-            
-        for row in work_sheet.iter_rows():
-            for cell in row:
-                cell.alignment = Alignment(horizontal='center')   
-        
-        work_book.save(excel_path)
-        self.logger.info(f" ✓ Excel actualizado: {excel_path}")
\ No newline at end of file
+        
+        # Escritura inmediata de una fila; en lotes usar ExcelReportWriter directamente
+        writer = ExcelReportWriter(Path(excel_path), flush_rows=1)
+        writer.add_row(pdf_path, pdf_name, classifications)
+        writer.close()
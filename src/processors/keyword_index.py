@@ -0,0 +1,151 @@
+from typing import Dict, List, Set, Tuple
+import re
+import numpy as np
+
+
+def _is_word_char(char: str) -> bool:
+    # Misma definición que \w en patrones str de `re`
+    return char.isalnum() or char == '_'
+
+
+def _build_trie(keywords: Set[str]) -> Dict:
+
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return trie
+
+
+def _trie_to_pattern(node: Dict) -> str:
+
+    # Las ramas más largas se prueban primero: el regex devuelve la keyword
+    # más larga que cumple los word boundaries en cada posición
+    terminal = '' in node
+    branches = [
+        re.escape(char) + _trie_to_pattern(child)
+        for char, child in sorted(node.items())
+        if char != ''
+    ]
+
+    if not branches:
+        return ''
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+
+    pattern = '(?:' + '|'.join(branches) + ')'
+    return pattern + '?' if terminal else pattern
+
+
+class KeywordIndex:
+
+    def __init__(self, document_types: Dict):
+
+        self.type_keywords = {}
+        unique_keywords = set()
+
+        for doc_type, config in document_types.items():
+            primary = config.get('primary_keywords', config.get('keywords', []))
+            secondary = config.get('secondary_keywords', [])
+
+            # Mismo orden que find_keywords_smart (sort estable por longitud)
+            self.type_keywords[doc_type] = (
+                sorted(primary, key=len, reverse=True),
+                sorted(secondary, key=len, reverse=True)
+            )
+            unique_keywords.update(keyword.lower() for keyword in primary)
+            unique_keywords.update(keyword.lower() for keyword in secondary)
+
+        self.keywords = unique_keywords
+        self.pattern = re.compile(r'(?=\b(' + _trie_to_pattern(_build_trie(unique_keywords)) + r')\b)')
+
+        # Keywords más cortas que pueden empezar en la misma posición
+        self.prefixes = {
+            keyword: [other for other in unique_keywords if other != keyword and keyword.startswith(other)]
+            for keyword in unique_keywords
+        }
+
+        # Columnas de la matriz página×keyword e incidencia keyword×tipo; una keyword
+        # repetida en la lista de un tipo cuenta tantas veces como en search()
+        self.type_names = list(self.type_keywords)
+        self.columns = sorted(unique_keywords)
+        self.column_of = {keyword: index for index, keyword in enumerate(self.columns)}
+        self.primary_incidence = np.zeros((len(self.columns), len(self.type_names)), dtype=np.int32)
+        self.secondary_incidence = np.zeros_like(self.primary_incidence)
+        for type_index, doc_type in enumerate(self.type_names):
+            primary, secondary = self.type_keywords[doc_type]
+            for keyword in primary:
+                self.primary_incidence[self.column_of[keyword.lower()], type_index] += 1
+            for keyword in secondary:
+                self.secondary_incidence[self.column_of[keyword.lower()], type_index] += 1
+
+    def find_all(self, text: str) -> Set[str]:
+
+        text_lower = text.lower()
+        found = set()
+
+        for match in self.pattern.finditer(text_lower):
+            longest = match.group(1)
+            found.add(longest)
+
+            start = match.start()
+            for prefix in self.prefixes[longest]:
+                if prefix in found:
+                    continue
+                end = start + len(prefix)
+                before_end = _is_word_char(text_lower[end - 1])
+                after_end = end < len(text_lower) and _is_word_char(text_lower[end])
+                if before_end != after_end:
+                    found.add(prefix)
+
+        return found
+
+    def search(self, text: str) -> Dict[str, Tuple[List[str], List[str]]]:
+
+        found = self.find_all(text)
+
+        return {
+            doc_type: (
+                [keyword for keyword in primary if keyword.lower() in found],
+                [keyword for keyword in secondary if keyword.lower() in found]
+            )
+            for doc_type, (primary, secondary) in self.type_keywords.items()
+        }
+
+    def hit_matrix(self, texts: List[str]) -> Tuple[List[Set[str]], np.ndarray, np.ndarray]:
+                                            #Returns: (keywords por página, indptr, indices) en formato CSR
+
+        found_sets = [self.find_all(text) for text in texts]
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(found) for found in found_sets], out=indptr[1:])
+        indices = np.fromiter(
+            (self.column_of[keyword] for found in found_sets for keyword in found),
+            dtype=np.int64, count=int(indptr[-1])
+        )
+        return found_sets, indptr, indices
+
+    def type_counts(self, indptr: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+                                            #Returns: keywords primarias y secundarias encontradas, página×tipo
+
+        pages = len(indptr) - 1
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            csr_matrix = None
+
+        if csr_matrix is not None:
+            hits = csr_matrix(
+                (np.ones(len(indices), dtype=np.int32), indices, indptr),
+                shape=(pages, len(self.columns))
+            )
+            return hits @ self.primary_incidence, hits @ self.secondary_incidence
+
+        # Sin SciPy: cada acierto (página, keyword) suma la fila de incidencia de la keyword
+        rows = np.repeat(np.arange(pages), np.diff(indptr))
+        primary = np.zeros((pages, len(self.type_names)), dtype=np.int32)
+        secondary = np.zeros_like(primary)
+        np.add.at(primary, rows, self.primary_incidence[indices])
+        np.add.at(secondary, rows, self.secondary_incidence[indices])
+        return primary, secondary
@@ -1,11 +1,12 @@
-from typing import Tuple
+from typing import Tuple, Optional, Union, List
+from contextlib import nullcontext
 from PIL import Image
 import numpy as np
-from paddleocr import PaddleOCR
-from paddleocr import DocImgOrientationClassification
-from paddle.vision.transforms import functional as F
+import threading
 
 from src.utils.logger import Logger
+from src.processors.region_planner import OCRRegionPlanner, OCRLine
+from src.converters.pdf_converter import PageRaster
 from src.config import (
     OCR_LANGUAGE, 
     OCR_USE_ANGLE_CLS,
@@ -13,180 +14,333 @@ from src.config import (
     ROI_HEADER_PERCENTAGE,
     ROI_CONFIDENCE_THRESHOLD,
     ANGLE_TOLERANCE,
-    ROI_FOOTER_PERCENTAGE
+    ROI_FOOTER_PERCENTAGE,
+    ORIENTATION_BATCH_SIZE,
+    ORIENTATION_THUMBNAIL_SIZE,
+    OCR_DET_BATCH_SIZE,
+    OCR_REC_BATCH_SIZE
 )
 
-def rotate_image_without_cropping(image, angle):
+# Las páginas llegan como PageRaster (render diferido) o arrays RGB; PIL se acepta por compatibilidad
+ImageInput = Union[PageRaster, np.ndarray, Image.Image]
 
-    import cv2
-    height, width = image.shape[:2]
-    image_center = (width / 2, height / 2)
+# Giros de 90°: nº de cuartos de vuelta antihorarios para np.rot90
+RIGHT_ANGLE_TURNS = {90: 1, 180: 2, 270: 3}
 
-    # Get the 2D rotation matrix
-    rotation_mat = cv2.getRotationMatrix2D(image_center, angle, 1.0)
 
-    # Calculate the new bounding box dimensions
-    abs_cos = abs(rotation_mat[0, 0])
-    abs_sin = abs(rotation_mat[0, 1])
+def rotate_right_angle(image: Union[PageRaster, np.ndarray], angle: int):
 
-    bound_w = int(height * abs_sin + width * abs_cos)
-    bound_h = int(height * abs_cos + width * abs_sin)
-
-    # Adjust the rotation matrix to center the rotated image
-    rotation_mat[0, 2] += bound_w / 2 - image_center[0]
-    rotation_mat[1, 2] += bound_h / 2 - image_center[1]
-
-    # Perform the affine transformation
-    rotated_image = cv2.warpAffine(image, rotation_mat, (bound_w, bound_h))
-    return rotated_image
+    # Página sin rasterizar: se renderiza ya girada
+    if isinstance(image, PageRaster):
+        return image.rotated(angle)
+    # Vista sin copia ni interpolación: el giro es exacto
+    return np.rot90(image, RIGHT_ANGLE_TURNS[angle % 360])
 
 class OCRProcessor:
     
-    def __init__(self, lang: str = OCR_LANGUAGE):
+    def __init__(self, lang: str = OCR_LANGUAGE, cpu_threads: Optional[int] = None):
 
         self.logger = Logger.get_logger(__name__)
-        self.logger.info(f"✓ Inicializando PaddleOCR (idioma: {lang})...")
+        self.lang = lang
         
-        try:
-            self.ocr = PaddleOCR(
-                use_textline_orientation= OCR_USE_ANGLE_CLS,
-                lang=lang,
-                device = "cpu"
-            )
-            self.document_orientation = DocImgOrientationClassification(model_name="PP-LCNet_x1_0_doc_ori")
-            self.logger.info("✓ PaddleOCR inicializado correctamente")
-        except Exception as e:
-            self.logger.error(f"✗ Error inicializando PaddleOCR: {str(e)}")
-            raise
+        # Límite de hilos por proceso cuando hay varios workers
+        self.thread_kwargs = {'cpu_threads': cpu_threads} if cpu_threads else {}
+        
+        # Modelos diferidos: Paddle se importa y carga en la primera página que
+        # necesita OCR u orientación (capa de texto, caché o carpeta vacía no lo pagan)
+        self._ocr = None
+        self._document_orientation = None
+        self._load_lock = threading.Lock()
+        
+        # Perfilado: DocumentProcessor la sustituye por su etapa del StageTimer
+        self.stage = lambda name: nullcontext({})
+    
+    @property
+    def ocr(self):
+        self.load_models()
+        return self._ocr
+    
+    @property
+    def document_orientation(self):
+        self.load_models()
+        return self._document_orientation
+    
+    def load_models(self):
+        
+        if self._ocr is not None:
+            return
+        
+        # Las etapas del pipeline pueden pedir el modelo a la vez desde varios hilos
+        with self._load_lock:
+            if self._ocr is not None:
+                return
+            
+            self.logger.info(f"✓ Inicializando PaddleOCR (idioma: {self.lang})...")
+            try:
+                from paddleocr import PaddleOCR, DocImgOrientationClassification
+                
+                ocr = PaddleOCR(
+                    use_textline_orientation= OCR_USE_ANGLE_CLS,
+                    lang=self.lang,
+                    device = "cpu",
+                    text_recognition_batch_size=OCR_REC_BATCH_SIZE,
+                    textline_orientation_batch_size=OCR_REC_BATCH_SIZE,
+                    **self.thread_kwargs
+                )
+                self._document_orientation = DocImgOrientationClassification(
+                    model_name="PP-LCNet_x1_0_doc_ori",
+                    **self.thread_kwargs
+                )
+                # Se publica al final: _ocr marca los dos modelos como cargados
+                self._ocr = ocr
+                self.logger.info("✓ PaddleOCR inicializado correctamente")
+            except Exception as e:
+                self.logger.error(f"✗ Error inicializando PaddleOCR: {str(e)}")
+                raise
+    
+    def header_rows(self, height: int) -> Tuple[int, int]:
+        return 0, int(height * ROI_HEADER_PERCENTAGE)
     
-    def extract_header_region(self, image: Image.Image) -> Image.Image:
+    def footer_rows(self, height: int) -> Tuple[int, int]:
+        return height - int(height * ROI_FOOTER_PERCENTAGE), height
+    
+    def extract_header_region(self, image: ImageInput) -> np.ndarray:
 
-        width, height = image.size
-        header_height = int(height * ROI_HEADER_PERCENTAGE)
+        if not isinstance(image, PageRaster):
+            image = np.asarray(image)
+        start, end = self.header_rows(image.shape[0])
         
-        # Recorte
-        header_region = image.crop((0, 0, width, header_height))
+        # Recorte (vista sobre las filas o render solo de esas filas)
+        header_region = image[start:end]
         return header_region
     
-    def extract_footer_region(self, image: Image.Image) -> Image.Image:
+    def extract_footer_region(self, image: ImageInput) -> np.ndarray:
 
-        width, height = image.size
-        footer_height = int(height * ROI_FOOTER_PERCENTAGE)
-        footer_start = height - footer_height
-        footer_region = image.crop((0, footer_start, width, height))
+        if not isinstance(image, PageRaster):
+            image = np.asarray(image)
+        start, end = self.footer_rows(image.shape[0])
+        footer_region = image[start:end]
         return footer_region
     
-    def extract_text_from_region(self, image: Image.Image) -> Tuple[str, float]:
-
-        try:
-            img_array = np.array(image)
-            
-            result = self.ocr.predict(input=img_array)
-            
-            if not result or not result[0]:
-                return "", 0.0
-            
-            # Extraer textos y confianzas
-            texts = []
-            confidences = []
-            
-            for line in result:
-                
-                text = line['rec_texts']
-                confidence = line['rec_scores']
-                texts.append(text)
-                confidences.append(confidence)
-        
-            if len(text) == 0:
-                return "", 0.0
-            else:   
-                full_text = ' '.join(texts[0])
-                avg_confidence = sum(confidences[0]) / len(confidences[0])
-                return full_text, avg_confidence
-            
+    def create_region_planner(self, image: ImageInput) -> OCRRegionPlanner:
+        return OCRRegionPlanner(image, self.extract_lines_from_region)
     
-        except Exception as e:
-            self.logger.error(f" Error en OCR de región: {str(e)}")
-
+    def _result_to_lines(self, page_result, img_array: np.ndarray) -> List[OCRLine]:
+        
+        if not page_result:
+            return []
+        
+        texts = page_result['rec_texts']
+        confidences = page_result['rec_scores']
+        boxes = page_result.get('rec_boxes')
+        
+        if boxes is None or len(boxes) != len(texts):
+            height, width = img_array.shape[:2]
+            boxes = [(0, 0, width, height)] * len(texts)
+        
+        return [
+            (text, float(confidence), tuple(int(v) for v in box))
+            for text, confidence, box in zip(texts, confidences, boxes)
+        ]
+    
+    def extract_lines_batch(self, images: List[ImageInput],
+                            batch_size: int = OCR_DET_BATCH_SIZE) -> List[Optional[List[OCRLine]]]:
+                                            #Returns: líneas por imagen; None si su OCR falló
+        
+        # Una llamada a predict por grupo de imágenes: el reconocedor agrupa
+        # las líneas de todas ellas (text_recognition_batch_size)
+        # Solo se materializa el recorte que va al modelo (las páginas giradas son vistas)
+        arrays = [np.ascontiguousarray(image) for image in images]
+        all_lines = []
+        ocr = self.ocr  # un fallo al cargar el modelo no se confunde con un fallo de región
+        
+        for i in range(0, len(arrays), batch_size):
+            chunk = arrays[i:i + batch_size]
+            try:
+                results = list(ocr.predict(input=chunk if len(chunk) > 1 else chunk[0]))
+                if len(results) != len(chunk):
+                    raise ValueError(f"{len(results)} resultados para {len(chunk)} imágenes")
+                all_lines.extend(
+                    self._result_to_lines(result, array)
+                    for result, array in zip(results, chunk)
+                )
+            except Exception as e:
+                # Fallo, no región vacía: no se cuenta como leída ni se guarda en caché
+                self.logger.error(f" Error en OCR de región: {str(e)}")
+                all_lines.extend(None for _ in chunk)
+        
+        return all_lines
+    
+    def extract_lines_from_region(self, image: ImageInput) -> Optional[List[OCRLine]]:
+        
+        return self.extract_lines_batch([image])[0]
+    
+    def lines_to_text(self, lines: Optional[List[OCRLine]]) -> Tuple[str, float]:
+        
+        if not lines:
             return "", 0.0
+        
+        full_text = ' '.join(text for text, _, _ in lines)
+        avg_confidence = sum(confidence for _, confidence, _ in lines) / len(lines)
+        return full_text, avg_confidence
+    
+    def extract_texts_batch(self, images: List[ImageInput]) -> List[Tuple[str, float]]:
+        
+        return [self.lines_to_text(lines) for lines in self.extract_lines_batch(images)]
     
-    def extract_text_from_image(self, image: Image.Image,) -> Tuple[str, float]:
+    def extract_text_from_region(self, image: ImageInput) -> Tuple[str, float]:
+
+        return self.lines_to_text(self.extract_lines_from_region(image))
+    
+    def extract_text_from_image(self, image: ImageInput) -> Tuple[str, float]:
 
         return self.extract_text_from_region(image)
     
-    def extract_text_roi_strategy(self, image: Image.Image, need_footer: bool) -> Tuple[str, float, bool]:
- 
+    def extract_rows_batch(self, requests: List[Tuple[OCRRegionPlanner, int, int]]) -> List[Tuple[str, float]]:
+        
+        # Todos los huecos pendientes de todas las páginas van en el mismo batch
+        pending = [
+            (planner, gap)
+            for planner, start, end in requests
+            for gap in planner.plan_rows(start, end)
+            if gap not in planner.failed_gaps
+        ]
+        
+        if pending:
+            # Las bandas de un PageRaster se rasterizan aquí: etapa 'render' aparte del OCR
+            with self.stage('render') as sample:
+                crops = [planner.crop(gap) for planner, gap in pending]
+                sample['pixels'] = sum(
+                    crop.shape[0] * crop.shape[1]
+                    for (planner, _), crop in zip(pending, crops)
+                    if not isinstance(planner.image, np.ndarray)
+                )
+            lines = self.extract_lines_batch(crops)
+            for (planner, gap), raw_lines in zip(pending, lines):
+                if raw_lines is None:
+                    planner.add_failed(gap)
+                else:
+                    planner.add_band(gap, raw_lines)
+        
+        return [planner.extract_rows(start, end) for planner, start, end in requests]
+    
+    def extract_text_roi_strategy_batch(self, planners: List[OCRRegionPlanner],
+                                        need_footer: bool) -> List[Tuple[str, float, bool]]:
+        
         if not ENABLE_ROI_OCR:
-
-            text, confidence = self.extract_text_from_image(image)
-            return text, confidence, False
+            full_results = self.extract_rows_batch([(planner, 0, planner.height) for planner in planners])
+            return [(text, confidence, False) for text, confidence in full_results]
         
         if not need_footer:
-            header_region_image = self.extract_header_region(image)
-            header_text, header_confidence = self.extract_text_from_region(header_region_image)
-            
-            has_useful_content = (
-                header_confidence >= ROI_CONFIDENCE_THRESHOLD and 
-                len(header_text) > 30 and
-                len(header_text.strip()) > 10  # No solo espacios
-                
-            )
-            if has_useful_content:
-                return header_text, header_confidence, True
-        
+            requests = [(planner, *self.header_rows(planner.height)) for planner in planners]
         else:
-            footer_region_image = self.extract_footer_region(image)
-            footer_text, footer_confidence = self.extract_text_from_region(footer_region_image)
-                
-            has_useful_content = (
-                footer_confidence >= ROI_CONFIDENCE_THRESHOLD and 
-                len(footer_text) > 5 and
-                len(footer_text.strip()) > 5  # No solo espacios
+            requests = [(planner, *self.footer_rows(planner.height)) for planner in planners]
+        
+        results = [None] * len(planners)
+        fallback = []
+        
+        for index, (text, confidence) in enumerate(self.extract_rows_batch(requests)):
+            if not need_footer:
+                has_useful_content = (
+                    confidence >= ROI_CONFIDENCE_THRESHOLD and 
+                    len(text) > 30 and
+                    len(text.strip()) > 10  # No solo espacios
                 )
+            else:
+                has_useful_content = (
+                    confidence >= ROI_CONFIDENCE_THRESHOLD and 
+                    len(text) > 5 and
+                    len(text.strip()) > 5  # No solo espacios
+                )
+            
             if has_useful_content:
-                return footer_text, footer_confidence, True
+                results[index] = (text, confidence, True)
+            else:
+                fallback.append(index)
         
-        full_text, full_confidence = self.extract_text_from_image(image)
+        # Página completa solo para las que la ROI no bastó (el resto de filas)
+        full_results = self.extract_rows_batch([(planners[index], 0, planners[index].height) for index in fallback])
+        for index, (text, confidence) in zip(fallback, full_results):
+            results[index] = (text, confidence, False)
         
-        return full_text, full_confidence, False
+        return results
     
-    def document_orientation_angle(self, image: Image.Image) -> Tuple[float, float]:
+    def extract_text_roi_strategy(self, image: ImageInput, need_footer: bool,
+                                  planner: OCRRegionPlanner = None) -> Tuple[str, float, bool]:
         
-            try: 
-                img_array = np.array(image)
-                result = self.document_orientation.predict(img_array)
-                if not result or not result[0]:
-                    return "", 0.0
-                
-                for line in result: 
-                    angle = line['label_names'][0]
-                    confidence = float(line['scores'][0])
-                    final_angle = float(angle)          
-                       
-                return final_angle, confidence
+        # El planner recuerda las bandas ya reconocidas: cabecera, pie y
+        # página completa nunca repiten OCR sobre las mismas filas
+        if planner is None:
+            planner = self.create_region_planner(image)
+        
+        return self.extract_text_roi_strategy_batch([planner], need_footer)[0]
+    
+    def orientation_thumbnail(self, image: ImageInput) -> np.ndarray:
+        import cv2
+        
+        # PP-LCNet solo usa el lado corto a 256 px: se reduce antes de llamar al modelo
+        image = np.asarray(image)
+        height, width = image.shape[:2]
+        scale = ORIENTATION_THUMBNAIL_SIZE / min(height, width)
+        if scale >= 1:
+            return image
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    
+    def document_orientation_angles(self, images: List[ImageInput],
+                                    batch_size: int = ORIENTATION_BATCH_SIZE) -> List[Tuple[float, float]]:
+        
+        if not images:
+            return []
+        
+        document_orientation = self.document_orientation
+        try:
+            thumbnails = [self.orientation_thumbnail(image) for image in images]
+            results = document_orientation.predict(thumbnails, batch_size=batch_size)
             
-            except Exception as e:
-                self.logger.error(f" Error en OCR de región: {str(e)}")
-                return 0.0, 0.0
+            orientations = []
+            for result in results:
+                if not result:
+                    orientations.append((0.0, 0.0))
+                    continue
+                angle = float(result['label_names'][0])
+                confidence = float(result['scores'][0])
+                orientations.append((angle, confidence))
             
+            if len(orientations) != len(images):
+                raise ValueError(f"{len(orientations)} resultados para {len(images)} páginas")
+            return orientations
         
+        except Exception as e:
+            self.logger.error(f" Error en clasificación de orientación: {str(e)}")
+            return [(0.0, 0.0)] * len(images)
+    
+    def document_orientation_angle(self, image: ImageInput) -> Tuple[float, float]:
+        
+            return self.document_orientation_angles([image], batch_size=1)[0]
+        
+    def correction_angle(self, final_angle: float) -> int:
+        
+        # Giro de 90° que corrige la orientación detectada (0: la página se lee tal cual)
+        for angle in RIGHT_ANGLE_TURNS:
+            if abs(final_angle - angle) <= ANGLE_TOLERANCE:
+                return angle
+        return 0
+    
     def rotate_image_by_angle(self, image, final_angle, confidence):
-            import cv2
             
-            if abs(final_angle - 90) <= ANGLE_TOLERANCE:
+            # Se rota el array RGB directamente: sin conversiones RGB/BGR intermedias
+            if not isinstance(image, PageRaster):
+                image = np.asarray(image)
+            
+            rotation = self.correction_angle(final_angle)
+            if rotation == 90:
                 self.logger.info("   Se detecta imagen rotada a la derecha, se realiza corrección.")
-                opencvImage = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                image = rotate_image_without_cropping(opencvImage, 90)
-                return image
-            elif abs(final_angle - 180) <= ANGLE_TOLERANCE:
+            elif rotation == 180:
                 self.logger.info("   Se detecta imagen al revés, se realiza corrección.")
-                opencvImage = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                image = rotate_image_without_cropping(opencvImage, 180)
-                return image
-            elif abs(final_angle - 270) <= ANGLE_TOLERANCE:
+            elif rotation == 270:
                 self.logger.info("   Se detecta imagen rotada a la izquierda, se realiza corrección.")
-                opencvImage = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                image = rotate_image_without_cropping(opencvImage, -90)
+            else:
                 return image
-
-        
\ No newline at end of file
+            
+            return rotate_right_angle(image, rotation)
@@ -0,0 +1,169 @@
+from typing import List, Optional, Tuple, Callable
+import numpy as np
+
+from src.config import ROI_BAND_OVERLAP
+
+# (texto, confianza, caja x1, y1, x2, y2 relativa al recorte)
+OCRLine = Tuple[str, float, Tuple[int, int, int, int]]
+
+
+class OCRRegionPlanner:
+
+    def __init__(self, image, recognize: Callable[[np.ndarray], Optional[List[OCRLine]]],
+                 overlap: float = ROI_BAND_OVERLAP):
+
+        # Array RGB o PageRaster (solo se rasterizan las filas recortadas)
+        self.image = image if hasattr(image, 'shape') else np.asarray(image)
+        self.height, self.width = self.image.shape[:2]
+        self.recognize = recognize
+        self.margin = int(self.height * overlap)
+
+        # Bandas ya reconocidas: (inicio, fin, líneas con y absoluta, recorte real)
+        self.bands = []
+        self.pixels_ocr = 0
+        self.ocr_calls = 0
+        # Filas pasadas por el OCR en esta ejecución (sin contar bandas de la caché)
+        self.ocr_rows = []
+        # Recortes cuyo OCR falló: no se reintentan en la misma lectura y la página
+        # no se guarda en la caché ni cuenta como terminada
+        self.failed_gaps = set()
+
+    @property
+    def page_pixels(self) -> int:
+        return self.height * self.width
+
+    @property
+    def coverage(self) -> float:
+
+        # Fracción de la página realmente leída: los márgenes solapados cuentan una vez
+        if not self.height:
+            return 0.0
+        rows = 0
+        cursor = 0
+        for start, end in sorted(self.ocr_rows):
+            start = max(start, cursor)
+            if end > start:
+                rows += end - start
+                cursor = end
+        return rows / self.height
+
+    @property
+    def failed(self) -> bool:
+        return bool(self.failed_gaps)
+
+    def is_covered(self, start: int, end: int) -> bool:
+        return not self.uncovered(start, end)
+
+    def uncovered(self, start: int, end: int) -> List[Tuple[int, int]]:
+
+        gaps = []
+        cursor = start
+        for band_start, band_end, *_ in sorted(self.bands, key=lambda band: band[0]):
+            if band_end <= cursor:
+                continue
+            if band_start >= end:
+                break
+            if band_start > cursor:
+                gaps.append((cursor, band_start))
+            cursor = max(cursor, band_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def plan_rows(self, start: int, end: int) -> List[Tuple[int, int, int, int]]:
+
+        # Huecos sin reconocer de [start, end) con el recorte real a pasar al OCR
+        plan = []
+        for gap_start, gap_end in self.uncovered(max(0, start), min(self.height, end)):
+            # Margen solo hacia bandas ya reconocidas, para no cortar líneas en el borde
+            crop_start = gap_start
+            if gap_start > 0 and self.is_covered(gap_start - 1, gap_start):
+                crop_start = max(0, gap_start - self.margin)
+            crop_end = gap_end
+            if gap_end < self.height and self.is_covered(gap_end, gap_end + 1):
+                crop_end = min(self.height, gap_end + self.margin)
+            plan.append((gap_start, gap_end, crop_start, crop_end))
+        return plan
+
+    def crop(self, gap: Tuple[int, int, int, int]) -> np.ndarray:
+        return self.image[gap[2]:gap[3]]
+
+    def add_band(self, gap: Tuple[int, int, int, int], raw_lines: List[OCRLine]):
+
+        start, end, crop_start, crop_end = gap
+        lines = []
+        for text, score, (x1, y1, x2, y2) in raw_lines:
+            box = (x1, y1 + crop_start, x2, y2 + crop_start)
+            center = (box[1] + box[3]) / 2
+            # Las líneas del margen ya pertenecen a otra banda
+            if start <= center < end:
+                lines.append((text, score, box))
+                self._drop_clipped(box)
+
+        self.bands.append((start, end, lines, crop_start, crop_end))
+        self.pixels_ocr += (crop_end - crop_start) * self.width
+        self.ocr_rows.append((crop_start, crop_end))
+        self.ocr_calls += 1
+
+    def add_failed(self, gap: Tuple[int, int, int, int]):
+        self.failed_gaps.add(gap)
+
+    def _drop_clipped(self, box: Tuple[int, int, int, int]):
+
+        # Una línea cortada por el borde de una banda anterior se sustituye
+        # por la versión completa reconocida ahora con margen
+        for _, _, lines, crop_start, crop_end in self.bands:
+            lines[:] = [
+                line for line in lines
+                if not (
+                    (line[2][3] >= crop_end - 2 or line[2][1] <= crop_start + 2)
+                    and line[2][1] < box[3] and box[1] < line[2][3]
+                    and line[2][0] < box[2] and box[0] < line[2][2]
+                )
+            ]
+
+    def extract_rows(self, start: int, end: int) -> Tuple[str, float]:
+
+        start = max(0, start)
+        end = min(self.height, end)
+
+        for gap in self.plan_rows(start, end):
+            if gap in self.failed_gaps:
+                continue
+            raw_lines = self.recognize(self.crop(gap))
+            if raw_lines is None:
+                self.add_failed(gap)
+            else:
+                self.add_band(gap, raw_lines)
+
+        texts = []
+        scores = []
+        for _, _, lines, *_ in sorted(self.bands, key=lambda band: band[0]):
+            for text, score, (_, y1, _, y2) in lines:
+                if start <= (y1 + y2) / 2 < end:
+                    texts.append(text)
+                    scores.append(score)
+
+        if not texts:
+            return "", 0.0
+        return ' '.join(texts), sum(scores) / len(scores)
+
+    def export_bands(self) -> List:
+
+        # Formato serializable (JSON) para la caché de OCR
+        return [
+            [start, end, crop_start, crop_end, [[text, score, list(box)] for text, score, box in lines]]
+            for start, end, lines, crop_start, crop_end in self.bands
+        ]
+
+    def load_bands(self, bands: List):
+
+        for start, end, crop_start, crop_end, lines in bands:
+            self.bands.append((
+                start, end,
+                [(text, score, tuple(box)) for text, score, box in lines],
+                crop_start, crop_end
+            ))
+
+    def extract_full_page(self) -> Tuple[str, float]:
+        return self.extract_rows(0, self.height)
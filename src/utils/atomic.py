@@ -0,0 +1,18 @@
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def atomic_output(path: Path):
+                                            #Yields: ruta temporal donde escribir; al salir sin error se renombra a path
+
+    # Un corte a mitad de escritura nunca deja un fichero final a medias
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
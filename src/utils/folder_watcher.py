@@ -0,0 +1,89 @@
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Tuple
+import time
+
+from src.utils.logger import Logger
+
+
+class FolderWatcher:
+
+    def __init__(self, folder: Path, stable_seconds: float, pattern: str = "*.pdf"):
+
+        self.folder = Path(folder)
+        self.stable_seconds = stable_seconds
+        self.pattern = pattern
+        # ruta -> (tamaño, mtime, instante de llegada, instante desde el que no cambia)
+        self.files: Dict[Path, Tuple[int, int, float, float]] = {}
+        self.logger = Logger.get_logger(__name__)
+
+    def poll(self) -> List[Tuple[Path, float]]:
+                                            #Returns: [(ruta, instante de llegada)] de ficheros completos
+
+        now = time.time()
+        seen = set()
+        ready = []
+
+        for path in self.folder.glob(self.pattern):
+            # Ficheros ocultos/temporales de quien está copiando
+            if path.name.startswith('.'):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            seen.add(path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            previous = self.files.get(path)
+
+            if previous is None:
+                self.files[path] = (*signature, now, now)
+                continue
+
+            size, mtime, arrival, stable_since = previous
+            if (size, mtime) != signature:
+                # Aún se está escribiendo: se reinicia la ventana de estabilidad
+                self.files[path] = (*signature, arrival, now)
+                continue
+
+            if size > 0 and now - stable_since >= self.stable_seconds:
+                ready.append((path, arrival))
+
+        for path in set(self.files) - seen:
+            del self.files[path]
+
+        return sorted(ready, key=lambda item: item[1])
+
+    def forget(self, path: Path):
+        self.files.pop(path, None)
+
+
+class LatencyStats:
+
+    # Ventana acotada de latencias recientes: la memoria no crece con el tiempo de servicio
+    def __init__(self, window: int = 1000):
+
+        self.latencies = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds: float):
+
+        self.latencies.append(seconds)
+        self.count += 1
+
+    def percentile(self, fraction: float) -> float:
+
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def describe(self) -> str:
+
+        if not self.latencies:
+            return "sin datos"
+        return (
+            f"n={self.count}, p50={self.percentile(0.5):.2f}s, "
+            f"p95={self.percentile(0.95):.2f}s, máx={max(self.latencies):.2f}s"
+        )
@@ -0,0 +1,171 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+import numpy as np
+
+from src.utils.logger import Logger
+from src.config import (
+    OCR_CACHE_FILE,
+    OCR_CACHE_MAX_BYTES,
+    PDF_DPI,
+    OCR_LANGUAGE,
+    OCR_USE_ANGLE_CLS
+)
+
+# Cambiar al modificar el formato guardado o los modelos
+CACHE_VERSION = 1
+
+
+def cache_settings() -> str:
+
+    # Solo lo que cambia el resultado del OCR; los % de ROI no, porque
+    # las bandas se guardan con coordenadas y se reutilizan para cualquier ROI.
+    # El giro aplicado (umbral y tolerancia de ángulo) va en cada entrada
+    return json.dumps({
+        'version': CACHE_VERSION,
+        'dpi': PDF_DPI,
+        'lang': OCR_LANGUAGE,
+        'textline_orientation': OCR_USE_ANGLE_CLS,
+        'orientation_model': 'PP-LCNet_x1_0_doc_ori'
+    }, sort_keys=True)
+
+
+class OCRCache:
+
+    def __init__(self, db_path: Path = OCR_CACHE_FILE, max_bytes: int = OCR_CACHE_MAX_BYTES):
+
+        self.logger = Logger.get_logger(__name__)
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.settings = cache_settings().encode('utf-8')
+        self.hits = 0
+        self.misses = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Varios workers pueden compartir el fichero: WAL + timeout
+        self.connection = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY,"
+            " angle REAL,"
+            " angle_confidence REAL,"
+            " bands BLOB,"
+            " size_bytes INTEGER,"
+            " last_access REAL,"
+            " rotation INTEGER)"
+        )
+        # Ficheros anteriores sin la columna: sus entradas (rotation NULL) no se reutilizan
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(pages)")}
+        if 'rotation' not in columns:
+            try:
+                self.connection.execute("ALTER TABLE pages ADD COLUMN rotation INTEGER")
+            except sqlite3.OperationalError:
+                # Otro worker la añadió a la vez
+                pass
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON pages(last_access)")
+        # Tamaño total acumulado, compartido por los workers: se actualiza al insertar y
+        # al eliminar, así la comprobación del límite no recorre la tabla en cada put
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY CHECK (id = 0), total_bytes INTEGER)"
+        )
+        self.connection.execute(
+            "INSERT OR IGNORE INTO stats (id, total_bytes) SELECT 0, COALESCE(SUM(size_bytes), 0) FROM pages"
+        )
+        self.connection.commit()
+
+    def page_key(self, page: Union[np.ndarray, bytes]) -> str:
+
+        # Página rasterizada o huella de su contenido (PDFConverter.page_signature)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(self.settings)
+        if isinstance(page, bytes):
+            digest.update(page)
+            return digest.hexdigest()
+        image = np.ascontiguousarray(page)
+        digest.update(str(image.shape).encode('ascii'))
+        digest.update(memoryview(image).cast('B'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+
+        try:
+            row = self.connection.execute(
+                "SELECT angle, angle_confidence, bands, rotation FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.connection.execute("UPDATE pages SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+            self.hits += 1
+
+            return {
+                'angle': row[0],
+                'angle_confidence': row[1],
+                'bands': json.loads(zlib.decompress(row[2]).decode('utf-8')),
+                # Giro aplicado al raster sobre el que se leyeron las bandas
+                'rotation': row[3]
+            }
+        except Exception as e:
+            self.logger.warning(f"* Error leyendo caché OCR: {str(e)}")
+            return None
+
+    def put(self, key: str, angle: float, angle_confidence: float, rotation: int, bands: List):
+
+        try:
+            payload = zlib.compress(json.dumps(bands, ensure_ascii=False).encode('utf-8'))
+            # Transacción de escritura: otro worker no cambia el tamaño entre la lectura y el INSERT
+            self.connection.execute("BEGIN IMMEDIATE")
+            row = self.connection.execute("SELECT size_bytes FROM pages WHERE key = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (key, angle, angle_confidence, bands, size_bytes, last_access, rotation)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, angle, angle_confidence, payload, len(payload), time.time(), rotation)
+            )
+            total = self._add_size(len(payload) - (row[0] if row else 0))
+            if total > self.max_bytes:
+                self._evict(total)
+            self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            self.logger.warning(f"* Error guardando caché OCR: {str(e)}")
+
+    def _add_size(self, delta: int) -> int:
+                                            #Returns: tamaño total tras el cambio
+
+        self.connection.execute("UPDATE stats SET total_bytes = total_bytes + ? WHERE id = 0", (delta,))
+        return self.connection.execute("SELECT total_bytes FROM stats WHERE id = 0").fetchone()[0]
+
+    def _evict(self, total: int):
+
+        # LRU: se eliminan las entradas menos usadas hasta volver al límite, por lotes
+        # para no leer toda la tabla
+        removed = 0
+        freed = 0
+        while total - freed > self.max_bytes:
+            oldest = self.connection.execute(
+                "SELECT key, size_bytes FROM pages ORDER BY last_access ASC LIMIT 64"
+            ).fetchall()
+            if not oldest:
+                # Tabla vacía: el total real es 0 aunque el contador se hubiera desviado
+                freed = total
+                break
+            for key, size in oldest:
+                if total - freed <= self.max_bytes:
+                    break
+                self.connection.execute("DELETE FROM pages WHERE key = ?", (key,))
+                freed += size
+                removed += 1
+
+        self._add_size(-freed)
+        self.logger.debug(f"   Caché OCR: {removed} entradas eliminadas (LRU)")
+
+    def close(self):
+        self.connection.close()
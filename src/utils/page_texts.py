@@ -0,0 +1,59 @@
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+import gzip
+import json
+
+from src.utils.atomic import atomic_output
+
+# Cambiar al modificar los campos guardados
+PAGE_TEXTS_VERSION = 1
+PAGE_TEXTS_SUFFIX = "_ocr.jsonl.gz"
+
+# Lo que describe el texto leído (no la clasificación): se conserva al reclasificar
+PAGE_FIELDS = (
+    'page_number', 'ocr_confidence', 'used_roi', 'text_source',
+    'pixels_ocr', 'ocr_coverage', 'ocr_cached', 'ocr_calls', 'is_blank'
+)
+
+
+def page_texts_path(folder: Path, pdf_name: str) -> Path:
+
+    # Junto al JSON y el TXT del reporte del PDF
+    pdf_stem = Path(pdf_name).stem
+    return Path(folder) / pdf_stem / f"{pdf_stem}{PAGE_TEXTS_SUFFIX}"
+
+
+def iter_page_texts_files(folder: Path) -> Iterator[Path]:
+    return iter(sorted(Path(folder).glob(f"*/*{PAGE_TEXTS_SUFFIX}")))
+
+
+def write_page_texts(path: Path, pdf_path: Path, total_pages: int,
+                     classifications: List[Dict], texts: List[str]):
+
+    # Una línea de cabecera y una por página; gzip rápido (el texto OCR comprime ~4x)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = {
+        'version': PAGE_TEXTS_VERSION,
+        'pdf_path': str(pdf_path),
+        'pdf_name': Path(pdf_path).name,
+        'total_pages': total_pages
+    }
+    with atomic_output(path) as tmp_path:
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+            f.write(json.dumps(header, ensure_ascii=False) + '\n')
+            for classification, text in zip(classifications, texts):
+                page = {field: classification.get(field) for field in PAGE_FIELDS}
+                page['text'] = text
+                f.write(json.dumps(page, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
+def read_page_texts(path: Path) -> Tuple[Dict, List[Dict]]:
+                                            #Returns: (cabecera, páginas con 'text')
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != PAGE_TEXTS_VERSION:
+            raise ValueError(f"Versión de texto por página no soportada: {header.get('version')}")
+        pages = [json.loads(line) for line in f if line.strip()]
+    return header, pages
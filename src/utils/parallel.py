@@ -0,0 +1,210 @@
+import os
+import threading
+from contextlib import contextmanager
+from multiprocessing.context import SpawnContext, SpawnProcess
+from concurrent.futures import Future, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Callable, Dict, List, Iterator, Tuple
+
+from src.utils.logger import Logger
+
+# Variables leídas por OpenMP / MKL / OpenBLAS / Paddle al arrancar cada proceso
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'FLAGS_cpu_math_library_num_threads',
+)
+
+_worker_processor = None
+_environ_lock = threading.Lock()
+
+
+@contextmanager
+def thread_limited_environ(cpu_threads: int):
+
+    # El hijo (spawn) hereda os.environ al arrancar e importa main (y numpy/OpenBLAS)
+    # antes del initializer: los topes tienen que estar ya en el entorno. Se
+    # restauran después, el proceso principal conserva sus hilos
+    with _environ_lock:
+        saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+        os.environ.update({var: str(cpu_threads) for var in THREAD_ENV_VARS})
+        try:
+            yield
+        finally:
+            for var, value in saved.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+
+
+class ThreadLimitedProcess(SpawnProcess):
+
+    cpu_threads = None
+
+    def start(self):
+        with thread_limited_environ(self.cpu_threads):
+            super().start()
+
+
+class ThreadLimitedSpawnContext(SpawnContext):
+
+    # ProcessPoolExecutor arranca (y reemplaza) los procesos a demanda: cada
+    # arranque se hace con el entorno limitado
+    def __init__(self, cpu_threads: int):
+
+        super().__init__()
+        self.cpu_threads = cpu_threads
+
+    def Process(self, *args, **kwargs) -> ThreadLimitedProcess:
+
+        process = ThreadLimitedProcess(*args, **kwargs)
+        process.cpu_threads = self.cpu_threads
+        return process
+
+
+def limit_threads(cpu_threads: int):
+
+    # En el worker: OpenCV ya importado o Paddle, que leen el límite al inicializarse
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(cpu_threads)
+
+    try:
+        import cv2
+        cv2.setNumThreads(cpu_threads)
+    except ImportError:
+        pass
+
+
+def _init_worker(cpu_threads: int):
+
+    global _worker_processor
+
+    # BLAS/OpenMP ya vienen limitados por el entorno del arranque; aquí OpenCV
+    # y Paddle, que se importa después
+    limit_threads(cpu_threads)
+
+    # Import diferido: el worker carga los modelos una sola vez
+    from main import DocumentProcessor
+    _worker_processor = DocumentProcessor(cpu_threads=cpu_threads)
+    _worker_processor.ocr.load_models()
+
+
+def _with_profile(result: Dict) -> Dict:
+
+    # Con perfilado activo, lo medido en este worker viaja con el resultado
+    if _worker_processor.timer:
+        result['profile'] = _worker_processor.timer.snapshot(reset=True)
+    return result
+
+
+def _process_in_worker(pdf_path: str, shard_min_pages: int = None) -> Dict:
+
+    try:
+        return _with_profile(_worker_processor.process_pdf(
+            Path(pdf_path), write_excel=False, shard_min_pages=shard_min_pages
+        ))
+    except Exception as e:
+        _worker_processor.logger.error(f"✗ Error procesando {Path(pdf_path).name}: {str(e)}")
+        return _with_profile({'pdf_name': Path(pdf_path).name, 'success': False, 'error': str(e)})
+
+
+def _classify_pages_in_worker(pdf_path: str, first_page: int, last_page: int, skip_pages: List[int]) -> Dict:
+
+    try:
+        classifications = _worker_processor.classify_page_range(
+            Path(pdf_path), first_page, last_page, skip_pages=set(skip_pages)
+        )
+        return _with_profile({'success': True, 'classifications': classifications})
+    except Exception as e:
+        _worker_processor.logger.error(
+            f"✗ Error procesando {Path(pdf_path).name} (páginas {first_page}-{last_page}): {str(e)}"
+        )
+        return _with_profile({'success': False, 'error': str(e)})
+
+
+class PDFWorkerPool:
+
+    def __init__(self, max_workers: int, cpu_threads: int):
+
+        self.max_workers = max_workers
+        self.cpu_threads = cpu_threads
+        self.logger = Logger.get_logger(__name__)
+
+    def create_executor(self, workers: int) -> ProcessPoolExecutor:
+
+        self.logger.info(
+            f" Procesamiento paralelo: {workers} workers, "
+            f"{self.cpu_threads} hilo(s) por worker\n"
+        )
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ThreadLimitedSpawnContext(self.cpu_threads),
+            initializer=_init_worker,
+            initargs=(self.cpu_threads,)
+        )
+
+    def submit(self, executor: ProcessPoolExecutor, pdf_path: Path, shard_min_pages: int = None) -> Future:
+        return executor.submit(_process_in_worker, str(pdf_path), shard_min_pages)
+
+    def process(self, executor: ProcessPoolExecutor, pdf_files: List[Path],
+                shard_min_pages: int = None) -> Iterator[Tuple[int, Dict]]:
+                                            #Yields: (índice del PDF, resultado) en orden de finalización
+                                            # Con shard_min_pages, los PDFs grandes vuelven sin procesar ('deferred')
+
+        workers = max(1, min(self.max_workers, len(pdf_files)))
+
+        def failure(index, error):
+            self.logger.error(f"✗ Worker falló con {pdf_files[index].name}: {error}")
+            return {'pdf_name': pdf_files[index].name, 'success': False, 'error': error}
+
+        yield from self._run_bounded(
+            executor, workers, len(pdf_files),
+            lambda index: self.submit(executor, pdf_files[index], shard_min_pages),
+            failure
+        )
+
+    def process_shards(self, executor: ProcessPoolExecutor, pdf_path: Path,
+                       shards: List[Tuple[int, int]], skip_pages=()) -> Iterator[Tuple[int, Dict]]:
+                                            #Yields: (índice del tramo, resultado) en orden de finalización
+
+        def submit(index):
+            first_page, last_page = shards[index]
+            skipped = [page for page in skip_pages if first_page <= page <= last_page]
+            return executor.submit(_classify_pages_in_worker, str(pdf_path), first_page, last_page, skipped)
+
+        def failure(index, error):
+            self.logger.error(f"✗ Worker falló con {pdf_path.name} (páginas {shards[index][0]}-{shards[index][1]}): {error}")
+            return {'success': False, 'error': error}
+
+        yield from self._run_bounded(executor, self.max_workers, len(shards), submit, failure)
+
+    def _run_bounded(self, executor: ProcessPoolExecutor, workers: int, count: int,
+                     submit: Callable[[int], Future],
+                     failure: Callable[[int, str], Dict]) -> Iterator[Tuple[int, Dict]]:
+
+        # Solo unas pocas tareas en vuelo: la memoria no crece con el nº de PDFs o tramos
+        pending = iter(range(count))
+        futures = {}
+
+        def submit_next():
+            for index in pending:
+                futures[submit(index)] = index
+                return
+
+        for _ in range(workers * 2):
+            submit_next()
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = failure(index, str(e))
+                submit_next()
+                yield index, result
@@ -0,0 +1,79 @@
+import queue
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from src.utils.logger import Logger
+
+_STOP = object()
+
+# Un handler recibe un mensaje y devuelve los mensajes para la siguiente etapa
+StageHandler = Callable[[Dict], Iterable[Dict]]
+
+
+class PipelineStage(threading.Thread):
+
+    def __init__(self, name: str, handler: StageHandler,
+                 input_queue: queue.Queue, output_queue: queue.Queue = None):
+
+        super().__init__(name=name, daemon=True)
+        self.handler = handler
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.logger = Logger.get_logger(__name__)
+
+    def _emit(self, message: Dict):
+        if self.output_queue is not None:
+            # put bloqueante: si la siguiente etapa va lenta, esta espera (backpressure)
+            self.output_queue.put(message)
+
+    def run(self):
+
+        while True:
+            message = self.input_queue.get()
+            if message is _STOP:
+                self._emit(_STOP)
+                break
+
+            try:
+                for output in self.handler(message) or ():
+                    self._emit(output)
+            except Exception as e:
+                self.logger.error(f"✗ Error en etapa {self.name}: {str(e)}")
+                self._emit({
+                    'kind': 'error',
+                    'pdf_path': message.get('pdf_path'),
+                    'error': str(e)
+                })
+
+
+class StagedPipeline:
+
+    def __init__(self, stages: List[Tuple[str, StageHandler]], queue_size: int):
+
+        self.stages = stages
+        self.queue_size = queue_size
+        self.logger = Logger.get_logger(__name__)
+
+    def run(self, source: Iterable[Dict]):
+
+        # Colas acotadas entre etapas: la memoria queda limitada a queue_size mensajes por cola
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        queues.append(None)
+
+        threads = [
+            PipelineStage(name, handler, queues[i], queues[i + 1])
+            for i, (name, handler) in enumerate(self.stages)
+        ]
+        for thread in threads:
+            thread.start()
+
+        # La fuente (render) corre en el hilo actual y alimenta la primera etapa
+        try:
+            for message in source:
+                queues[0].put(message)
+        except Exception as e:
+            self.logger.error(f"✗ Error en etapa de origen: {str(e)}")
+        finally:
+            queues[0].put(_STOP)
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,44 @@
+from typing import Dict
+
+# Contadores del resultado de cada PDF que se suman en el resumen final
+SUMMED_FIELDS = (
+    'total_pages',
+    'functional_pages',
+    'pdfs_generated',
+    'roi_optimizations',
+    'text_layer_pages',
+    'ocr_cache_hits',
+    'blank_pages',
+    'ocr_calls',
+    'ocr_failed_pages',
+)
+
+
+class RunSummary:
+
+    # Acumula totales a medida que terminan los PDFs: la memoria no depende del nº de PDFs
+    def __init__(self):
+
+        self.total_pdfs = 0
+        self.successful = 0
+        self.skipped = 0
+        self.failed_names = []
+        self.totals = {field: 0 for field in SUMMED_FIELDS}
+
+    def add(self, result: Dict):
+
+        self.total_pdfs += 1
+        if not result.get('success', False):
+            self.failed_names.append(result.get('pdf_name', ''))
+            return
+
+        self.successful += 1
+        for field in SUMMED_FIELDS:
+            self.totals[field] += result.get(field, 0)
+
+    def add_skipped(self):
+        self.skipped += 1
+
+    @property
+    def failed(self) -> int:
+        return len(self.failed_names)
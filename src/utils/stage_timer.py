@@ -0,0 +1,161 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+import json
+import os
+import threading
+import time
+
+from src.utils.atomic import atomic_output
+
+# Límites superiores (s) de los buckets del histograma, como en Prometheus
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss() -> Optional[int]:
+
+    # RSS actual en bytes (Linux); None donde /proc no existe
+    try:
+        with open('/proc/self/statm', 'rb') as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class StageTimer:
+
+    # Por etapa (render, orient, ocr, classify, report, split, excel): tiempo, llamadas,
+    # histograma de duraciones, píxeles procesados y variación de RSS
+    def __init__(self, track_memory: bool = False):
+
+        self.track_memory = track_memory and current_rss() is not None
+        self.lock = threading.Lock()
+        # Por hilo: tiempo de las etapas anidadas dentro de cada etapa abierta
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self):
+
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.pixels = defaultdict(int)
+        self.rss_deltas = defaultdict(int)
+        self.histograms = defaultdict(lambda: [0] * (len(HISTOGRAM_BUCKETS) + 1))
+
+    @contextmanager
+    def stage(self, name: str):
+                                            #Yields: dict donde el llamador puede anotar 'pixels'
+                                            # Al salir, sample['seconds'] es el tiempo propio de la etapa
+
+        # Etapas anidadas (p. ej. render de bandas dentro del OCR): la interior
+        # se descuenta de la exterior, cada etapa cuenta solo su propio tiempo
+        sample = {}
+        nested = self.local.__dict__.setdefault('nested', [])
+        nested.append(0.0)
+        rss_before = current_rss() if self.track_memory else None
+        start = time.perf_counter()
+        try:
+            yield sample
+        finally:
+            total = time.perf_counter() - start
+            elapsed = total - nested.pop()
+            if nested:
+                nested[-1] += total
+            sample['seconds'] = elapsed
+            rss_delta = current_rss() - rss_before if rss_before is not None else 0
+            # Las etapas del pipeline se registran desde varios hilos
+            with self.lock:
+                self.durations[name] += elapsed
+                self.counts[name] += 1
+                self.histograms[name][bisect_left(HISTOGRAM_BUCKETS, elapsed)] += 1
+                self.pixels[name] += sample.get('pixels', 0)
+                self.rss_deltas[name] += rss_delta
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(seconds, 4) for name, seconds in self.durations.items()}
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Dict]:
+
+        # Formato serializable (también para enviar lo medido en un worker al proceso principal)
+        with self.lock:
+            data = {
+                name: {
+                    'seconds': self.durations[name],
+                    'calls': self.counts[name],
+                    'pixels': self.pixels[name],
+                    'rss_delta': self.rss_deltas[name],
+                    'histogram': list(self.histograms[name])
+                }
+                for name in self.durations
+            }
+            if reset:
+                self.reset()
+        return data
+
+    def merge(self, snapshot: Dict[str, Dict]):
+
+        with self.lock:
+            for name, stage in snapshot.items():
+                self.durations[name] += stage['seconds']
+                self.counts[name] += stage['calls']
+                self.pixels[name] += stage['pixels']
+                self.rss_deltas[name] += stage['rss_delta']
+                histogram = self.histograms[name]
+                for index, count in enumerate(stage['histogram']):
+                    histogram[index] += count
+
+    def report(self) -> Dict[str, Dict]:
+
+        stages = {}
+        for name, stage in self.snapshot().items():
+            calls = stage['calls']
+            labels = [f"le_{bound:g}" for bound in HISTOGRAM_BUCKETS] + ['le_inf']
+            stages[name] = {
+                'calls': calls,
+                'seconds': round(stage['seconds'], 4),
+                'mean_ms': round(stage['seconds'] / calls * 1000, 3) if calls else 0.0,
+                'pixels': stage['pixels'],
+                'rss_delta_mb': round(stage['rss_delta'] / (1024 * 1024), 2),
+                'histogram': dict(zip(labels, stage['histogram']))
+            }
+        return stages
+
+    def write_json(self, path: Path, extra: Dict = None):
+
+        with atomic_output(path) as tmp_path:
+            Path(tmp_path).write_text(
+                json.dumps({**(extra or {}), 'stages': self.report()}, indent=2, ensure_ascii=False),
+                encoding='utf-8'
+            )
+
+    def write_prometheus(self, path: Path, prefix: str = "ocr_classifier"):
+
+        # Formato de texto de Prometheus (node_exporter textfile collector)
+        lines = [
+            f"# HELP {prefix}_stage_seconds Duración de cada llamada por etapa",
+            f"# TYPE {prefix}_stage_seconds histogram"
+        ]
+        snapshot = self.snapshot()
+        for name, stage in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(HISTOGRAM_BUCKETS + (float('inf'),), stage['histogram']):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stage["seconds"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stage["calls"]}')
+
+        for metric, key, help_text in (
+            ('stage_pixels_total', 'pixels', "Píxeles procesados por etapa"),
+            ('stage_rss_delta_bytes', 'rss_delta', "Variación acumulada de RSS por etapa")
+        ):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {'counter' if key == 'pixels' else 'gauge'}")
+            for name, stage in snapshot.items():
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {stage[key]}')
+
+        with atomic_output(path) as tmp_path:
+            Path(tmp_path).write_text('\n'.join(lines) + '\n', encoding='utf-8')
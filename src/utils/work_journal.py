@@ -0,0 +1,155 @@
+from pathlib import Path
+from typing import Dict, List
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from src.utils.logger import Logger
+from src.config import (
+    WORK_JOURNAL_FILE,
+    DOCUMENT_TYPES,
+    CLASSIFICATION_CONFIDENCE_THRESHOLD,
+    ENABLE_TEXT_LAYER,
+    TEXT_LAYER_MIN_CHARS,
+    TEXT_LAYER_MIN_WORDS,
+    TEXT_LAYER_MIN_VALID_RATIO,
+    TEXT_LAYER_MAX_IMAGE_COVERAGE,
+    ENABLE_ROI_OCR,
+    ROI_HEADER_PERCENTAGE,
+    ROI_FOOTER_PERCENTAGE,
+    ROI_CONFIDENCE_THRESHOLD,
+    ENABLE_EARLY_STOPPING,
+    EARLY_STOPPING_CONFIDENCE,
+    EARLY_STOPPING_BANDS,
+    EARLY_STOPPING_MIN_KEYWORDS,
+    ENABLE_BLANK_DETECTION,
+    BLANK_THRESHOLD,
+    BLANK_WHITE_LEVEL,
+    PDF_DPI,
+    OCR_LANGUAGE
+)
+
+
+def pdf_fingerprint(pdf_path: Path) -> str:
+
+    # Si el fichero se sustituye o modifica, su trabajo previo deja de valer
+    stat = pdf_path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def journal_settings() -> str:
+
+    # Lo que decide la clasificación de una página: si cambia (tipos, keywords,
+    # umbrales), los PDFs ya terminados se vuelven a procesar
+    settings = json.dumps({
+        'document_types': DOCUMENT_TYPES,
+        'confidence_threshold': CLASSIFICATION_CONFIDENCE_THRESHOLD,
+        'text_layer': [ENABLE_TEXT_LAYER, TEXT_LAYER_MIN_CHARS, TEXT_LAYER_MIN_WORDS,
+                       TEXT_LAYER_MIN_VALID_RATIO, TEXT_LAYER_MAX_IMAGE_COVERAGE],
+        'roi': [ENABLE_ROI_OCR, ROI_HEADER_PERCENTAGE, ROI_FOOTER_PERCENTAGE, ROI_CONFIDENCE_THRESHOLD],
+        'early_stopping': [ENABLE_EARLY_STOPPING, EARLY_STOPPING_CONFIDENCE,
+                           EARLY_STOPPING_BANDS, EARLY_STOPPING_MIN_KEYWORDS],
+        'blank': [ENABLE_BLANK_DETECTION, BLANK_THRESHOLD, BLANK_WHITE_LEVEL],
+        'dpi': PDF_DPI,
+        'language': OCR_LANGUAGE
+    }, sort_keys=True)
+    return hashlib.blake2b(settings.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class WorkJournal:
+
+    def __init__(self, db_path: Path = WORK_JOURNAL_FILE):
+
+        self.logger = Logger.get_logger(__name__)
+        self.db_path = Path(db_path)
+        self.lock = threading.Lock()
+        self.settings = journal_settings()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Compartido entre hilos del pipeline y procesos worker: WAL + timeout
+        self.connection = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pdfs ("
+            " path TEXT PRIMARY KEY,"
+            " fingerprint TEXT,"
+            " status TEXT,"
+            " result TEXT,"
+            " updated_at REAL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " path TEXT,"
+            " fingerprint TEXT,"
+            " page_number INTEGER,"
+            " classification TEXT,"
+            " PRIMARY KEY (path, page_number))"
+        )
+        self.connection.commit()
+
+    def _key(self, pdf_path: Path):
+        return str(Path(pdf_path).resolve()), f"{pdf_fingerprint(Path(pdf_path))}:{self.settings}"
+
+    def is_done(self, pdf_path: Path) -> bool:
+
+        path, fingerprint = self._key(pdf_path)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT fingerprint, status FROM pdfs WHERE path = ?", (path,)
+            ).fetchone()
+        return row is not None and row[0] == fingerprint and row[1] == 'done'
+
+    def completed_pages(self, pdf_path: Path) -> Dict[int, Dict]:
+
+        path, fingerprint = self._key(pdf_path)
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT page_number, classification FROM pages WHERE path = ? AND fingerprint = ?",
+                (path, fingerprint)
+            ).fetchall()
+        return {page_number: json.loads(classification) for page_number, classification in rows}
+
+    def record_pages(self, pdf_path: Path, classifications: List[Dict]):
+
+        if not classifications:
+            return
+        path, fingerprint = self._key(pdf_path)
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO pages (path, fingerprint, page_number, classification)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (path, fingerprint, c['page_number'], json.dumps(c, ensure_ascii=False))
+                    for c in classifications
+                ]
+            )
+            self.connection.commit()
+
+    def mark_done(self, pdf_path: Path, result: Dict):
+        self._mark(pdf_path, 'done', result)
+
+    def mark_failed(self, pdf_path: Path, result: Dict):
+        self._mark(pdf_path, 'failed', result)
+
+    def _mark(self, pdf_path: Path, status: str, result: Dict):
+
+        path, fingerprint = self._key(pdf_path)
+        payload = json.dumps(
+            {k: v for k, v in result.items() if k != 'classifications'},
+            ensure_ascii=False, default=str
+        )
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pdfs (path, fingerprint, status, result, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (path, fingerprint, status, payload, time.time())
+            )
+            # Un PDF terminado ya no necesita sus páginas: el journal no crece sin límite
+            if status == 'done':
+                self.connection.execute("DELETE FROM pages WHERE path = ?", (path,))
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
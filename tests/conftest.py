@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+
+    # DocumentProcessor sin caché ni journal y con log y salidas en tmp_path.
+    # Los modelos de OCR se cargan al primer uso: crear el procesador no importa paddle
+    import main
+    import src.generators.pdf_generator as pdf_generator
+    monkeypatch.setattr(main, 'LOG_FILE', tmp_path / "test.log")
+    monkeypatch.setattr(main, 'ENABLE_OCR_CACHE', False)
+    monkeypatch.setattr(pdf_generator, 'PDF_OUTPUT_FOLDER', tmp_path / "pdfs_procesados")
+    return main.DocumentProcessor(use_journal=False)
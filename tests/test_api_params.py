@@ -0,0 +1,30 @@
+import pytest
+
+from src.api.server import parse_classify_params
+from src.config import API_REQUEST_TIMEOUT
+
+
+def test_defaults():
+
+    assert parse_classify_params({}) == {
+        'pdf_name': 'documento.pdf', 'timeout': float(API_REQUEST_TIMEOUT), 'inline': False
+    }
+
+
+def test_valid_params():
+
+    params = parse_classify_params({'filename': ['../x/factura'], 'timeout': ['2.5'], 'inline': ['true']})
+    assert params == {'pdf_name': 'factura.pdf', 'timeout': 2.5, 'inline': True}
+
+
+@pytest.mark.parametrize('query', [
+    {'timeout': ['abc']},
+    {'timeout': ['nan']},
+    {'timeout': ['-1']},
+    {'inline': ['yes']},
+    {'filename': ['']},
+])
+def test_invalid_params(query):
+
+    with pytest.raises(ValueError):
+        parse_classify_params(query)
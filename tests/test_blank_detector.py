@@ -0,0 +1,17 @@
+import numpy as np
+from PIL import Image
+
+from src.analyzers.blank_detector import BlankPageDetector
+
+
+def test_grayscale_matches_pil():
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, size=(64, 256, 3), dtype=np.uint8)
+    # Todos los grises puros y los extremos de cada canal
+    pixels[0] = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+    pixels[1, :, :] = [[255, 0, 0], [0, 255, 0], [0, 0, 255], [255, 255, 255]] * 64
+
+    detector = BlankPageDetector()
+    expected = np.asarray(Image.fromarray(pixels).convert('L'))
+    assert np.array_equal(detector.to_grayscale(pixels), expected)
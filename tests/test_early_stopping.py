@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from src.config import DOCUMENT_TYPES, EARLY_STOPPING_BANDS
+from tests.test_keyword_equivalence import FILLER, TRICKY_TYPES, make_classifier
+
+
+def random_page(document_types, rng: random.Random):
+
+    # Página en EARLY_STOPPING_BANDS bandas: un tipo dominante arriba y el resto
+    # de keywords (de cualquier tipo) repartidas con menos densidad
+    dominant = document_types[rng.choice(sorted(document_types))]
+    dominant_words = dominant['primary_keywords'] + dominant['secondary_keywords']
+    all_words = [
+        keyword for config in document_types.values()
+        for keyword in config['primary_keywords'] + config['secondary_keywords']
+    ]
+    density = rng.uniform(0.05, 0.4)
+    bands = []
+    for band in range(EARLY_STOPPING_BANDS):
+        words = []
+        for _ in range(rng.randint(0, 12)):
+            if band < 2 and rng.random() < 0.5:
+                words.append(rng.choice(dominant_words))
+            elif rng.random() < density:
+                words.append(rng.choice(all_words))
+            else:
+                words.append(rng.choice(FILLER))
+        bands.append(' '.join(words))
+    return bands
+
+
+def new_keywords(classifier, partial: str, full: str, doc_type: str) -> int:
+
+    before = classifier.keyword_index.search(partial)[doc_type]
+    after = classifier.keyword_index.search(full)[doc_type]
+    return sum(len(found_after) - len(found_before) for found_before, found_after in zip(before, after))
+
+
+@pytest.mark.parametrize('document_types', [DOCUMENT_TYPES, TRICKY_TYPES], ids=['config', 'tricky'])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_early_stop_keeps_the_full_page_label(document_types, seed):
+
+    classifier = make_classifier(document_types)
+    rng = random.Random(seed)
+    checked = 0
+
+    for _ in range(800):
+        bands = random_page(document_types, rng)
+        full = ' '.join(bands)
+
+        # Mismo recorrido que la lectura incremental: se para en la primera banda decidida
+        for read in range(1, EARLY_STOPPING_BANDS):
+            partial = ' '.join(bands[:read])
+            read_fraction = read / EARLY_STOPPING_BANDS
+            if not classifier.is_decided(partial, read_fraction):
+                continue
+
+            # Garantía de is_decided: con lo que queda sin leer dentro de lo plausible para
+            # cada tipo (plausible_remaining_keywords), la etiqueta ya no cambia
+            within_plausible = all(
+                new_keywords(classifier, partial, full, doc_type) <= classifier.plausible_remaining_keywords(
+                    sum(map(len, classifier.keyword_index.search(partial)[doc_type])), read_fraction
+                )
+                for doc_type in document_types
+            )
+            if within_plausible:
+                assert classifier.classify_page(partial)[0] == classifier.classify_page(full)[0], (partial, full)
+                checked += 1
+            break
+
+    # El generador produce bastantes páginas decididas antes del final
+    assert checked >= 100
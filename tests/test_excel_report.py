@@ -0,0 +1,32 @@
+from openpyxl import load_workbook
+
+from src.generators import excel_report
+from src.processors.classifier import DocumentClassifier
+
+
+class RecordingAtexit:
+
+    def __init__(self):
+        self.handlers = []
+
+    def register(self, handler):
+        self.handlers.append(handler)
+
+    def unregister(self, handler):
+        self.handlers = [registered for registered in self.handlers if registered != handler]
+
+
+def test_save_classification_excel_leaves_no_exit_handlers(tmp_path, monkeypatch):
+
+    recorder = RecordingAtexit()
+    monkeypatch.setattr(excel_report, 'atexit', recorder)
+    classifier = DocumentClassifier()
+    excel_path = tmp_path / "reporte.xlsx"
+    page = {'document_type': 'INVOICE', 'functional': True, 'ocr_confidence': 0.9}
+
+    for index in range(5):
+        classifier.save_classification_excel(f"/in/{index}.pdf", f"{index}.pdf", [page], str(excel_path))
+
+    assert recorder.handlers == []
+    # Cada llamada escribe su fila al momento
+    assert load_workbook(excel_path).active.max_row == 6
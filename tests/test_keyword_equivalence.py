@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+from src.config import DOCUMENT_TYPES
+from src.processors.classifier import DocumentClassifier
+from src.processors.keyword_index import KeywordIndex
+
+# Keywords que se solapan, con puntuación en los bordes, repetidas y no ASCII
+TRICKY_TYPES = {
+    'ORDER': {
+        'primary_keywords': ['p.o', 'p.o.', 'purchase order', 'order'],
+        'secondary_keywords': ['no', 'no.', 'net 30', 'net 30 days', '$', '(usd)', 'order', 'e-mail'],
+        'min_secondary_matches': 1,
+        'functional': True,
+        'priority': 10
+    },
+    'NOTE': {
+        'primary_keywords': ['nota', 'nota de crédito', 'crédito'],
+        'secondary_keywords': ['ñandú', 'x_y', 'a/b', 'no', 'usd'],
+        'min_secondary_matches': 0,
+        'functional': False,
+        'priority': 5
+    },
+    'ORDER_COPY': {
+        'primary_keywords': ['order', 'copy'],
+        'secondary_keywords': ['no.', 'net 30', 'usd', 'usd'],
+        'min_secondary_matches': 2,
+        'functional': True,
+        'priority': 1
+    },
+}
+FILLER = ['the', 'x', 'no.', '123', 'total:', 'of', '-', 'invoices', 'packing', '_', 'días', '(', ')', '.', '$5']
+
+
+def reference_classify(classifier: DocumentClassifier, text: str):
+
+    # classify_page original: find_keywords_smart por tipo y palabra clave
+    candidates = {}
+    for doc_type, config in classifier.document_types.items():
+        primary_found = classifier.find_keywords_smart(text, config.get('primary_keywords', []))
+        if not primary_found:
+            continue
+        secondary_found = classifier.find_keywords_smart(text, config.get('secondary_keywords', []))
+
+        is_functional = config.get('functional', False)
+        if is_functional and len(secondary_found) < config.get('min_secondary_matches', 0):
+            continue
+
+        score = (len(primary_found) * 3) + len(secondary_found)
+        if not is_functional:
+            score = score * 0.7
+        candidates[doc_type] = {
+            'score': score,
+            'primary': primary_found,
+            'secondary': secondary_found,
+            'total_keywords': len(primary_found) + len(secondary_found),
+            'functional': is_functional
+        }
+
+    if not candidates:
+        return "UNKNOWN", [], [], 0, 0
+    winner = max(candidates, key=lambda doc_type: (
+        candidates[doc_type]['score'], candidates[doc_type]['functional'], candidates[doc_type]['total_keywords']
+    ))
+    data = candidates[winner]
+    return winner, data['primary'], data['secondary'], data['total_keywords'], len(candidates)
+
+
+def random_texts(document_types, seed: int, count: int):
+
+    rng = random.Random(seed)
+    words = [
+        keyword for config in document_types.values()
+        for keyword in config['primary_keywords'] + config['secondary_keywords']
+    ]
+    texts = ['', '   ', 'nothing here']
+    for _ in range(count):
+        parts = [rng.choice(words) if rng.random() < 0.6 else rng.choice(FILLER) for _ in range(rng.randint(0, 25))]
+        # Separadores variados: las keywords también aparecen pegadas a puntuación y dígitos
+        text = ''.join(part + rng.choice([' ', ' ', '', '\n', ', ', '.', '1', '_']) for part in parts)
+        if rng.random() < 0.3:
+            text = text.upper()
+        texts.append(text)
+    return texts
+
+
+def make_classifier(document_types) -> DocumentClassifier:
+
+    classifier = DocumentClassifier()
+    classifier.document_types = document_types
+    classifier.keyword_index = KeywordIndex(document_types)
+    return classifier
+
+
+@pytest.mark.parametrize('document_types', [DOCUMENT_TYPES, TRICKY_TYPES], ids=['config', 'tricky'])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_index_matches_find_keywords_smart(document_types, seed):
+
+    classifier = make_classifier(document_types)
+    texts = random_texts(document_types, seed, 600)
+
+    for text in texts:
+        hits = classifier.keyword_index.search(text)
+        for doc_type, config in document_types.items():
+            assert hits[doc_type] == (
+                classifier.find_keywords_smart(text, config['primary_keywords']),
+                classifier.find_keywords_smart(text, config['secondary_keywords'])
+            ), (doc_type, text)
+        assert classifier.classify_page(text) == reference_classify(classifier, text), text
+
+    # Scoring matricial de todas las páginas a la vez: mismo resultado que página a página
+    assert classifier.classify_pages(texts) == [classifier.classify_page(text) for text in texts]
@@ -0,0 +1,60 @@
+from src.utils.ocr_cache import OCRCache
+
+
+def stored_bytes(cache: OCRCache) -> int:
+    return cache.connection.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM pages").fetchone()[0]
+
+
+def counted_bytes(cache: OCRCache) -> int:
+    return cache.connection.execute("SELECT total_bytes FROM stats").fetchone()[0]
+
+
+def test_running_size_follows_puts_replacements_and_evictions(tmp_path):
+
+    cache = OCRCache(tmp_path / "cache.sqlite", max_bytes=10 ** 9)
+    for index in range(20):
+        cache.put(f"page{index}", 0.0, 1.0, 0, [{'text': "x" * index * 50, 'index': index}])
+    # Reemplazar una entrada resta su tamaño anterior
+    cache.put("page3", 0.0, 1.0, 0, [{'text': "nuevo texto distinto " * 40}])
+    assert counted_bytes(cache) == stored_bytes(cache)
+
+    # Con un límite menor se eliminan las más antiguas hasta quedar por debajo
+    cache.max_bytes = stored_bytes(cache) // 2
+    cache.put("page20", 0.0, 1.0, 0, [{'text': "y" * 500}])
+    assert counted_bytes(cache) == stored_bytes(cache) <= cache.max_bytes
+    assert cache.get("page0") is None
+    assert cache.get("page20") is not None
+    cache.close()
+
+    # Al reabrir se conserva el total sin recalcularlo
+    cache = OCRCache(tmp_path / "cache.sqlite", max_bytes=10 ** 9)
+    assert counted_bytes(cache) == stored_bytes(cache)
+    cache.close()
+
+
+def test_cached_bands_are_reused_only_with_the_same_rotation(processor, tmp_path, monkeypatch):
+
+    import fitz
+    import main
+    pdf_path = tmp_path / "scan.pdf"
+    document = fitz.open()
+    document.new_page().draw_rect(fitz.Rect(50, 50, 300, 120), color=None, fill=(0.2, 0.2, 0.2))
+    document.save(pdf_path)
+    document.close()
+
+    cache = OCRCache(tmp_path / "cache.sqlite")
+    cache.put("page", 90.0, 0.65, 0, [[0, 10, 0, 10, [["texto sin girar", 0.9, [0, 0, 5, 5]]]]])
+
+    with processor.converter.open_pdf(pdf_path) as session:
+        page_data = next(processor.converter.convert_pdf_pages(session))
+        # Con un umbral menor la página se gira: las bandas leídas sin girar no valen
+        for threshold, rotation, reused in ((0.7, 0, True), (0.6, 90, False)):
+            monkeypatch.setattr(main, 'ANGLE_CONFIDENCE_THRESHOLD', threshold)
+            page_data['cached'] = cache.get("page")
+            page_data['orientation'] = (90.0, 0.65)
+            planner, _, orientation = processor._prepare_page(page_data, apply_threshold=True)
+
+            assert orientation == (90.0, 0.65, rotation)
+            assert bool(planner.bands) == reused
+            assert (page_data['cached'] is not None) == reused
+    cache.close()
@@ -0,0 +1,72 @@
+import fitz
+
+from src.utils.ocr_cache import OCRCache
+from src.utils.work_journal import WorkJournal
+
+
+class FakeOCR:
+
+    def __init__(self):
+        self.fail = False
+
+    def predict(self, input):
+        if self.fail:
+            raise RuntimeError("fallo simulado")
+        images = input if isinstance(input, list) else [input]
+        return [
+            {'rec_texts': ["Commercial invoice bill to subtotal tax amount payment terms total"],
+             'rec_scores': [0.95], 'rec_boxes': [[0, 0, image.shape[1], 20]]}
+            for image in images
+        ]
+
+
+class FakeOrientation:
+
+    def predict(self, input, batch_size=1):
+        return [{'label_names': ['0'], 'scores': [0.99]} for _ in input]
+
+
+def write_scan(path):
+
+    # Formulario dibujado sin capa de texto: la página va a OCR
+    document = fitz.open()
+    page = document.new_page(width=595, height=842)
+    for top in range(100, 700, 60):
+        page.draw_rect(fitz.Rect(40, top, 555, top + 40), color=(0, 0, 0), fill=(0.2, 0.2, 0.2))
+    document.save(path)
+    document.close()
+
+
+def test_failed_ocr_is_not_cached_nor_marked_done(processor, tmp_path):
+
+    ocr = FakeOCR()
+    processor.ocr._ocr = ocr
+    processor.ocr._document_orientation = FakeOrientation()
+    processor.converter.page_signatures = True
+    processor.cache = OCRCache(tmp_path / "cache.sqlite")
+    processor.journal = WorkJournal(tmp_path / "journal.sqlite")
+    processor.classifier.output_folder = tmp_path / "clasificacion"
+    pdf_path = tmp_path / "scan.pdf"
+    write_scan(pdf_path)
+
+    ocr.fail = True
+    result = processor.process_pdf(pdf_path, write_excel=False)
+    processor._journal_result(pdf_path, result)
+
+    assert result['ocr_failed_pages'] == 1
+    assert result['ocr_calls'] == 0
+    assert processor.cache.connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0] == 0
+    assert not processor.journal.is_done(pdf_path)
+    assert processor.journal.completed_pages(pdf_path) == {}
+
+    # La siguiente ejecución vuelve a leer la página y ya la guarda
+    ocr.fail = False
+    result = processor.process_pdf(pdf_path, write_excel=False)
+    processor._journal_result(pdf_path, result)
+
+    assert result['ocr_failed_pages'] == 0
+    assert result['functional_pages'] == 1
+    assert processor.cache.connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0] == 1
+    assert processor.journal.is_done(pdf_path)
+    processor.cache.close()
+    processor.journal.close()
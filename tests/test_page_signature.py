@@ -0,0 +1,54 @@
+import fitz
+
+from src.converters.pdf_converter import PDFConverter
+
+
+def write_form(path, value: str, note: str = None):
+
+    # Misma plantilla (contenido y campo) con otro valor rellenado o una nota encima
+    document = fitz.open()
+    page = document.new_page(width=595, height=842)
+    page.insert_text((40, 60), "Purchase order form", fontsize=14)
+    widget = fitz.Widget()
+    widget.field_name = "order_number"
+    widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+    widget.rect = fitz.Rect(40, 80, 300, 110)
+    widget.field_value = value
+    page.add_widget(widget)
+    if note:
+        page.add_freetext_annot(fitz.Rect(40, 200, 300, 240), note)
+    document.save(path)
+    document.close()
+
+
+def signature(converter: PDFConverter, path) -> bytes:
+
+    document = fitz.open(path)
+    page = document[0]
+    result = converter.page_signature(document, page, converter.zoom)
+    document.close()
+    return result
+
+
+def test_signature_changes_with_form_values_and_annotations(tmp_path):
+
+    converter = PDFConverter(page_signatures=True)
+    for name, value, note in (("a", "PO-1001", None), ("b", "PO-1001", None),
+                              ("c", "PO-2002", None), ("d", "PO-1001", "Aprobado")):
+        write_form(tmp_path / f"{name}.pdf", value, note)
+    signatures = {name: signature(converter, tmp_path / f"{name}.pdf") for name in "abcd"}
+
+    assert signatures["a"] == signatures["b"]
+    assert signatures["c"] != signatures["a"]
+    assert signatures["d"] != signatures["a"]
+
+
+def test_no_signature_without_cache(tmp_path):
+
+    write_form(tmp_path / "a.pdf", "PO-1001")
+    converter = PDFConverter(page_signatures=False, detect_blank=False, use_text_layer=False)
+    session = converter.open_pdf(tmp_path / "a.pdf")
+    pages = list(converter.convert_pdf_pages(session))
+    session.close()
+
+    assert [page['signature'] for page in pages] == [None]
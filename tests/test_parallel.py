@@ -0,0 +1,23 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils.parallel import THREAD_ENV_VARS, ThreadLimitedSpawnContext
+
+
+def thread_environ():
+
+    # Entorno con el que arrancó el worker: el que ve numpy/OpenBLAS al importarse
+    return {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+
+
+def test_workers_start_with_thread_limits_parent_keeps_its_own(monkeypatch):
+
+    monkeypatch.setenv('OMP_NUM_THREADS', '7')
+    monkeypatch.delenv('OPENBLAS_NUM_THREADS', raising=False)
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=ThreadLimitedSpawnContext(2)) as executor:
+        environ = executor.submit(thread_environ).result()
+
+    assert environ == {var: '2' for var in THREAD_ENV_VARS}
+    assert os.environ['OMP_NUM_THREADS'] == '7'
+    assert 'OPENBLAS_NUM_THREADS' not in os.environ
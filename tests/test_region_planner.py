@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+
+from src.processors.region_planner import OCRRegionPlanner
+
+
+def make_planner(recognize=None) -> OCRRegionPlanner:
+
+    # Página de 1000 filas con márgenes de 50 (5%)
+    def no_ocr(crop):
+        raise AssertionError("no debería pasar por el OCR")
+    return OCRRegionPlanner(np.zeros((1000, 100, 3), dtype=np.uint8), recognize or no_ocr, overlap=0.05)
+
+
+def test_plan_rows_merges_bands_and_adds_margins_only_towards_read_rows():
+
+    planner = make_planner()
+    assert planner.plan_rows(0, 200) == [(0, 200, 0, 200)]
+
+    planner.add_band((0, 200, 0, 200), [])
+    # Margen solo hacia la banda ya leída (arriba), no hacia la parte sin leer
+    assert planner.plan_rows(100, 400) == [(200, 400, 150, 400)]
+
+    # Bandas solapadas cuentan como una; cada hueco entre bandas, con margen a ambos lados
+    planner.add_band((150, 300, 100, 300), [])
+    planner.add_band((500, 600, 450, 650), [])
+    assert planner.plan_rows(0, 1000) == [(300, 500, 250, 550), (600, 1000, 550, 1000)]
+    assert planner.plan_rows(-10, 250) == []
+    # Las filas de margen ya leídas solo se cuentan una vez
+    assert planner.coverage == (300 + 200) / 1000
+
+
+def test_line_clipped_at_a_band_edge_is_replaced_by_the_full_line():
+
+    planner = make_planner()
+    # Banda superior: una línea completa y otra cortada por el borde inferior
+    planner.add_band((0, 200, 0, 200), [("Invoice", 0.9, (0, 20, 60, 40)), ("Bill", 0.5, (0, 190, 40, 199))])
+    # Banda siguiente con margen: la misma línea entera (coordenadas relativas al recorte)
+    planner.add_band((200, 400, 150, 400), [("Bill to ACME", 0.95, (0, 40, 90, 65)), ("Total", 0.9, (0, 100, 40, 120))])
+
+    assert planner.extract_rows(0, 400) == ("Invoice Bill to ACME Total", (0.9 + 0.95 + 0.9) / 3)
+
+
+def test_lines_in_the_margin_belong_to_the_other_band():
+
+    planner = make_planner()
+    planner.add_band((200, 400, 150, 400), [("Margen", 0.9, (0, 0, 40, 20)), ("Dentro", 0.9, (0, 100, 40, 120))])
+
+    assert [text for text, _, _ in planner.bands[0][2]] == ["Dentro"]
+
+
+def test_export_and_load_bands_round_trip():
+
+    calls = []
+
+    def recognize(crop):
+        calls.append(crop.shape[0])
+        return [("Packing list", 0.8, (0, 10, 80, 30)), ("Net weight", 0.7, (0, crop.shape[0] - 30, 80, crop.shape[0] - 10))]
+
+    planner = make_planner(recognize)
+    planner.extract_rows(0, 300)
+    planner.extract_rows(0, 700)
+    expected = planner.extract_full_page()
+    assert len(calls) == 3
+
+    # Lo que guarda la caché (JSON) reconstruye el mismo texto sin volver al OCR
+    restored = make_planner()
+    restored.load_bands(json.loads(json.dumps(planner.export_bands())))
+    assert restored.extract_full_page() == expected
+    assert restored.export_bands() == planner.export_bands()
+    assert restored.ocr_calls == 0 and restored.pixels_ocr == 0
+
+
+def test_failed_region_is_not_a_band_nor_retried():
+
+    calls = []
+
+    def recognize(crop):
+        calls.append(crop.shape[0])
+        return None
+
+    planner = make_planner(recognize)
+    assert planner.extract_rows(0, 300) == ("", 0.0)
+    assert planner.extract_rows(0, 300) == ("", 0.0)
+
+    assert calls == [300]
+    assert planner.failed
+    assert planner.bands == [] and planner.ocr_calls == 0 and planner.export_bands() == []
@@ -0,0 +1,20 @@
+import time
+
+from src.utils.stage_timer import StageTimer
+
+
+def test_nested_stage_counts_only_its_own_time():
+
+    # Render de bandas dentro del OCR: el OCR no incluye el tiempo del render
+    timer = StageTimer()
+    with timer.stage('ocr') as ocr_sample:
+        time.sleep(0.02)
+        with timer.stage('render') as render_sample:
+            render_sample['pixels'] = 100
+            time.sleep(0.05)
+
+    stages = timer.snapshot()
+    assert stages['render']['pixels'] == 100
+    assert stages['render']['seconds'] >= 0.05
+    assert 0.02 <= stages['ocr']['seconds'] < 0.05
+    assert ocr_sample['seconds'] == stages['ocr']['seconds']
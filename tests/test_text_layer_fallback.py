@@ -0,0 +1,87 @@
+import numpy as np
+import fitz
+
+STAMP = "Scanned by DocuScan Pro at the Rotterdam office, operator station twelve, archive copy batch 0042"
+INVOICE = (
+    "Commercial invoice number 1182 bill to ACME Corp ship to Rotterdam "
+    "payment terms net 30 days subtotal tax amount total amount due"
+)
+
+
+def scanned_page_image() -> fitz.Pixmap:
+
+    # "Escaneo": ruido gris claro con un bloque oscuro, sin capa de texto propia
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(200, 256, size=(330, 255, 3), dtype=np.uint8)
+    pixels[40:80, 30:220] = 20
+    return fitz.Pixmap(fitz.csRGB, 255, 330, pixels.tobytes(), False)
+
+
+def write_pdf(path, pages):
+
+    # pages: [(texto, contenido)] con contenido 'scan' (imagen de página completa),
+    # 'vector' (formulario dibujado) o None
+    document = fitz.open()
+    for text, content in pages:
+        page = document.new_page(width=595, height=842)
+        if content == 'scan':
+            page.insert_image(page.rect, pixmap=scanned_page_image())
+        elif content == 'vector':
+            for top in range(100, 700, 60):
+                page.draw_rect(fitz.Rect(40, top, 555, top + 40), color=(0, 0, 0), fill=(0.2, 0.2, 0.2))
+        stamp = content is not None
+        page.insert_textbox(fitz.Rect(40, 780, 555, 830) if stamp else fitz.Rect(40, 60, 555, 400),
+                            text, fontsize=8 if stamp else 11)
+    document.save(path)
+    document.close()
+
+
+def window_pages(processor, pdf_path):
+
+    with processor.converter.open_pdf(pdf_path) as session:
+        return [
+            {key: page[key] for key in ('page_number', 'text_source', 'success')}
+            for window in processor._iter_page_windows(session)
+            for page in window
+        ]
+
+
+def test_stamped_scan_is_rasterized(processor, tmp_path):
+
+    # Escaneo con un sello del escáner como capa de texto: la página es una imagen y va a OCR
+    pdf_path = tmp_path / "stamped.pdf"
+    write_pdf(pdf_path, [(STAMP, 'scan')])
+
+    with processor.converter.open_pdf(pdf_path) as session:
+        assert processor.converter.extract_text_layer(session.document[0])
+        pages = list(processor.converter.convert_pdf_pages(session))
+
+    assert [page['text_source'] for page in pages] == ['ocr']
+    assert pages[0]['raster'] is not None
+
+
+def test_text_layer_without_keywords_falls_back_to_ocr(processor, tmp_path):
+
+    # Capa de texto válida pero sin keywords y sin imagen que la delate: también va a OCR
+    pdf_path = tmp_path / "stamp_only.pdf"
+    write_pdf(pdf_path, [(STAMP, 'vector'), (INVOICE, None)])
+
+    pages = window_pages(processor, pdf_path)
+
+    assert [page['text_source'] for page in pages] == ['ocr', 'text_layer']
+    assert all(page['success'] for page in pages)
+
+
+def test_text_layer_page_is_classified_once(processor, tmp_path):
+
+    # La clasificación hecha al decidir el fallback se reutiliza en el análisis
+    pdf_path = tmp_path / "native.pdf"
+    write_pdf(pdf_path, [(INVOICE, None)])
+
+    with processor.converter.open_pdf(pdf_path) as session:
+        window = next(processor._iter_page_windows(session))
+        assert window[0]['analysis']['document_type'] == 'INVOICE'
+        analyses = processor._analyze_window(window)
+
+    assert analyses[0] is window[0]['analysis']
+    assert analyses[0]['text_source'] == 'text_layer'
@@ -0,0 +1,21 @@
+from src.utils import work_journal
+from src.utils.work_journal import WorkJournal
+
+
+def test_settings_change_invalidates_done_pdfs(tmp_path, monkeypatch):
+
+    pdf_path = tmp_path / "a.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    journal = WorkJournal(tmp_path / "journal.sqlite")
+    journal.record_pages(pdf_path, [{'page_number': 1, 'document_type': 'INVOICE'}])
+    journal.mark_done(pdf_path, {'success': True})
+    assert journal.is_done(pdf_path)
+    journal.record_pages(pdf_path, [{'page_number': 1, 'document_type': 'INVOICE'}])
+    journal.close()
+
+    # Otro umbral de clasificación: ni el PDF ni sus páginas cuentan como terminados
+    monkeypatch.setattr(work_journal, 'CLASSIFICATION_CONFIDENCE_THRESHOLD', 0.9)
+    journal = WorkJournal(tmp_path / "journal.sqlite")
+    assert not journal.is_done(pdf_path)
+    assert journal.completed_pages(pdf_path) == {}
+    journal.close()